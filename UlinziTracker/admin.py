@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Profile, Incident
+from . import search
+from .models import ArchivedIncident, Profile, Incident, IncidentTransition, Job, Place
 
 # Admin for Incident model
 class IncidentAdmin(admin.ModelAdmin):
@@ -8,12 +9,66 @@ class IncidentAdmin(admin.ModelAdmin):
     search_fields = ('title', 'description', 'reporter__username', 'location')
     ordering = ('-time_reported',)
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of icontains scans over four columns.
+        if not search_term.strip():
+            return queryset, False
+        return search.filter_matching(queryset, search_term), False
+
 # Admin for Profile model
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'role', 'contact_number', 'location')
     list_filter = ('role',)
     search_fields = ('user__username', 'contact_number', 'location')
 
+# Admin for background jobs
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'queue', 'status', 'priority', 'attempts', 'created_at', 'started_at', 'finished_at')
+    list_filter = ('status', 'queue', 'name')
+    ordering = ('-created_at',)
+    readonly_fields = ('last_error',)
+
+# Admin for the place gazetteer used to geocode locations
+class PlaceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'latitude', 'longitude')
+    search_fields = ('name',)
+
+# Read-only view of the status transition log
+class IncidentTransitionAdmin(admin.ModelAdmin):
+    list_display = ('incident_id', 'from_status', 'to_status', 'category', 'actor', 'at', 'elapsed')
+    list_filter = ('to_status', 'category')
+    ordering = ('-at',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+# Read-only view of archived incidents
+class ArchivedIncidentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'title', 'category', 'reporter', 'time_reported', 'archived_at')
+    list_filter = ('category',)
+    search_fields = ('title', 'location')
+    ordering = ('-time_reported', '-id')
+    list_select_related = ('reporter',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 # Register models
 admin.site.register(Profile, ProfileAdmin)
 admin.site.register(Incident, IncidentAdmin)
+admin.site.register(Job, JobAdmin)
+admin.site.register(Place, PlaceAdmin)
+admin.site.register(IncidentTransition, IncidentTransitionAdmin)
+admin.site.register(ArchivedIncident, ArchivedIncidentAdmin)
@@ -0,0 +1,129 @@
+from array import array
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from .models import ArchivedIncident, Incident
+
+
+# ---------------------------
+# Incident trend analytics
+# ---------------------------
+# Rows for the window are streamed with values_list().iterator() into flat
+# arrays (timestamps plus small integer codes for category and status); every
+# series is then a NumPy bincount over those arrays. Archived incidents (see
+# archive.py) are read too, so the numbers don't drop when old reports move.
+# Callers cache the result per window through caching.cached (see
+# views.incident_trends).
+
+WINDOWS = {
+    '7d': 7,
+    '30d': 30,
+    '90d': 90,
+    '365d': 365,
+}
+HOURLY_MAX_DAYS = 31      # hourly series are only returned for short windows
+ROLLING_DAYS = 7
+ROLLING_HOURS = 24
+CHUNK_SIZE = 5000
+
+CATEGORIES = [value for value, _ in Incident.CATEGORY_CHOICES]
+STATUSES = [value for value, _ in Incident.STATUS_CHOICES]
+DAY = 86400
+HOUR = 3600
+
+
+def load_columns(since, until, category=None):
+    """Return ``(timestamps, category_codes, status_codes)`` as NumPy arrays."""
+    category_codes = {value: code for code, value in enumerate(CATEGORIES)}
+    status_codes = {value: code for code, value in enumerate(STATUSES)}
+    stamps, categories, statuses = array('d'), array('b'), array('b')
+    for model in (Incident, ArchivedIncident):
+        queryset = model.objects.filter(time_reported__gte=since, time_reported__lt=until)
+        if category:
+            queryset = queryset.filter(category=category)
+        rows = queryset.order_by().values_list('time_reported', 'category', 'status').iterator(chunk_size=CHUNK_SIZE)
+        for reported, row_category, row_status in rows:
+            stamps.append(reported.timestamp())
+            categories.append(category_codes.get(row_category, -1))
+            statuses.append(status_codes.get(row_status, -1))
+    return (np.frombuffer(stamps, dtype=np.float64),
+            np.frombuffer(categories, dtype=np.int8),
+            np.frombuffer(statuses, dtype=np.int8))
+
+
+def _to_local(stamps, since, until):
+    # Shift UTC seconds to wall-clock seconds so days and hours line up with
+    # what people in TIME_ZONE see.
+    tz = timezone.get_current_timezone()
+    first, last = since.astimezone(tz).utcoffset(), until.astimezone(tz).utcoffset()
+    if first == last:
+        return stamps + first.total_seconds()
+    # The offset changes inside the window: look it up once per distinct hour.
+    hours, inverse = np.unique(np.floor(stamps / HOUR), return_inverse=True)
+    offsets = np.array([datetime.fromtimestamp(hour * HOUR, tz).utcoffset().total_seconds() for hour in hours])
+    return stamps + offsets[inverse]
+
+
+def rolling_mean(values, size):
+    """Trailing mean over ``size`` points; None until the window is full."""
+    if len(values) < size:
+        return [None] * len(values)
+    sums = np.cumsum(np.insert(values.astype(np.float64), 0, 0.0))
+    means = (sums[size:] - sums[:-size]) / size
+    return [None] * (size - 1) + [round(float(mean), 3) for mean in means]
+
+
+def trends(window, category=None, now=None):
+    """Hourly/daily counts, rolling averages and a weekday x hour heatmap."""
+    days = WINDOWS[window]
+    until = now or timezone.now()
+    since = until - timedelta(days=days)
+    stamps, categories, statuses = load_columns(since, until, category)
+
+    local = _to_local(stamps, since, until)
+    local_since = _to_local(np.array([since.timestamp()]), since, until)[0]
+    local_until = _to_local(np.array([until.timestamp()]), since, until)[0]
+
+    first_day = np.floor(local_since / DAY) * DAY
+    day_count = int((np.floor(local_until / DAY) * DAY - first_day) // DAY) + 1
+    day_index = ((local - first_day) // DAY).astype(np.int64)
+    daily = np.bincount(day_index, minlength=day_count)[:day_count]
+
+    tz = timezone.get_current_timezone()
+    start_date = datetime.fromtimestamp(first_day, timezone.utc).date()
+    result = {
+        'window': window,
+        'category': category or None,
+        'since': since.astimezone(tz).isoformat(),
+        'until': until.astimezone(tz).isoformat(),
+        'total': int(stamps.size),
+        'daily': {
+            'labels': [(start_date + timedelta(days=offset)).isoformat() for offset in range(day_count)],
+            'counts': daily.tolist(),
+            'rolling_mean': rolling_mean(daily, ROLLING_DAYS),
+        },
+        'daily_by_category': {
+            value: np.bincount(day_index[categories == code], minlength=day_count)[:day_count].tolist()
+            for code, value in enumerate(CATEGORIES)
+        },
+        'status_totals': dict(zip(STATUSES, np.bincount(statuses[statuses >= 0], minlength=len(STATUSES)).tolist())),
+    }
+
+    # Weekday (Monday first) x hour of day. 1970-01-01 was a Thursday.
+    weekday = ((local // DAY).astype(np.int64) + 3) % 7
+    hour_of_day = ((local % DAY) // HOUR).astype(np.int64)
+    result['heatmap'] = np.bincount(weekday * 24 + hour_of_day, minlength=7 * 24).reshape(7, 24).tolist()
+
+    if days <= HOURLY_MAX_DAYS:
+        first_hour = np.floor(local_since / HOUR) * HOUR
+        hour_count = int((np.floor(local_until / HOUR) * HOUR - first_hour) // HOUR) + 1
+        hourly = np.bincount(((local - first_hour) // HOUR).astype(np.int64), minlength=hour_count)[:hour_count]
+        start = datetime.fromtimestamp(first_hour, timezone.utc).replace(tzinfo=None)
+        result['hourly'] = {
+            'labels': [(start + timedelta(hours=offset)).isoformat() for offset in range(hour_count)],
+            'counts': hourly.tolist(),
+            'rolling_mean': rolling_mean(hourly, ROLLING_HOURS),
+        }
+    return result
@@ -0,0 +1,241 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_http_methods
+
+from . import caching
+from .forms import IncidentForm
+from .models import Incident
+from .pagination import keyset_slice
+
+
+# ---------------------------
+# JSON API (v1)
+# ---------------------------
+# Session-authenticated JSON endpoints for the mobile client and integrations.
+# Lists use the same keyset cursors as the HTML pages (?after= / ?before=),
+# ?fields= limits both the response and the columns read, and every GET
+# carries an ETag so unchanged pages come back as an empty 304.
+
+def _url(name, incident):
+    return reverse(f'UlinziTracker:{name}', args=[incident.pk])
+
+
+def _duration(value):
+    return value.total_seconds() if value is not None else None
+
+
+def _media(incident, field, url_name, *args):
+    if not getattr(incident, field):
+        return None
+    return reverse(f'UlinziTracker:{url_name}', args=[incident.pk, *args])
+
+
+# field name -> (model columns it reads, value getter)
+FIELDS = {
+    'id': ((), lambda i: i.pk),
+    'title': (('title',), lambda i: i.title),
+    'description': (('description',), lambda i: i.description),
+    'category': (('category',), lambda i: i.category),
+    'status': (('status',), lambda i: i.status),
+    'location': (('location',), lambda i: i.location),
+    'latitude': (('latitude',), lambda i: i.latitude),
+    'longitude': (('longitude',), lambda i: i.longitude),
+    'time_reported': ((), lambda i: i.time_reported.isoformat()),
+    'reporter': (('reporter__username',), lambda i: i.reporter.username),
+    'confirmed_by': (('confirmed_by__username',), lambda i: i.confirmed_by.username if i.confirmed_by else None),
+    'response_notes': (('response_notes',), lambda i: i.response_notes),
+    'response_time': (('response_time',), lambda i: _duration(i.response_time)),
+    'resolution_time': (('resolution_time',), lambda i: _duration(i.resolution_time)),
+    'image': (('image',), lambda i: _media(i, 'image', 'incident_image', 'original')),
+    'thumbnail': (('image_thumbnail',), lambda i: _media(i, 'image_thumbnail', 'incident_image', 'thumb')),
+    'video': (('video',), lambda i: _media(i, 'video', 'incident_media', 'video')),
+    'audio': (('audio',), lambda i: _media(i, 'audio', 'incident_media', 'audio')),
+    'pdf': ((), lambda i: _url('pdf_view', i)),
+}
+DEFAULT_FIELDS = ('id', 'title', 'category', 'status', 'location', 'time_reported', 'reporter')
+# Everything incident_status can write, so its If-Match precondition covers them.
+STATUS_FIELDS = DEFAULT_FIELDS + ('confirmed_by', 'response_notes')
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def api_view(view):
+    """JSON 401 instead of a login redirect, and ApiError -> JSON error."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'authentication required'}, status=401)
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as exc:
+            return JsonResponse({'error': str(exc), **exc.extra}, status=exc.status)
+    return wrapper
+
+
+def selected_fields(request):
+    raw = request.GET.get('fields')
+    if not raw:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in FIELDS]
+    if unknown:
+        raise ApiError(f"unknown field(s): {', '.join(unknown)}", available=sorted(FIELDS))
+    return fields
+
+
+def _select(queryset, fields):
+    # Read only the columns the requested fields need (plus the cursor keys).
+    columns = {'id', 'time_reported', 'status', 'reporter'}
+    for name in fields:
+        columns.update(FIELDS[name][0])
+    related = [name for name in ('reporter', 'confirmed_by') if f'{name}__username' in columns]
+    if 'confirmed_by__username' in columns:
+        columns.add('confirmed_by')
+    return queryset.select_related(*related).only(*columns)
+
+
+def serialize(incident, fields):
+    return {name: FIELDS[name][1](incident) for name in fields}
+
+
+def _etag(body):
+    return '"%s"' % hashlib.md5(body).hexdigest()
+
+
+def _json(request, payload, status=200):
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    etag = _etag(body)
+    if request.method == 'GET':
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            response['ETag'] = etag
+            return response
+    response = HttpResponse(body, status=status, content_type='application/json')
+    response['ETag'] = etag
+    response['Vary'] = 'Cookie'
+    return response
+
+
+def _json_object(request):
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ApiError("invalid JSON")
+    if not isinstance(payload, dict):
+        raise ApiError("expected a JSON object")
+    return payload
+
+
+def visible_incidents(user):
+    # Same rule as the incident_list page.
+    if user.profile.role == 'resident':
+        return Incident.objects.filter(reporter=user)
+    return Incident.objects.all()
+
+
+def _get_visible(request, incident_id):
+    return get_object_or_404(visible_incidents(request.user).select_related('reporter', 'confirmed_by'),
+                             pk=incident_id)
+
+
+# --- Endpoints ---
+@require_http_methods(['GET', 'POST'])
+@api_view
+def incidents(request):
+    if request.method == 'POST':
+        return _create(request)
+
+    fields = selected_fields(request)
+    queryset = visible_incidents(request.user)
+    for name, choices in (('status', Incident.STATUS_CHOICES), ('category', Incident.CATEGORY_CHOICES)):
+        value = request.GET.get(name)
+        if value:
+            if value not in dict(choices):
+                raise ApiError(f"unknown {name}: {value}")
+            queryset = queryset.filter(**{name: value})
+    try:
+        limit = min(max(int(request.GET.get('limit', 25)), 1), 100)
+    except ValueError:
+        raise ApiError("limit must be an integer")
+
+    def page():
+        rows, next_cursor, prev_cursor = keyset_slice(_select(queryset, fields), request, per_page=limit)
+        return {
+            'results': [serialize(incident, fields) for incident in rows],
+            'next': next_cursor,
+            'previous': prev_cursor,
+        }
+
+    key = sorted(request.GET.items())
+    return _json(request, caching.cached('api_incidents', request.user, page, key))
+
+
+def _create(request):
+    if request.user.profile.role != 'resident':
+        raise ApiError("Only residents can report incidents.", status=403)
+    if request.content_type == 'application/json':
+        data, files = _json_object(request), None
+    else:
+        data, files = request.POST, request.FILES
+    form = IncidentForm(data, files)
+    if not form.is_valid():
+        raise ApiError("invalid incident", errors=form.errors.get_json_data())
+    incident = form.save(commit=False)
+    incident.reporter = request.user
+    incident.save()
+    response = _json(request, serialize(incident, tuple(FIELDS)), status=201)
+    response['Location'] = _url('api_incident', incident)
+    return response
+
+
+@require_http_methods(['GET'])
+@api_view
+def incident(request, incident_id):
+    fields = selected_fields(request)
+    return _json(request, serialize(_get_visible(request, incident_id), fields))
+
+
+@require_http_methods(['POST', 'PATCH'])
+@api_view
+def incident_status(request, incident_id):
+    user = request.user
+    # Same rule as update_status.
+    if not (user.is_superuser or user.profile.role in ['admin', 'officer']):
+        raise ApiError("You are not authorized to update this incident.", status=403)
+    incident = _get_visible(request, incident_id)
+
+    # Optimistic concurrency: If-Match must carry the ETag of the STATUS_FIELDS
+    # representation, i.e. what a GET with ?fields=<STATUS_FIELDS> or the
+    # previous response of this endpoint returns.
+    if_match = request.META.get('HTTP_IF_MATCH')
+    current = json.dumps(serialize(incident, STATUS_FIELDS), separators=(',', ':')).encode()
+    if if_match and if_match != '*' and _etag(current) not in [tag.strip() for tag in if_match.split(',')]:
+        raise ApiError("incident has changed", status=412)
+
+    payload = _json_object(request)
+    status = payload.get('status')
+    if status not in dict(Incident.STATUS_CHOICES):
+        raise ApiError(f"status must be one of {', '.join(dict(Incident.STATUS_CHOICES))}")
+    notes = payload.get('response_notes')
+    if notes is not None and not isinstance(notes, str):
+        raise ApiError("response_notes must be a string")
+
+    incident.status = status
+    if status == 'confirmed' and incident.confirmed_by_id is None:
+        incident.confirmed_by = user
+    if 'response_notes' in payload:
+        incident.response_notes = payload['response_notes']
+    incident._actor = user
+    incident.save()
+    return _json(request, serialize(incident, STATUS_FIELDS))
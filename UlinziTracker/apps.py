@@ -5,6 +5,9 @@ class SuitConfig(DjangoSuitConfig):
     layout = 'vertical'
 
 class UlinziTrackerConfig(AppConfig):
+    # apps.py also defines SuitConfig, so name the config Django should pick
+    # up for 'UlinziTracker' explicitly; otherwise ready() never runs.
+    default = True
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'UlinziTracker'
 
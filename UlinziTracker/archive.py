@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models.deletion import Collector
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+from . import caching
+from .models import ArchivedIncident, Incident
+
+
+# ---------------------------
+# Archiving resolved incidents
+# ---------------------------
+# Resolved incidents reported more than ARCHIVE_AFTER_DAYS ago are copied to
+# ArchivedIncident and deleted from Incident, one batch per transaction. The
+# deletes carry an ``_archiving`` flag that the delete signals honour: the
+# statistics rollup keeps counting the incident and its media references move
+# to the archive row instead of being released. Transitions are untouched
+# (they have no foreign key constraint), so SLA history is unaffected.
+
+COPIED_FIELDS = [field.attname for field in ArchivedIncident._meta.concrete_fields if field.name != 'archived_at']
+
+
+def archive_after_days():
+    return getattr(settings, 'ARCHIVE_AFTER_DAYS', 365)
+
+
+def candidates(days=None, now=None):
+    cutoff = (now or timezone.now()) - timedelta(days=archive_after_days() if days is None else days)
+    return Incident.objects.filter(status='resolved', time_reported__lt=cutoff)
+
+
+def _value(incident, attname):
+    value = getattr(incident, attname)
+    # Media is copied by name; the blob reference moves with it.
+    return value.name if isinstance(value, FieldFile) else value
+
+
+def _archive_batch(ids, now):
+    with transaction.atomic():
+        incidents = list(Incident.objects.select_for_update().filter(pk__in=ids, status='resolved'))
+        if not incidents:
+            return 0
+        ArchivedIncident.objects.bulk_create(
+            ArchivedIncident(archived_at=now, **{name: _value(incident, name) for name in COPIED_FIELDS})
+            for incident in incidents
+        )
+        for incident in incidents:
+            incident._archiving = True
+        # Our own instances go to the collector so the signals see the flag.
+        collector = Collector(using=router.db_for_write(Incident))
+        collector.collect(incidents)
+        collector.delete()
+        return len(incidents)
+
+
+def archive(days=None, batch_size=500, limit=None):
+    """Move old resolved incidents to the archive; returns how many were moved."""
+    now = timezone.now()
+    moved = 0
+    while limit is None or moved < limit:
+        size = batch_size if limit is None else min(batch_size, limit - moved)
+        ids = list(candidates(days, now).order_by('time_reported', 'id').values_list('pk', flat=True)[:size])
+        if not ids:
+            break
+        moved += _archive_batch(ids, now)
+    if moved:
+        caching.invalidate()
+    return moved
+
+
+# --- Reading ---
+def visible_archive(user):
+    # Same rule as the resolved list: residents only see their own reports.
+    archived = ArchivedIncident.objects.all()
+    if user.profile.role not in ('officer', 'chief', 'admin'):
+        archived = archived.filter(reporter=user)
+    return archived
@@ -0,0 +1,28 @@
+from allauth.account.auth_backends import AuthenticationBackend
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+# ---------------------------
+# Authentication backends that load the profile with the user
+# ---------------------------
+# Nearly every view and template reads request.user.profile.role. Joining the
+# profile when the session user is loaded turns that into zero extra queries
+# per request instead of one.
+
+class ProfileUserMixin:
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class ProfileModelBackend(ProfileUserMixin, ModelBackend):
+    pass
+
+
+class ProfileAllauthBackend(ProfileUserMixin, AuthenticationBackend):
+    pass
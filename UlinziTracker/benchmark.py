@@ -0,0 +1,114 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import seed
+from .models import Incident
+
+
+# ---------------------------
+# View benchmarks
+# ---------------------------
+# Each view is requested through the test client at growing data sizes (the
+# data set is extended with seed.py between sizes) with the view cache cleared
+# first, so the numbers are for the uncached path. A run is compared with a
+# stored baseline: more queries than before, or a median latency well above
+# it, counts as a regression. Meant to run on a throwaway database; see the
+# benchmark_views command.
+
+# name -> (url name, role of the requesting user, needs an incident id)
+VIEWS = {
+    'incident_list.officer': ('UlinziTracker:incident_list', 'officer', False),
+    'incident_list.resident': ('UlinziTracker:incident_list', 'resident', False),
+    'allincidents.officer': ('UlinziTracker:allincidents', 'officer', False),
+    'pending_incidents.officer': ('UlinziTracker:pending_incidents', 'officer', False),
+    'dashboard.resident': ('UlinziTracker:dashboard', 'resident', False),
+    'incidentStats.chief': ('UlinziTracker:incidentStats', 'chief', False),
+    'pdf_view.officer': ('UlinziTracker:pdf_view', 'officer', True),
+}
+USERS = {'resident': 50, 'officer': 5, 'chief': 1}
+
+LATENCY_TOLERANCE = 1.5     # allowed slowdown factor against the baseline median
+LATENCY_SLACK_MS = 20       # ...but differences below this are treated as noise
+QUERY_SLACK = 0             # extra queries allowed per request
+
+
+def _drain(response):
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    response.close()
+
+
+def measure(client, url, repeat):
+    """Median milliseconds and the largest query count over ``repeat`` requests."""
+    timings, queries = [], 0
+    for _ in range(repeat):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = client.get(url)
+            _drain(response)
+            timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+        queries = max(queries, len(ctx.captured_queries))
+    return round(statistics.median(timings), 2), queries
+
+
+def run(sizes, repeat=5, views=None, out=None):
+    """Return ``{'<view>@<size>': {'ms': ..., 'queries': ...}}`` for each view and size."""
+    users = seed.seed_users(USERS)
+    clients = {}
+    for role, ids in users.items():
+        clients[role] = Client()
+        clients[role].force_login(User.objects.get(pk=ids[0]))
+    reporters, officers = users['resident'], users['officer']
+
+    results = {}
+    for size in sorted(sizes):
+        missing = size - Incident.objects.count()
+        if missing > 0:
+            seed.seed_incidents(missing, reporters, officers, seed=size)
+            seed.refresh_derived()
+        latest = Incident.objects.order_by('-time_reported', '-id').values_list('pk', flat=True).first()
+        for name in views or VIEWS:
+            url_name, role, with_id = VIEWS[name]
+            url = reverse(url_name, args=[latest] if with_id else [])
+            ms, queries = measure(clients[role], url, repeat)
+            results[f'{name}@{size}'] = {'ms': ms, 'queries': queries}
+            if out:
+                out(f"{name:<28} {size:>8} {ms:>10.2f} ms {queries:>5} queries")
+    return results
+
+
+def compare(results, baseline, tolerance=LATENCY_TOLERANCE, slack_ms=LATENCY_SLACK_MS, query_slack=QUERY_SLACK):
+    """Return a list of human-readable regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for key, current in sorted(results.items()):
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if current['queries'] > before['queries'] + query_slack:
+            regressions.append(f"{key}: {current['queries']} queries (baseline {before['queries']})")
+        if current['ms'] > before['ms'] * tolerance and current['ms'] - before['ms'] > slack_ms:
+            regressions.append(f"{key}: {current['ms']:.1f} ms (baseline {before['ms']:.1f} ms)")
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)['results']
+
+
+def save_baseline(path, results, sizes, repeat):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump({'sizes': sorted(sizes), 'repeat': repeat, 'results': results}, handle, indent=2, sort_keys=True)
+        handle.write('\n')
@@ -0,0 +1,93 @@
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching, events, pdf, sla, stats
+from .models import Incident, IncidentTransition
+
+
+# ---------------------------
+# Bulk confirm / resolve
+# ---------------------------
+# Applies one status action to many incidents in a single transaction with
+# bulk_update(). bulk_update() sends no signals, so the bookkeeping that
+# signals.incident_saved does per row (rollup counts, transition log, latency
+# histograms, cache and PDF invalidation) is done here once for the batch.
+
+MAX_IDS = 1000
+
+ACTIONS = {
+    # action: (statuses it applies to, resulting status)
+    'confirm': ({'pending'}, 'confirmed'),
+    'resolve': ({'pending', 'confirmed', 'in_progress'}, 'resolved'),
+}
+
+FIELDS = ('status', 'confirmed_by', 'response_notes', 'response_time', 'resolution_time')
+
+
+def apply(action, ids, user, notes=None):
+    """Apply ``action`` to the incidents in ``ids``; returns one result per id."""
+    allowed, new_status = ACTIONS[action]
+    now = timezone.now()
+    results = {pk: {'id': pk, 'ok': False, 'error': 'not found'} for pk in ids}
+
+    with transaction.atomic():
+        incidents = list(
+            Incident.objects.select_for_update()
+            .filter(pk__in=ids)
+            .only('id', 'category', 'time_reported', 'title', 'location', 'geohash', 'reporter', *FIELDS)
+        )
+        changed = []
+        for incident in incidents:
+            if incident.status not in allowed:
+                results[incident.pk].update(status=incident.status, error=f"already {incident.status}")
+                continue
+            incident.status = new_status
+            if action == 'confirm':
+                incident.confirmed_by = user
+                if notes:
+                    incident.response_notes = notes
+            incident.stamp_timings(now)
+            changed.append(incident)
+            results[incident.pk] = {'id': incident.pk, 'ok': True, 'status': new_status}
+
+        if changed:
+            Incident.objects.bulk_update(changed, FIELDS, batch_size=500)
+            _record(changed, user, now)
+
+    return [results[pk] for pk in ids]
+
+
+def _record(incidents, user, now):
+    moves = Counter()
+    transitions = []
+    responses, resolutions = [], []
+    published = []
+    for incident in incidents:
+        old_status = incident.loaded_value('status')
+        published.append(events.incident_event(incident, 'status', old_status))
+        moves[(incident.category, old_status)] -= 1
+        moves[(incident.category, incident.status)] += 1
+        transitions.append(sla.transition(incident, old_status, incident.status, user.pk, now))
+        if incident.response_time is not None and incident.loaded_value('response_time') is None:
+            responses.append((incident.category, user.pk, incident.response_time))
+        if incident.resolution_time is not None and incident.loaded_value('resolution_time') is None:
+            resolutions.append((incident.category, user.pk, incident.resolution_time))
+        incident.remember_state(FIELDS)
+
+    for (category, status), delta in moves.items():
+        stats.adjust(category, status, delta)
+    IncidentTransition.objects.bulk_create(transitions, batch_size=500)
+    sla.record_latencies('response', responses)
+    sla.record_latencies('resolution', resolutions)
+
+    incident_ids = [incident.pk for incident in incidents]
+
+    def after_commit():
+        caching.invalidate()
+        for pk in incident_ids:
+            pdf.invalidate(pk)
+        for event in published:
+            events.publish(event)
+    transaction.on_commit(after_commit)
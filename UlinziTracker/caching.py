@@ -0,0 +1,113 @@
+import hashlib
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .pagination import KeysetPage, keyset_slice
+
+
+# ---------------------------
+# Role-aware view cache
+# ---------------------------
+# Entries are namespaced by a generation number. Any Incident or Profile
+# change bumps the generation (see signals.py), which orphans every existing
+# entry at once without needing pattern deletes, so this works the same on
+# the local-memory and file-based backends.
+#
+# Hit/miss counts are kept per process, like the request metrics, so a hit
+# costs no cache write.
+
+GENERATION_KEY = 'ulinzi:generation'
+SHARED_ROLES = ('officer', 'chief', 'admin')
+
+_MISSING = object()
+_lookups = Counter()
+_lookups_lock = threading.Lock()
+
+
+def _cache():
+    return caches[getattr(settings, 'ULINZI_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'ULINZI_CACHE_TIMEOUT', 300)
+
+
+def _incr(key):
+    cache = _cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def _count(outcome):
+    with _lookups_lock:
+        _lookups[outcome] += 1
+
+
+def generation():
+    cache = _cache()
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        cache.add(GENERATION_KEY, 1, None)
+        value = cache.get(GENERATION_KEY, 1)
+    return value
+
+
+def invalidate():
+    _incr(GENERATION_KEY)
+
+
+def scope_for(user):
+    # Officers, chiefs and admins see the same data as their peers, so they
+    # share entries per role; everyone else only sees their own incidents.
+    role = user.profile.role
+    if role in SHARED_ROLES:
+        return role
+    return f'{role}:{user.pk}'
+
+
+def make_key(name, user, *parts):
+    suffix = ''
+    if parts:
+        suffix = ':' + hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+    return f'ulinzi:{generation()}:{name}:{scope_for(user)}{suffix}'
+
+
+def cached(name, user, compute, *parts):
+    """Return ``compute()`` from the cache, computing and storing it on a miss."""
+    cache = _cache()
+    key = make_key(name, user, *parts)
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        _count('hits')
+        return value
+    _count('misses')
+    value = compute()
+    cache.set(key, value, _timeout())
+    return value
+
+
+def cached_page(name, request, queryset):
+    cursor = (request.GET.get('after', ''), request.GET.get('before', ''))
+    rows, next_cursor, prev_cursor = cached(
+        name, request.user, lambda: keyset_slice(queryset, request), *cursor
+    )
+    return KeysetPage(rows, request, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+def counters():
+    """This process's hit/miss counts and the shared generation."""
+    with _lookups_lock:
+        hits, misses = _lookups['hits'], _lookups['misses']
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / lookups, 4) if lookups else None,
+        'generation': generation(),
+    }
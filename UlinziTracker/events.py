@@ -0,0 +1,237 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from http.cookies import SimpleCookie
+from importlib import import_module
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+# ---------------------------
+# Server-sent incident events
+# ---------------------------
+# A single asyncio hub per ASGI process fans events out to per-connection
+# queues. Idle subscribers are just a parked coroutine and a small queue, so
+# they hold no worker thread. Incident signals publish from whatever thread
+# the save ran on; call_soon_threadsafe hands the event to the event loop.
+# Delivery is in-process only: saves made by other processes (run_jobs,
+# management commands, other ASGI workers) are not seen by this hub.
+
+EVENTS_PATH = '/events/'
+OFFICER_ROLES = ('officer', 'chief', 'admin')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Hub:
+    def __init__(self):
+        self.loop = None
+        self.subscribers = set()
+        self.recent = deque(maxlen=_setting('SSE_REPLAY_EVENTS', 500))
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def bind(self, loop):
+        self.loop = loop
+
+    def _next_id(self):
+        # Microseconds since the epoch, kept strictly increasing. A counter
+        # would restart at 1 with the process, and a client reconnecting
+        # with an older but higher Last-Event-ID would then never get a replay.
+        with self._lock:
+            self._last_id = max(self._last_id + 1, time.time_ns() // 1000)
+            return self._last_id
+
+    def publish(self, event):
+        """Queue ``event`` for delivery; safe to call from any thread."""
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            # No event stream is served from this process.
+            return
+        event = {**event, 'id': self._next_id()}
+        loop.call_soon_threadsafe(self._fan_out, event)
+
+    def _fan_out(self, event):
+        self.recent.append(event)
+        for subscriber in list(self.subscribers):
+            subscriber.offer(event)
+
+    def subscribe(self, subscriber, last_event_id=None):
+        self.subscribers.add(subscriber)
+        if last_event_id is not None:
+            # Replay what the client missed while reconnecting.
+            for event in list(self.recent):
+                if event['id'] > last_event_id:
+                    subscriber.offer(event)
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+
+hub = Hub()
+
+
+class Subscriber:
+    def __init__(self, user_id, role, area=''):
+        self.user_id = user_id
+        self.role = role
+        self.area = area
+        self.queue = asyncio.Queue(maxsize=_setting('SSE_QUEUE_SIZE', 100))
+        self.overflowed = False
+
+    def wants(self, event):
+        if self.role not in OFFICER_ROLES:
+            return event['reporter_id'] == self.user_id
+        return not self.area or (event.get('geohash') or '').startswith(self.area)
+
+    def offer(self, event):
+        if not self.wants(event):
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client that cannot keep up is closed; it reconnects with
+            # Last-Event-ID and gets the backlog from the replay buffer.
+            self.overflowed = True
+
+
+# --- Publishing from Django ---
+def incident_event(incident, kind, previous_status=None):
+    return {
+        'type': kind,
+        'incident': incident.pk,
+        'title': incident.title,
+        'category': incident.category,
+        'status': incident.status,
+        'previous_status': previous_status,
+        'location': incident.location,
+        'geohash': incident.geohash,
+        'time_reported': incident.time_reported.isoformat() if incident.time_reported else None,
+        'reporter_id': incident.reporter_id,
+    }
+
+
+def publish(event):
+    hub.publish(event)
+
+
+# --- The ASGI endpoint ---
+def _cookies(scope):
+    cookie = SimpleCookie()
+    for name, value in scope.get('headers', []):
+        if name == b'cookie':
+            cookie.load(value.decode('latin-1'))
+    return {key: morsel.value for key, morsel in cookie.items()}
+
+
+def _header(scope, wanted):
+    for name, value in scope.get('headers', []):
+        if name == wanted:
+            return value.decode('latin-1')
+    return None
+
+
+class _SessionRequest:
+    # Just enough of an HttpRequest for django.contrib.auth.get_user().
+    def __init__(self, session):
+        self.session = session
+
+
+def _authenticate(session_key):
+    from django.contrib.auth import get_user
+
+    close_old_connections()
+    try:
+        engine = import_module(settings.SESSION_ENGINE)
+        user = get_user(_SessionRequest(engine.SessionStore(session_key)))
+        if not user.is_authenticated:
+            return None
+        profile = getattr(user, 'profile', None)
+        return user.pk, (profile.role if profile else 'resident'), (profile.geohash if profile else '')
+    finally:
+        close_old_connections()
+
+
+def _area_for(role, own_geohash, requested):
+    if role not in OFFICER_ROLES:
+        return ''
+    if requested:
+        return ''.join(char for char in requested.lower() if char.isalnum())[:12]
+    if role == 'chief' and own_geohash:
+        # Chiefs follow their own area unless they ask for another one.
+        return own_geohash[:_setting('SSE_CHIEF_AREA_PRECISION', 5)]
+    return ''
+
+
+def _query(scope):
+    return {key: values[-1] for key, values in parse_qs(scope.get('query_string', b'').decode()).items()}
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _frame(event):
+    data = {key: value for key, value in event.items() if key not in ('id', 'reporter_id')}
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def sse_app(scope, receive, send):
+    session_key = _cookies(scope).get(settings.SESSION_COOKIE_NAME)
+    identity = await sync_to_async(_authenticate)(session_key) if session_key else None
+    if identity is None:
+        await _send_json(send, 401, {'error': 'authentication required'})
+        return
+    user_id, role, own_geohash = identity
+
+    hub.bind(asyncio.get_running_loop())
+    subscriber = Subscriber(user_id, role, _area_for(role, own_geohash, _query(scope).get('area')))
+    try:
+        last_event_id = int(_header(scope, b'last-event-id') or '')
+    except ValueError:
+        last_event_id = None
+
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'text/event-stream'),
+        (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'),
+    ]})
+    await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+
+    hub.subscribe(subscriber, last_event_id)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    keepalive = _setting('SSE_KEEPALIVE_SECONDS', 15)
+    try:
+        while not disconnected.done() and not subscriber.overflowed:
+            getter = asyncio.ensure_future(subscriber.queue.get())
+            done, _ = await asyncio.wait({getter, disconnected}, timeout=keepalive,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                await send({'type': 'http.response.body', 'body': _frame(getter.result()), 'more_body': True})
+            else:
+                getter.cancel()
+                if not done:
+                    # Comment line: keeps proxies from closing an idle stream.
+                    await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+        if not disconnected.done():
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        hub.unsubscribe(subscriber)
+        disconnected.cancel()
+
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
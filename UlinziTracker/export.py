@@ -0,0 +1,144 @@
+import csv
+import tempfile
+
+import xlwt
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ArchivedIncident, Incident
+
+
+# ---------------------------
+# CSV / XLS export of incident lists
+# ---------------------------
+# Rows are read with iterator(chunk_size=...) and the reporter joined in, so
+# the queryset is never held in memory. CSV is produced line by line for a
+# StreamingHttpResponse. The XLS format has no streaming writer: xlwt builds
+# the workbook and writes it at the end, so rows are flushed to its compact
+# record form as we go, the file goes to an anonymous temporary file, and
+# exports larger than EXPORT_XLS_MAX_ROWS are refused in favour of CSV. The
+# resolved list also covers the archive (see archive.py), after live rows.
+
+XLS_SHEET_ROWS = 65535      # per sheet after the header (the format stops at 65536)
+FLUSH_EVERY = 1000
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+LISTS = {
+    'all': None,
+    'pending': 'pending',
+    'resolved': 'resolved',
+}
+
+
+def _duration(value):
+    return round(value.total_seconds() / 3600, 2) if value is not None else ''
+
+
+def _local(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M') if value else ''
+
+
+COLUMNS = (
+    ('ID', lambda i: i.id),
+    ('Reporter', lambda i: i.reporter.username),
+    ('Title', lambda i: i.title),
+    ('Category', lambda i: i.get_category_display()),
+    ('Status', lambda i: i.get_status_display()),
+    ('Location', lambda i: i.location or ''),
+    ('Latitude', lambda i: i.latitude if i.latitude is not None else ''),
+    ('Longitude', lambda i: i.longitude if i.longitude is not None else ''),
+    ('Reported', lambda i: _local(i.time_reported)),
+    ('Confirmed by', lambda i: i.confirmed_by.username if i.confirmed_by else ''),
+    ('Response (h)', lambda i: _duration(i.response_time)),
+    ('Resolution (h)', lambda i: _duration(i.resolution_time)),
+    ('Description', lambda i: i.description),
+    ('Response notes', lambda i: i.response_notes or ''),
+)
+
+
+def _chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def scoped_incidents(user, list_name='all'):
+    """Querysets of what ``user`` may see on the ``list_name`` page, same rules as the list views."""
+    sources = [Incident.objects.all()]
+    if list_name == 'resolved':
+        sources.append(ArchivedIncident.objects.all())
+    if user.profile.role not in ('officer', 'chief', 'admin'):
+        sources = [queryset.filter(reporter=user) for queryset in sources]
+    if LISTS.get(list_name):
+        sources = [queryset.filter(status=LISTS[list_name]) for queryset in sources]
+    return sources
+
+
+def rows(querysets):
+    for queryset in querysets:
+        queryset = queryset.select_related('reporter', 'confirmed_by').order_by('-time_reported', '-id')
+        for incident in queryset.iterator(chunk_size=_chunk_size()):
+            yield [getter(incident) for _, getter in COLUMNS]
+
+
+# --- CSV ---
+class _Echo:
+    # csv.writer needs a file; this one hands each formatted line back.
+    def write(self, value):
+        return value
+
+
+def _safe(value):
+    # Keep spreadsheet programs from evaluating user text as a formula.
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(querysets):
+    writer = csv.writer(_Echo())
+    yield '\ufeff'  # lets Excel detect UTF-8
+    yield writer.writerow([header for header, _ in COLUMNS])
+    for row in rows(querysets):
+        yield writer.writerow([_safe(value) for value in row])
+
+
+# --- XLS ---
+def _sheet(book, number):
+    sheet = book.add_sheet(f'Incidents {number}' if number > 1 else 'Incidents')
+    bold = xlwt.easyxf('font: bold on')
+    for column, (header, _) in enumerate(COLUMNS):
+        sheet.write(0, column, header, bold)
+    return sheet
+
+
+def workbook(querysets):
+    book = xlwt.Workbook(encoding='utf-8')
+    sheet, sheets, line = None, 0, XLS_SHEET_ROWS
+    for row in rows(querysets):
+        if line >= XLS_SHEET_ROWS:
+            if sheet is not None:
+                sheet.flush_row_data()
+            sheets += 1
+            sheet, line = _sheet(book, sheets), 0
+        line += 1
+        for column, value in enumerate(row):
+            sheet.write(line, column, value)
+        if line % FLUSH_EVERY == 0:
+            sheet.flush_row_data()
+    if sheet is None:
+        _sheet(book, 1)
+    return book
+
+
+def write_xls(querysets):
+    """Write the export to an anonymous temporary file, rewound for reading.
+
+    The file disappears once it is closed, e.g. by the response.
+    """
+    handle = tempfile.TemporaryFile(suffix='.xls')
+    try:
+        workbook(querysets).save(handle)
+    except BaseException:
+        handle.close()
+        raise
+    handle.seek(0)
+    return handle
@@ -1,7 +1,9 @@
 from django import forms
 from django.contrib.auth.models import User
-from django.contrib.auth.forms import UserCreationForm
-from .models import Profile, Incident
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+from django.conf import settings
+from .models import Profile, Incident, UploadSession
+from . import tasks
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Submit
 
@@ -29,6 +31,67 @@ class StatusUpdateForm(forms.ModelForm):
             'status': None,
         }
 
+# --- Bulk PDF export filter ---
+class IncidentExportForm(forms.Form):
+    FORMAT_CHOICES = [
+        ('zip', 'ZIP of incident PDFs'),
+        ('pdf', 'One combined PDF'),
+    ]
+    status = forms.ChoiceField(choices=[('', 'Any status')] + Incident.STATUS_CHOICES, required=False)
+    category = forms.ChoiceField(choices=[('', 'Any category')] + list(Incident.CATEGORY_CHOICES), required=False)
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, initial='zip')
+
+    def filter(self, queryset):
+        data = self.cleaned_data
+        if data.get('status'):
+            queryset = queryset.filter(status=data['status'])
+        if data.get('category'):
+            queryset = queryset.filter(category=data['category'])
+        if data.get('date_from'):
+            queryset = queryset.filter(time_reported__date__gte=data['date_from'])
+        if data.get('date_to'):
+            queryset = queryset.filter(time_reported__date__lte=data['date_to'])
+        return queryset
+
+# --- CSV / XLS export of incident lists ---
+class IncidentListExportForm(IncidentExportForm):
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xls', 'Excel (XLS)'),
+    ]
+    LIST_CHOICES = [
+        ('all', 'All incidents'),
+        ('pending', 'Pending incidents'),
+        ('resolved', 'Resolved incidents'),
+    ]
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, initial='csv', required=False)
+    list = forms.ChoiceField(choices=LIST_CHOICES, required=False)
+
+    def clean_format(self):
+        return self.cleaned_data.get('format') or 'csv'
+
+# --- Chunked upload start form ---
+# Residents open a resumable upload for one media field of their own incident.
+class UploadStartForm(forms.ModelForm):
+    class Meta:
+        model = UploadSession
+        fields = ['incident', 'field', 'filename', 'size']
+
+    def __init__(self, *args, **kwargs):
+        user = kwargs.pop('user', None)
+        super().__init__(*args, **kwargs)
+        self.fields['incident'].queryset = Incident.objects.filter(reporter=user)
+
+    def clean_size(self):
+        size = self.cleaned_data.get('size')
+        if size is None or size <= 0:
+            raise forms.ValidationError('Size must be a positive number of bytes.')
+        if size > getattr(settings, 'UPLOAD_MAX_BYTES', 1024 * 1024 * 1024):
+            raise forms.ValidationError('This file is larger than the upload limit.')
+        return size
+
 # --- User registration form ---
 class UserRegisterForm(UserCreationForm):
     first_name = forms.CharField(max_length=30, required=True)
@@ -84,3 +147,16 @@ class UserProfileUpdateForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         if user and user.is_superuser:
             self.fields['role'] = forms.ChoiceField(choices=ROLE_CHOICES)
+
+# --- Password reset form that mails through the job queue ---
+# Only the user id and template names are queued; the run_jobs worker makes
+# the token and renders the email, so no reset link is kept on the Job row and
+# a slow SMTP server never holds up the page.
+class QueuedPasswordResetForm(PasswordResetForm):
+    def send_mail(self, subject_template_name, email_template_name, context,
+                  from_email, to_email, html_email_template_name=None):
+        tasks.send_password_reset.enqueue(
+            context['user'].pk, to_email, subject_template_name, email_template_name,
+            html_email_template_name=html_email_template_name, from_email=from_email,
+            domain=context['domain'], site_name=context['site_name'], protocol=context['protocol'],
+        )
@@ -0,0 +1,235 @@
+import math
+import re
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Substr
+from django.utils import timezone
+
+
+# ---------------------------
+# Coordinates, geohash cells and hotspots
+# ---------------------------
+# Free-text locations are resolved to coordinates when an Incident or Profile
+# is saved: either a literal "lat,lng" or a name from the Place gazetteer.
+# Each point also gets a geohash, so "near here" becomes a handful of index
+# range scans on the geohash column instead of string-matching every row.
+
+GEOHASH_PRECISION = 9
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+NEAR_MAX_ROWS = 500
+COORDINATES = re.compile(r'^\s*(-?\d{1,2}(?:\.\d+)?)\s*,\s*(-?\d{1,3}(?:\.\d+)?)\s*$')
+
+# Approximate cell size (height km, width km at the equator) per precision.
+CELL_KM = {1: (5000, 5000), 2: (625, 1250), 3: (156, 156), 4: (19.5, 39.1), 5: (4.89, 4.89),
+           6: (0.61, 1.22), 7: (0.153, 0.153), 8: (0.019, 0.038), 9: (0.0048, 0.0048)}
+
+HOTSPOT_WINDOWS = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+}
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, span = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (span[0] + span[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            span[0] = middle
+        else:
+            span[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def bounds(cell):
+    """Return ``(min_lat, min_lng, max_lat, max_lng)`` of a geohash cell."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in cell:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            target = lng_range if even else lat_range
+            middle = (target[0] + target[1]) / 2
+            if value >> shift & 1:
+                target[0] = middle
+            else:
+                target[1] = middle
+            even = not even
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def center(cell):
+    min_lat, min_lng, max_lat, max_lng = bounds(cell)
+    return (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+
+
+def neighbours(cell):
+    """The cell itself and the (up to) eight cells around it."""
+    min_lat, min_lng, max_lat, max_lng = bounds(cell)
+    height, width = max_lat - min_lat, max_lng - min_lng
+    lat, lng = (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+    cells = set()
+    for d_lat in (-height, 0, height):
+        for d_lng in (-width, 0, width):
+            n_lat = lat + d_lat
+            if -90 <= n_lat <= 90:
+                n_lng = (lng + d_lng + 180) % 360 - 180
+                cells.add(encode(n_lat, n_lng, len(cell)))
+    return cells
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi, d_lambda = phi2 - phi1, math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+# --- Geocoding ---
+def normalise(name):
+    return ' '.join((name or '').lower().replace(',', ' ').split())
+
+
+def geocode(text):
+    """Resolve ``text`` to ``(latitude, longitude)`` or None."""
+    from .models import Place
+
+    if not text:
+        return None
+    match = COORDINATES.match(text)
+    if match:
+        latitude, longitude = float(match.group(1)), float(match.group(2))
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude
+        return None
+    # Try the whole string, then each comma-separated part ("Kibera, Nairobi").
+    keys = [normalise(text)] + [normalise(part) for part in text.split(',')]
+    keys = [key for key in dict.fromkeys(keys) if key]
+    places = {key: (lat, lng) for key, lat, lng in
+              Place.objects.filter(key__in=keys).values_list('key', 'latitude', 'longitude')}
+    for key in keys:
+        if key in places:
+            return places[key]
+    return None
+
+
+def locate(instance, previous_location):
+    """Refresh ``instance`` coordinates and geohash from its ``location`` text.
+
+    Only geocodes when the text changed. A new row whose text cannot be
+    resolved keeps any coordinates the caller set explicitly.
+    """
+    if (instance.location or '') != (previous_location or ''):
+        point = geocode(instance.location)
+        if point is not None:
+            instance.latitude, instance.longitude = point
+        elif instance.pk is not None or previous_location:
+            instance.latitude = instance.longitude = None
+    if instance.latitude is not None and instance.longitude is not None:
+        instance.geohash = encode(instance.latitude, instance.longitude)
+    else:
+        instance.latitude = instance.longitude = None
+        instance.geohash = ''
+
+
+# --- Spatial queries ---
+def _precision_for(radius_km, latitude):
+    # Finest precision whose cells are still at least as large as the radius,
+    # so the 3x3 block around the centre covers the whole circle.
+    shrink = max(math.cos(math.radians(latitude)), 0.01)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = CELL_KM[precision]
+        if min(height, width * shrink) >= radius_km:
+            return precision
+    return 1
+
+
+def _cell_filter(cells):
+    query = Q()
+    for cell in cells:
+        # A range on the indexed column, unlike LIKE 'abc%', uses the index on every backend.
+        query |= Q(geohash__gte=cell, geohash__lt=cell + '~')
+    return query
+
+
+def within_bbox(queryset, min_lat, min_lng, max_lat, max_lng):
+    return queryset.filter(latitude__range=(min_lat, max_lat), longitude__range=(min_lng, max_lng))
+
+
+def near(queryset, latitude, longitude, radius_km, limit=None):
+    """Rows of ``queryset`` within ``radius_km``, nearest first, with ``distance_km`` set.
+
+    The geohash cells narrow the scan through the index, a bounding box on
+    latitude/longitude trims it to the circle's square, and the database
+    orders by a flat-earth distance and applies the limit, so only the rows
+    returned are loaded. The exact distance is then computed for those.
+    """
+    cells = neighbours(encode(latitude, longitude, _precision_for(radius_km, latitude)))
+    d_lat = radius_km / KM_PER_DEGREE
+    scale = max(math.cos(math.radians(latitude)), 0.01)
+    d_lng = min(radius_km / (KM_PER_DEGREE * scale), 180)
+    candidates = queryset.filter(_cell_filter(cells), latitude__range=(latitude - d_lat, latitude + d_lat))
+    if -180 <= longitude - d_lng and longitude + d_lng <= 180:
+        # Circles across the antimeridian rely on the cells alone.
+        candidates = candidates.filter(longitude__range=(longitude - d_lng, longitude + d_lng))
+    d_y, d_x = F('latitude') - latitude, (F('longitude') - longitude) * scale
+    candidates = candidates.annotate(flat_distance=d_y * d_y + d_x * d_x).order_by('flat_distance')
+
+    results = []
+    for row in candidates[:limit or NEAR_MAX_ROWS]:
+        row.distance_km = distance_km(latitude, longitude, row.latitude, row.longitude)
+        if row.distance_km <= radius_km:
+            results.append(row)
+    results.sort(key=lambda row: row.distance_km)
+    return results
+
+
+# --- Hotspots ---
+def hotspot_precision():
+    return getattr(settings, 'GEO_HOTSPOT_PRECISION', 6)
+
+
+def refresh_hotspots(windows=None):
+    """Recount incidents per (window, cell, category); returns rows written."""
+    from .models import ArchivedIncident, HotspotCell, Incident
+
+    precision = hotspot_precision()
+    now = timezone.now()
+    written = 0
+    for window in windows or HOTSPOT_WINDOWS:
+        counts = Counter()
+        # Archived incidents still happened there; count them alongside.
+        for model in (Incident, ArchivedIncident):
+            rows = (model.objects
+                    .filter(time_reported__gte=now - HOTSPOT_WINDOWS[window], geohash__gt='')
+                    .annotate(cell=Substr('geohash', 1, precision))
+                    .values_list('cell', 'category')
+                    .annotate(n=Count('id'))
+                    .order_by())
+            for cell, category, n in rows:
+                counts[cell, category] += n
+        cells = []
+        for (cell, category), n in counts.items():
+            latitude, longitude = center(cell)
+            cells.append(HotspotCell(window=window, cell=cell, category=category, count=n,
+                                     latitude=latitude, longitude=longitude, computed_at=now))
+        with transaction.atomic():
+            HotspotCell.objects.filter(window=window).delete()
+            HotspotCell.objects.bulk_create(cells, batch_size=1000)
+        written += len(cells)
+    return written
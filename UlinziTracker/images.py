@@ -0,0 +1,50 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .models import Incident
+
+
+# ---------------------------
+# Image derivatives
+# ---------------------------
+# Thumbnails and web-sized copies are produced after the upload request has
+# returned, by the generate_image_derivatives job (tasks.py), and stored next
+# to the original in Incident.image_thumbnail / Incident.image_web.
+
+THUMBNAIL_SIZE = (320, 320)
+WEB_SIZE = (1280, 1280)
+
+def _resized_jpeg(image, size):
+    copy = image.copy()
+    copy.thumbnail(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    copy.save(buffer, format='JPEG', quality=80, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+@transaction.atomic
+def generate(incident_id):
+    incident = Incident.objects.filter(pk=incident_id).first()
+    if incident is None:
+        return
+
+    # Replaced derivative files are released by the post_save handler.
+    incident.image_thumbnail = None
+    incident.image_web = None
+
+    if incident.image:
+        with incident.image.open('rb') as original:
+            image = Image.open(original)
+            # Let the JPEG decoder downscale while reading; large photos then
+            # never have to be decoded at full resolution.
+            image.draft('RGB', WEB_SIZE)
+            image = ImageOps.exif_transpose(image).convert('RGB')
+        stem = os.path.splitext(os.path.basename(incident.image.name))[0]
+        incident.image_web.save(f'{stem}_web.jpg', ContentFile(_resized_jpeg(image, WEB_SIZE)), save=False)
+        incident.image_thumbnail.save(f'{stem}_thumb.jpg', ContentFile(_resized_jpeg(image, THUMBNAIL_SIZE)), save=False)
+
+    incident.save(update_fields=['image_thumbnail', 'image_web'])
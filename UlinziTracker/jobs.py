@@ -0,0 +1,193 @@
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------
+# Job registry and queueing
+# ---------------------------
+# Functions decorated with @job can be queued by name with enqueue(); the
+# arguments must be JSON serialisable since they are stored on the Job row.
+# Workers are started with `manage.py run_jobs` (see that command).
+
+_registry = {}
+
+
+def job(name=None, queue='default', max_attempts=3, priority=0):
+    def register(func):
+        job_name = name or func.__name__
+        _registry[job_name] = {
+            'func': func, 'queue': queue, 'max_attempts': max_attempts, 'priority': priority,
+        }
+        func.job_name = job_name
+        func.enqueue = lambda *args, **kwargs: enqueue(job_name, *args, **kwargs)
+        return func
+    return register
+
+
+def registered(name):
+    if name not in _registry:
+        # Job functions live in tasks.py; importing it fills the registry.
+        from . import tasks  # noqa: F401
+    return _registry[name]
+
+
+def enqueue(name, *args, priority=None, delay=None, queue=None, unique=False, **kwargs):
+    spec = registered(name)
+    if unique:
+        # Coalesce with an identical job that has not started yet.
+        pending = Job.objects.filter(name=name, status='queued', args=list(args), kwargs=kwargs).first()
+        if pending is not None:
+            return pending
+    return Job.objects.create(
+        name=name,
+        queue=queue or spec['queue'],
+        args=list(args),
+        kwargs=kwargs,
+        priority=spec['priority'] if priority is None else priority,
+        max_attempts=spec['max_attempts'],
+        run_after=timezone.now() + (delay or timedelta()),
+    )
+
+
+# ---------------------------
+# Claiming and running
+# ---------------------------
+def _lease():
+    return timedelta(seconds=getattr(settings, 'JOB_LEASE_SECONDS', 60))
+
+
+def requeue_stale():
+    """Put back running jobs whose worker stopped renewing the lease."""
+    expired = Q(lease_expires_at__lt=timezone.now()) | Q(lease_expires_at__isnull=True)
+    return Job.objects.filter(expired, status='running').update(status='queued')
+
+
+def runnable(queues):
+    return Job.objects.filter(status='queued', queue__in=queues, run_after__lte=timezone.now()).exists()
+
+
+def claim(queues):
+    """Atomically take the most urgent runnable job from ``queues``, or None."""
+    if not queues:
+        return None
+    now = timezone.now()
+    candidates = (Job.objects
+                  .filter(status='queued', queue__in=queues, run_after__lte=now)
+                  .order_by('-priority', 'run_after', 'id')
+                  .values_list('pk', flat=True)[:10])
+    for pk in candidates:
+        # The conditional UPDATE is the lock: only one worker sees a row count of 1.
+        taken = Job.objects.filter(pk=pk, status='queued').update(
+            status='running', started_at=now, lease_expires_at=now + _lease(), attempts=F('attempts') + 1,
+        )
+        if taken:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def _backoff(attempts):
+    base = getattr(settings, 'JOB_RETRY_BACKOFF_SECONDS', 30)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+class _Heartbeat(threading.Thread):
+    # Renews the lease of a running job a few times per lease period, so a
+    # slow render or mail is never mistaken for one whose worker died.
+    def __init__(self, job_id):
+        super().__init__(daemon=True)
+        self.job_id = job_id
+        self.stopped = threading.Event()
+
+    def run(self):
+        lease = _lease()
+        try:
+            while not self.stopped.wait(lease.total_seconds() / 3):
+                Job.objects.filter(pk=self.job_id, status='running').update(
+                    lease_expires_at=timezone.now() + lease)
+        finally:
+            connection.close()
+
+
+def run(job_row):
+    heartbeat = _Heartbeat(job_row.pk)
+    heartbeat.start()
+    try:
+        func = registered(job_row.name)['func']
+        func(*job_row.args, **job_row.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s failed (attempt %s/%s)", job_row, job_row.attempts, job_row.max_attempts)
+        if job_row.attempts < job_row.max_attempts:
+            Job.objects.filter(pk=job_row.pk).update(
+                status='queued', last_error=error, run_after=timezone.now() + _backoff(job_row.attempts),
+            )
+        else:
+            Job.objects.filter(pk=job_row.pk).update(status='failed', last_error=error, finished_at=timezone.now())
+        return False
+    finally:
+        heartbeat.stopped.set()
+    Job.objects.filter(pk=job_row.pk).update(status='done', finished_at=timezone.now())
+    return True
+
+
+def purge_finished(days=None):
+    days = days if days is not None else getattr(settings, 'JOB_RETENTION_DAYS', 7)
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status='done', finished_at__lt=cutoff).delete()
+    return deleted
+
+
+# ---------------------------
+# Measurements
+# ---------------------------
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def depth():
+    """Unfinished job count per queue and status."""
+    result = {}
+    for queue, status, n in Job.objects.values_list('queue', 'status').annotate(n=Count('id')).order_by():
+        if status != 'done':
+            result.setdefault(queue, {})[status] = n
+    return result
+
+
+def stats(window_minutes=60):
+    """Queue depth per queue/status plus wait and run latency of recent jobs."""
+    since = timezone.now() - timedelta(minutes=window_minutes)
+    recent = Job.objects.filter(status='done', finished_at__gte=since).values_list(
+        'queue', 'run_after', 'started_at', 'finished_at')[:5000]
+    latency = {}
+    for queue, run_after, started_at, finished_at in recent:
+        entry = latency.setdefault(queue, {'wait': [], 'run': []})
+        entry['wait'].append(max((started_at - run_after).total_seconds(), 0.0))
+        entry['run'].append((finished_at - started_at).total_seconds())
+
+    return {
+        'depth': depth(),
+        'latency': {
+            queue: {
+                'completed': len(values['run']),
+                'wait_p50': _percentile(values['wait'], 0.5),
+                'wait_p95': _percentile(values['wait'], 0.95),
+                'run_p50': _percentile(values['run'], 0.5),
+                'run_p95': _percentile(values['run'], 0.95),
+            }
+            for queue, values in latency.items()
+        },
+    }
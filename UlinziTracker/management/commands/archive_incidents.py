@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from UlinziTracker import archive, tasks
+
+
+class Command(BaseCommand):
+    help = "Move resolved incidents older than ARCHIVE_AFTER_DAYS into the archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help="Archive incidents reported more than this many days ago.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Incidents moved per transaction.")
+        parser.add_argument('--limit', type=int, help="Stop after moving this many incidents.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count what would be archived.")
+        parser.add_argument('--schedule', action='store_true',
+                            help="Queue a self-rescheduling archive job for run_jobs instead of running now.")
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            tasks.archive_incidents.enqueue(reschedule=True)
+            self.stdout.write(self.style.SUCCESS("Queued archive_incidents."))
+            return
+        if (options['days'] is not None and options['days'] < 0) or options['batch_size'] < 1:
+            raise CommandError("--days must be >= 0 and --batch-size >= 1.")
+        if options['dry_run']:
+            count = archive.candidates(options['days']).count()
+            self.stdout.write(f"{count} incident(s) would be archived.")
+            return
+        moved = archive.archive(options['days'], batch_size=options['batch_size'], limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} incident(s)."))
@@ -0,0 +1,62 @@
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    override_settings, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+
+from UlinziTracker import benchmark
+
+
+class Command(BaseCommand):
+    help = ("Time the main views at several data sizes on a throwaway test database and fail "
+            "when one is slower or runs more queries than the stored baseline.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000',
+                            help="Comma-separated incident counts to measure at (default 1000,10000).")
+        parser.add_argument('--repeat', type=int, default=5, help="Requests per view and size; the median is kept.")
+        parser.add_argument('--views', help=f"Comma-separated subset of: {', '.join(benchmark.VIEWS)}.")
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'),
+                            help="Baseline JSON to compare with (default benchmarks/baseline.json).")
+        parser.add_argument('--update-baseline', action='store_true', help="Write this run as the new baseline.")
+        parser.add_argument('--tolerance', type=float, default=benchmark.LATENCY_TOLERANCE,
+                            help="Allowed slowdown factor against the baseline median.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({int(size) for size in options['sizes'].split(',') if size.strip()})
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers.")
+        views = [name.strip() for name in options['views'].split(',')] if options['views'] else None
+        unknown = set(views or ()) - set(benchmark.VIEWS)
+        if unknown:
+            raise CommandError(f"Unknown view(s): {', '.join(sorted(unknown))}")
+
+        verbosity = options['verbosity']
+        setup_test_environment()
+        old_config = setup_databases(verbosity=max(verbosity - 1, 0), interactive=False, aliases={'default'})
+        try:
+            with tempfile.TemporaryDirectory() as pdf_dir, override_settings(PDF_CACHE_DIR=pdf_dir):
+                results = benchmark.run(sizes, options['repeat'], views, out=self.stdout.write)
+        finally:
+            teardown_databases(old_config, verbosity=max(verbosity - 1, 0))
+            teardown_test_environment()
+
+        path = options['baseline']
+        if options['update_baseline']:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            benchmark.save_baseline(path, results, sizes, options['repeat'])
+            self.stdout.write(self.style.SUCCESS(f"Wrote baseline to {path}."))
+            return
+        try:
+            baseline = benchmark.load_baseline(path)
+        except FileNotFoundError:
+            self.stdout.write(self.style.WARNING(f"No baseline at {path}; run with --update-baseline to create one."))
+            return
+        regressions = benchmark.compare(results, baseline, tolerance=options['tolerance'])
+        if regressions:
+            raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
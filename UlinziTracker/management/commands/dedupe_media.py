@@ -0,0 +1,59 @@
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from UlinziTracker import caching
+from UlinziTracker.models import Incident
+from UlinziTracker.storage import BLOB_DIR, media_storage
+
+
+class Command(BaseCommand):
+    help = "Move incident media saved under the old upload_to paths into the deduplicated blob store."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be moved.")
+
+    def handle(self, *args, **options):
+        storage = media_storage()
+        legacy = set()
+        moved = 0
+
+        incidents = Incident.objects.only('id', *Incident.MEDIA_FIELDS).order_by('id')
+        for incident in incidents.iterator(chunk_size=500):
+            changes = {}
+            for field in Incident.MEDIA_FIELDS:
+                name = getattr(incident, field).name
+                if not name or name.startswith(BLOB_DIR + '/'):
+                    continue
+                if not storage.exists(name):
+                    self.stderr.write(f"Incident {incident.pk}: {name} is missing on disk, skipped.")
+                    continue
+                legacy.add(name)
+                if options['dry_run']:
+                    self.stdout.write(f"Incident {incident.pk}: would move {name}")
+                    continue
+                with storage.open(name) as content:
+                    changes[field] = storage.save(name, content)
+            if changes:
+                # update() keeps the post_save handler from releasing the old
+                # names; they are plain files and are cleaned up below.
+                Incident.objects.filter(pk=incident.pk).update(**changes)
+                moved += len(changes)
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(legacy)} legacy file(s) would be moved.")
+            return
+
+        removed = 0
+        for name in legacy:
+            still_used = Q()
+            for field in Incident.MEDIA_FIELDS:
+                still_used |= Q(**{field: name})
+            if not Incident.objects.filter(still_used).exists():
+                FileSystemStorage.delete(storage, name)
+                removed += 1
+
+        caching.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {moved} field value(s) into the blob store; removed {removed} legacy file(s)."
+        ))
@@ -0,0 +1,61 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from UlinziTracker import importer
+
+
+class Command(BaseCommand):
+    help = ("Import incidents from CSV or JSONL (columns: " + ", ".join(importer.COLUMNS) + "). "
+            "reporter is a username or email; status and time_reported default to pending and now.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSONL file, or - for standard input.")
+        parser.add_argument('--format', choices=('csv', 'jsonl'),
+                            help="Input format (default: from the file extension).")
+        parser.add_argument('--batch-size', type=int, default=importer.BATCH_SIZE,
+                            help=f"Rows per insert and transaction (default {importer.BATCH_SIZE}).")
+        parser.add_argument('--errors', help="Write rejected rows with their errors to this JSONL file.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate every row without writing anything.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else
+                                    'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else None)
+        if fmt is None:
+            raise CommandError("Cannot tell the format from the file name; pass --format.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        try:
+            handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        except OSError as exc:
+            raise CommandError(exc)
+        errors_file = open(options['errors'], 'w', encoding='utf-8') if options['errors'] else None
+        started = time.monotonic()
+
+        def on_error(line, row, message):
+            self.stderr.write(f"line {line}: {message}")
+            if errors_file:
+                record = row if isinstance(row, dict) else {}
+                errors_file.write(json.dumps({'line': line, 'error': message, 'row': record}) + '\n')
+
+        def on_progress(imported, failed):
+            rate = imported / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f"{imported} imported, {failed} rejected ({rate:,.0f} rows/s)")
+
+        run = importer.Importer(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        try:
+            imported, failed = run.run(importer.read_rows(handle, fmt), on_error, on_progress)
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+            if errors_file:
+                errors_file.close()
+
+        verb = "Validated" if options['dry_run'] else "Imported"
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(f"{verb} {imported} incident(s); rejected {failed} row(s) "
+                                f"in {time.monotonic() - started:.1f}s."))
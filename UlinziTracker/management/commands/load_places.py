@@ -0,0 +1,63 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from UlinziTracker import geo
+from UlinziTracker.models import Incident, Place, Profile
+
+
+class Command(BaseCommand):
+    help = "Load the place gazetteer from a CSV of name,latitude,longitude and geocode stored locations."
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', nargs='?', help="CSV with a header row: name,latitude,longitude.")
+        parser.add_argument('--no-geocode', action='store_true',
+                            help="Only load places; leave incident and profile coordinates alone.")
+
+    def handle(self, *args, **options):
+        if options['csv_file']:
+            self.load(options['csv_file'])
+        if not options['no_geocode']:
+            for model in (Incident, Profile):
+                updated = self.geocode(model)
+                self.stdout.write(f"Geocoded {updated} {model._meta.verbose_name_plural}.")
+
+    def load(self, path):
+        try:
+            with open(path, newline='', encoding='utf-8') as handle:
+                rows = list(csv.DictReader(handle))
+        except OSError as exc:
+            raise CommandError(exc)
+        places = {}
+        for line, row in enumerate(rows, start=2):
+            try:
+                name = row['name'].strip()
+                places[geo.normalise(name)] = (name, float(row['latitude']), float(row['longitude']))
+            except (KeyError, TypeError, ValueError):
+                raise CommandError(f"{path}:{line}: expected name,latitude,longitude")
+        existing = Place.objects.in_bulk(list(places), field_name='key')
+        with transaction.atomic():
+            for key, (name, latitude, longitude) in places.items():
+                place = existing.get(key) or Place()
+                place.name, place.latitude, place.longitude = name, latitude, longitude
+                place.save()
+        self.stdout.write(self.style.SUCCESS(f"Loaded {len(places)} place(s)."))
+
+    def geocode(self, model):
+        # Rows with a location but no coordinates yet; written with update()
+        # so no save signals (and their side effects) fire for each row.
+        rows = (model.objects.filter(latitude__isnull=True).exclude(location__isnull=True).exclude(location='')
+                .values_list('pk', 'location'))
+        resolved = {}
+        updated = 0
+        for pk, location in list(rows):
+            if location not in resolved:
+                resolved[location] = geo.geocode(location)
+            point = resolved[location]
+            if point is not None:
+                model.objects.filter(pk=pk).update(
+                    latitude=point[0], longitude=point[1], geohash=geo.encode(*point),
+                )
+                updated += 1
+        return updated
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from UlinziTracker import uploads
+
+
+class Command(BaseCommand):
+    help = "Delete unfinished chunked uploads (and their part files) older than the given age."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=48, help="Age after which an unfinished upload is dropped.")
+
+    def handle(self, *args, **options):
+        removed = uploads.purge_stale(options['hours'])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} stale upload(s)."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from UlinziTracker import stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the incident statistics rollup from the Incident table, or check it for drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only report buckets that disagree with the Incident table; exit non-zero on drift.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = stats.drift()
+        for category, status, expected, stored in drifted:
+            self.stdout.write(f"{category}/{status}: expected {expected}, rollup has {stored}")
+
+        if options['check']:
+            if drifted:
+                raise CommandError(f"{len(drifted)} rollup bucket(s) have drifted.")
+            self.stdout.write(self.style.SUCCESS("Rollup matches the Incident table."))
+            return
+
+        stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rollup rebuilt ({len(drifted)} bucket(s) corrected)."))
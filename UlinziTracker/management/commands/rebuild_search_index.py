@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from UlinziTracker import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the incident full-text search index from the incident table."
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write(self.style.WARNING("This database has no full-text index; nothing to do."))
+            return
+        written = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} incident(s)."))
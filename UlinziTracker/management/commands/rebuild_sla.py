@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from UlinziTracker import sla
+
+
+class Command(BaseCommand):
+    help = "Recompute the response/resolution latency histograms from the transition log."
+
+    def handle(self, *args, **options):
+        buckets = sla.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} latency bucket(s)."))
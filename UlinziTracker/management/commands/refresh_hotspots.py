@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from UlinziTracker import geo, tasks
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-window incident hotspot cells shown to chiefs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schedule', action='store_true',
+                            help="Queue a self-rescheduling refresh job for run_jobs instead of running now.")
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            tasks.refresh_hotspots.enqueue(reschedule=True)
+            self.stdout.write(self.style.SUCCESS("Queued refresh_hotspots."))
+            return
+        written = geo.refresh_hotspots()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} hotspot cell(s)."))
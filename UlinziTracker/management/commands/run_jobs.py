@@ -0,0 +1,90 @@
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from UlinziTracker import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (image derivatives, PDF warm-up, upload assembly, email)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queues', default='', help="Comma separated queues to serve (default: all configured).")
+        parser.add_argument('--concurrency', type=int, default=4, help="Worker threads in this process.")
+        parser.add_argument('--poll', type=float, default=1.0, help="Seconds to sleep when no job is runnable.")
+        parser.add_argument('--once', action='store_true', help="Drain runnable jobs and exit.")
+        parser.add_argument('--stats', action='store_true', help="Print queue depth and latency, then exit.")
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(jobs.stats(), indent=2))
+            return
+
+        limits = dict(getattr(settings, 'JOB_QUEUE_CONCURRENCY', {'default': 1}))
+        queues = [q for q in options['queues'].split(',') if q] or list(limits)
+        # Per-queue semaphores keep, say, PDF rendering from starving email.
+        self.slots = {q: threading.BoundedSemaphore(limits.get(q, 1)) for q in queues}
+        self.once = options['once']
+        self.poll = options['poll']
+        self.stopping = threading.Event()
+
+        requeued = jobs.requeue_stale()
+        purged = jobs.purge_finished()
+        self.stdout.write(f"Serving {', '.join(queues)}; requeued {requeued}, purged {purged} old job(s).")
+
+        workers = [threading.Thread(target=self.work, daemon=True) for _ in range(max(options['concurrency'], 1))]
+        if not self.once:
+            threading.Thread(target=self.sweep, daemon=True).start()
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                while worker.is_alive():
+                    worker.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stopping.set()
+            for worker in workers:
+                worker.join()
+
+    def _acquire(self):
+        # Take a slot on every queue that has one free; claim only from those.
+        held = [q for q, slot in self.slots.items() if slot.acquire(blocking=False)]
+        return held
+
+    def sweep(self):
+        # Jobs whose worker died (its lease ran out) while this one keeps going.
+        interval = getattr(settings, 'JOB_REQUEUE_INTERVAL_SECONDS', 60)
+        while not self.stopping.wait(interval):
+            close_old_connections()
+            requeued = jobs.requeue_stale()
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale job(s).")
+        close_old_connections()
+
+    def work(self):
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                held = self._acquire()
+                job_row = jobs.claim(held) if held else None
+                # Release the slots this job does not need.
+                for queue in held:
+                    if job_row is None or queue != job_row.queue:
+                        self.slots[queue].release()
+                if job_row is None:
+                    # With --once, stop only when nothing runnable is left,
+                    # not just because the other threads hold every slot.
+                    if self.once and not jobs.runnable(list(self.slots)):
+                        return
+                    time.sleep(self.poll)
+                    continue
+                try:
+                    jobs.run(job_row)
+                finally:
+                    self.slots[job_row.queue].release()
+        finally:
+            close_old_connections()
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from UlinziTracker import seed
+from UlinziTracker.models import Profile
+
+
+class Command(BaseCommand):
+    help = "Create synthetic users and incidents (bulk inserts) for load and benchmark testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incidents', type=int, default=10000, help="Incidents to create (default 10000).")
+        parser.add_argument('--days', type=int, default=365, help="Spread reports over this many days.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same data.")
+        parser.add_argument('--password', default=seed.DEFAULT_PASSWORD, help="Password for every seeded user.")
+        for role, default in (('resident', 500), ('officer', 20), ('chief', 5), ('admin', 2), ('authority', 0)):
+            parser.add_argument(f'--{role}s', type=int, default=default, dest=role,
+                                help=f"{dict(Profile.ROLE_CHOICES)[role]} users to create (default {default}).")
+
+    def handle(self, *args, **options):
+        if options['incidents'] < 0 or options['days'] < 1:
+            raise CommandError("--incidents must be >= 0 and --days >= 1.")
+        per_role = {role: options[role] for role, _ in Profile.ROLE_CHOICES if options[role] > 0}
+        try:
+            result = seed.seed(per_role, options['incidents'], days=options['days'],
+                               seed=options['seed'], password=options['password'])
+        except ValueError as exc:
+            raise CommandError(exc)
+        users = ', '.join(f"{n} {role}(s)" for role, n in result['users'].items()) or 'no users'
+        self.stdout.write(f"Created {users}.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['incidents']} incident(s); indexed {result['indexed']}, "
+            f"{result['latency_buckets']} latency bucket(s), {result['hotspot_cells']} hotspot cell(s)."
+        ))
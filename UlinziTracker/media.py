@@ -0,0 +1,131 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+
+# ---------------------------
+# Media responses with Range support
+# ---------------------------
+# Serves an incident's stored file from disk in fixed-size chunks. Single
+# byte ranges get a 206 so players can seek, and ETag/Last-Modified give 304s.
+# With MEDIA_SENDFILE set, Django only checks permissions and hands the bytes
+# to the front web server through X-Sendfile or X-Accel-Redirect.
+
+CHUNK_SIZE = 64 * 1024
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """Return ``(start, end)`` for a single-range header, or None to send it all."""
+    match = RANGE.match((header or '').strip())
+    if not match:
+        # Absent, malformed or multi-range: answer with the whole file.
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:
+        # No byte of an empty file can be addressed.
+        raise RangeNotSatisfiable
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def _range_applies(request, etag, mtime):
+    # If-Range: only honour Range when the client's copy is still current.
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+def iter_file(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = handle.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+def _disposition(field_file, as_attachment):
+    # Same encoding as FileResponse: quoted ASCII, otherwise RFC 5987 filename*.
+    kind = 'attachment' if as_attachment else 'inline'
+    filename = os.path.basename(field_file.name)
+    try:
+        filename.encode('ascii')
+    except UnicodeEncodeError:
+        return f"{kind}; filename*=utf-8''{quote(filename)}"
+    escaped = filename.replace('\\', '\\\\').replace('"', r'\"')
+    return f'{kind}; filename="{escaped}"'
+
+
+def _sendfile_response(field_file, content_type, as_attachment):
+    mode = getattr(settings, 'MEDIA_SENDFILE', None)
+    response = HttpResponse(content_type=content_type)
+    if mode == 'x-accel-redirect':
+        prefix = getattr(settings, 'MEDIA_SENDFILE_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + field_file.name
+    else:
+        response['X-Sendfile'] = field_file.path
+    response['Content-Disposition'] = _disposition(field_file, as_attachment)
+    return response
+
+
+def serve(request, field_file, as_attachment=False):
+    content_type = mimetypes.guess_type(field_file.name)[0] or 'application/octet-stream'
+    if getattr(settings, 'MEDIA_SENDFILE', None):
+        return _sendfile_response(field_file, content_type, as_attachment)
+
+    path = field_file.path
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = '"%x-%x"' % (stat.st_mtime_ns, size)
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        start, end, status = 0, size - 1, 200
+        try:
+            requested = parse_range(request.META.get('HTTP_RANGE'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if requested and _range_applies(request, etag, stat.st_mtime):
+            (start, end), status = requested, 206
+
+        length = max(end - start + 1, 0)
+        response = StreamingHttpResponse(iter_file(path, start, length), status=status, content_type=content_type)
+        response['Content-Length'] = str(length)
+        if status == 206:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = _disposition(field_file, as_attachment)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
@@ -0,0 +1,218 @@
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------
+# Request latency and query metrics
+# ---------------------------
+# MetricsMiddleware times every request per view. A sample of requests
+# (METRICS_SAMPLE_RATE) is also run under connection.execute_wrapper to count
+# queries and DB time, and to catch the same statement running over and over
+# (the usual N+1 loop). Everything is kept in process memory and served as
+# Prometheus text by views.metrics, so each worker process reports its own
+# numbers and Prometheus should scrape every worker.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+NUMBERS = re.compile(r'\b\d+\b')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                break
+        else:
+            index = len(self.bounds)
+        self.counts[index] += 1
+        self.sum += value
+
+    def cumulative(self):
+        running = 0
+        for bound, n in zip(self.bounds + (float('inf'),), self.counts):
+            running += n
+            yield bound, running
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.latency = {}
+        self.queries = {}
+        self.db_seconds = Counter()
+        self.repeated = Counter()
+
+    def record(self, view, seconds, queries=None, db_seconds=0.0, repeated=False):
+        with self._lock:
+            self.latency.setdefault(view, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            if queries is not None:
+                self.queries.setdefault(view, Histogram(QUERY_BUCKETS)).observe(queries)
+                self.db_seconds[view] += db_seconds
+            if repeated:
+                self.repeated[view] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'latency': {view: (list(h.cumulative()), h.sum) for view, h in self.latency.items()},
+                'queries': {view: (list(h.cumulative()), h.sum) for view, h in self.queries.items()},
+                'db_seconds': dict(self.db_seconds),
+                'repeated': dict(self.repeated),
+            }
+
+
+registry = Registry()
+
+
+# --- Collecting ---
+class QueryRecorder:
+    """execute_wrapper that counts statements, DB time and repeats of each statement."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+            # Values are normally bound parameters already; literals that were
+            # inlined (e.g. by RawSQL or LIMIT) should not make repeats look distinct.
+            self.statements[NUMBERS.sub('?', sql)] += 1
+
+    def most_repeated(self):
+        if not self.statements:
+            return None, 0
+        return self.statements.most_common(1)[0]
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match._func_path
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _setting('METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        sampled = random.random() < _setting('METRICS_SAMPLE_RATE', 1.0)
+        recorder = QueryRecorder() if sampled else None
+        start = time.perf_counter()
+        if recorder is None:
+            response = self.get_response(request)
+        else:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(recorder))
+                response = self.get_response(request)
+        # Streaming responses are timed up to the first byte only.
+        elapsed = time.perf_counter() - start
+
+        view = view_name(request)
+        repeated = False
+        if recorder is not None:
+            sql, times = recorder.most_repeated()
+            threshold = _setting('METRICS_REPEATED_QUERY_THRESHOLD', 10)
+            if threshold and times > threshold:
+                repeated = True
+                logger.warning("%s %s ran the same query %s times (%s queries in total): %s",
+                               request.method, view, times, recorder.count, sql[:500])
+        registry.record(view, elapsed,
+                        queries=recorder.count if recorder else None,
+                        db_seconds=recorder.seconds if recorder else 0.0,
+                        repeated=repeated)
+        return response
+
+
+# --- Prometheus text exposition ---
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{%s}' % ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def _histogram(lines, name, help_text, series):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for view, (buckets, total) in sorted(series.items()):
+        for bound, n in buckets:
+            lines.append(f'{name}_bucket{_labels(view=view, le=_bound(bound))} {n}')
+        lines.append(f'{name}_sum{_labels(view=view)} {total}')
+        lines.append(f'{name}_count{_labels(view=view)} {buckets[-1][1]}')
+
+
+def _simple(lines, name, kind, help_text, samples):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+    for labels, value in samples:
+        lines.append(f'{name}{_labels(**labels) if labels else ""} {value}')
+
+
+def render(cache_counters=None, job_depth=None):
+    """All metrics in the Prometheus text format (version 0.0.4)."""
+    data = registry.snapshot()
+    lines = []
+    _histogram(lines, 'ulinzi_request_duration_seconds',
+               'Time spent producing a response, per view.', data['latency'])
+    _histogram(lines, 'ulinzi_request_queries',
+               'SQL statements per sampled request, per view.', data['queries'])
+    _simple(lines, 'ulinzi_request_db_seconds_total', 'counter',
+            'Time spent in SQL during sampled requests, per view.',
+            [({'view': view}, seconds) for view, seconds in sorted(data['db_seconds'].items())])
+    _simple(lines, 'ulinzi_repeated_query_requests_total', 'counter',
+            'Sampled requests that ran one statement more than METRICS_REPEATED_QUERY_THRESHOLD times.',
+            [({'view': view}, n) for view, n in sorted(data['repeated'].items())])
+    _simple(lines, 'ulinzi_metrics_sample_rate', 'gauge',
+            'Fraction of requests whose queries are instrumented.',
+            [(None, _setting('METRICS_SAMPLE_RATE', 1.0))])
+
+    if cache_counters is not None:
+        _simple(lines, 'ulinzi_cache_hits_total', 'counter', 'View cache hits.',
+                [(None, cache_counters['hits'])])
+        _simple(lines, 'ulinzi_cache_misses_total', 'counter', 'View cache misses.',
+                [(None, cache_counters['misses'])])
+        _simple(lines, 'ulinzi_cache_generation', 'gauge', 'Current view cache generation.',
+                [(None, cache_counters['generation'])])
+    if job_depth is not None:
+        _simple(lines, 'ulinzi_job_queue_depth', 'gauge', 'Unfinished background jobs per queue and status.',
+                [({'queue': queue, 'status': status}, n)
+                 for queue, statuses in sorted(job_depth.items()) for status, n in sorted(statuses.items())])
+    return '\n'.join(lines) + '\n'
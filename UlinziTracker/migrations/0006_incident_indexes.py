@@ -0,0 +1,29 @@
+# Generated by Django 3.2.2 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('UlinziTracker', '0005_auto_20251207_2110'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['status', '-time_reported', '-id'], name='incident_status_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['reporter', 'status', '-time_reported'], name='incident_reporter_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['category', 'status'], name='incident_category_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['-time_reported', '-id'], name='incident_time_reported_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.2 on 2026-10-18 14:41
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_rollup(apps, schema_editor):
+    Incident = apps.get_model('UlinziTracker', 'Incident')
+    IncidentStat = apps.get_model('UlinziTracker', 'IncidentStat')
+    rows = Incident.objects.values_list('category', 'status').annotate(n=Count('id')).order_by()
+    IncidentStat.objects.bulk_create(
+        IncidentStat(category=category, status=status, count=n) for category, status, n in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('UlinziTracker', '0006_incident_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('suspicious_activity', 'Suspicious Activity'), ('emergency', 'Emergency'), ('disturbance', 'Neighborhood Disturbance'), ('other', 'Other')], max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('in_progress', 'In Progress'), ('resolved', 'Resolved')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='incidentstat',
+            constraint=models.UniqueConstraint(fields=('category', 'status'), name='unique_incident_stat'),
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
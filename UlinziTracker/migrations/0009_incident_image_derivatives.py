@@ -0,0 +1,23 @@
+# Generated by Django 3.2.2 on 2026-10-18 14:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('UlinziTracker', '0008_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='incident',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='incident_images/thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='image_web',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='incident_images/web/'),
+        ),
+    ]
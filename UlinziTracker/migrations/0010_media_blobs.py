@@ -0,0 +1,54 @@
+# Generated by Django 3.2.2 on 2026-10-18 14:47
+
+import UlinziTracker.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('UlinziTracker', '0009_incident_image_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('refs', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='audio',
+            field=models.FileField(blank=True, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_audio/'),
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='document',
+            field=models.FileField(blank=True, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_docs/'),
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_images/'),
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_images/thumbs/'),
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='image_web',
+            field=models.ImageField(blank=True, editable=False, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_images/web/'),
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='video',
+            field=models.FileField(blank=True, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_videos/'),
+        ),
+    ]
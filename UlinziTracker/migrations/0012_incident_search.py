@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# Keep in sync with UlinziTracker/search.py.
+FTS_TABLE = 'ulinzi_incident_fts'
+PG_TABLE = 'ulinzi_incident_search'
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, description, location, reporter, "
+            "tokenize='porter unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description, location, reporter) "
+            "SELECT i.id, i.title, i.description, COALESCE(i.location, ''), u.username "
+            "FROM \"UlinziTracker_incident\" i JOIN auth_user u ON u.id = i.reporter_id"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {PG_TABLE} ("
+            "incident_id bigint PRIMARY KEY REFERENCES \"UlinziTracker_incident\" (id) "
+            "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {PG_TABLE}_document_idx ON {PG_TABLE} USING GIN (document)"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {PG_TABLE} (incident_id, document) "
+            "SELECT i.id, "
+            "setweight(to_tsvector('english', i.title), 'A') || "
+            "setweight(to_tsvector('english', i.description), 'B') || "
+            "setweight(to_tsvector('english', COALESCE(i.location, '')), 'C') || "
+            "setweight(to_tsvector('simple', u.username), 'D') "
+            "FROM \"UlinziTracker_incident\" i JOIN auth_user u ON u.id = i.reporter_id"
+        )
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {PG_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('UlinziTracker', '0011_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
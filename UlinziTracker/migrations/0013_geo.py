@@ -0,0 +1,82 @@
+# Generated by Django 3.2.2 on 2026-10-18 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('UlinziTracker', '0012_incident_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotspotCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('24h', '24h'), ('7d', '7d'), ('30d', '30d')], max_length=8)),
+                ('cell', models.CharField(max_length=12)),
+                ('category', models.CharField(choices=[('suspicious_activity', 'Suspicious Activity'), ('emergency', 'Emergency'), ('disturbance', 'Neighborhood Disturbance'), ('other', 'Other')], max_length=50)),
+                ('count', models.IntegerField(default=0)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('key', models.CharField(editable=False, max_length=200, unique=True)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['geohash'], name='incident_geohash_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['latitude', 'longitude'], name='incident_lat_lng_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['geohash'], name='profile_geohash_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='hotspotcell',
+            constraint=models.UniqueConstraint(fields=('window', 'cell', 'category'), name='unique_hotspot_cell'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 3.2.2 on 2026-10-18 14:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('UlinziTracker', '0013_geo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=20)),
+                ('to_status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('in_progress', 'In Progress'), ('resolved', 'Resolved')], max_length=20)),
+                ('category', models.CharField(choices=[('suspicious_activity', 'Suspicious Activity'), ('emergency', 'Emergency'), ('disturbance', 'Neighborhood Disturbance'), ('other', 'Other')], max_length=50)),
+                ('at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('elapsed', models.DurationField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LatencyBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('response', 'Response'), ('resolution', 'Resolution')], max_length=20)),
+                ('dimension', models.CharField(choices=[('category', 'Category'), ('officer', 'Officer')], max_length=20)),
+                ('key', models.CharField(max_length=50)),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='resolution_time',
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='latencybucket',
+            constraint=models.UniqueConstraint(fields=('metric', 'dimension', 'key', 'bucket'), name='unique_latency_bucket'),
+        ),
+        migrations.AddField(
+            model_name='incidenttransition',
+            name='actor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='incidenttransition',
+            name='incident',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='transitions', to='UlinziTracker.incident'),
+        ),
+        migrations.AddIndex(
+            model_name='incidenttransition',
+            index=models.Index(fields=['incident', 'at'], name='transition_incident_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incidenttransition',
+            index=models.Index(fields=['to_status', 'at'], name='transition_status_at_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.2 on 2026-10-18 15:10
+
+import UlinziTracker.storage
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('UlinziTracker', '0014_transitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedIncident',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(max_length=2000)),
+                ('category', models.CharField(choices=[('suspicious_activity', 'Suspicious Activity'), ('emergency', 'Emergency'), ('disturbance', 'Neighborhood Disturbance'), ('other', 'Other')], max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('in_progress', 'In Progress'), ('resolved', 'Resolved')], max_length=20)),
+                ('response_notes', models.TextField(blank=True, null=True)),
+                ('location', models.CharField(blank=True, max_length=200, null=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('geohash', models.CharField(blank=True, default='', max_length=12)),
+                ('time_reported', models.DateTimeField()),
+                ('response_time', models.DurationField(blank=True, null=True)),
+                ('resolution_time', models.DurationField(blank=True, null=True)),
+                ('image', models.ImageField(blank=True, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_images/')),
+                ('video', models.FileField(blank=True, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_videos/')),
+                ('audio', models.FileField(blank=True, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_audio/')),
+                ('document', models.FileField(blank=True, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_docs/')),
+                ('image_thumbnail', models.ImageField(blank=True, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_images/thumbs/')),
+                ('image_web', models.ImageField(blank=True, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_images/web/')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('confirmed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('reporter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_incidents', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedincident',
+            index=models.Index(fields=['-time_reported', '-id'], name='archived_time_reported_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedincident',
+            index=models.Index(fields=['reporter', '-time_reported'], name='archived_reporter_time_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.2.2 on 2026-10-18 15:22
+
+import UlinziTracker.storage
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('UlinziTracker', '0015_archived_incidents'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='incident',
+            name='audio',
+            field=UlinziTracker.storage.BlobFileField(blank=True, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_audio/'),
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='document',
+            field=UlinziTracker.storage.BlobFileField(blank=True, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_docs/'),
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='image',
+            field=UlinziTracker.storage.BlobImageField(blank=True, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_images/'),
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='image_thumbnail',
+            field=UlinziTracker.storage.BlobImageField(blank=True, editable=False, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_images/thumbs/'),
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='image_web',
+            field=UlinziTracker.storage.BlobImageField(blank=True, editable=False, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_images/web/'),
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='video',
+            field=UlinziTracker.storage.BlobFileField(blank=True, null=True, storage=UlinziTracker.storage.media_storage, upload_to='incident_videos/'),
+        ),
+    ]
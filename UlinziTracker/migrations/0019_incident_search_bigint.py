@@ -0,0 +1,22 @@
+from django.db import migrations
+
+# Keep in sync with UlinziTracker/search.py.
+PG_TABLE = 'ulinzi_incident_search'
+
+
+def widen_key(apps, schema_editor):
+    # Incident ids are BigAutoField. Databases that ran 0012 while it still
+    # declared the key as integer are widened here; elsewhere this is a no-op.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f"ALTER TABLE {PG_TABLE} ALTER COLUMN incident_id TYPE bigint")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('UlinziTracker', '0018_job_lease'),
+    ]
+
+    operations = [
+        migrations.RunPython(widen_key, migrations.RunPython.noop),
+    ]
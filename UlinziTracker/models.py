@@ -1,8 +1,12 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.dispatch import receiver
-from django.db.models.signals import post_save
 from django.core.validators import RegexValidator
+from django.utils import timezone
+
+from . import geo
+from .storage import BlobFileField, BlobImageField, media_storage
 
 # ---------------------------
 # User Profile model
@@ -24,24 +28,46 @@ class Profile(models.Model):
     )
     contact_number = models.CharField(validators=[phone_regex], max_length=10, blank=True)
     location = models.CharField(max_length=100, blank=True, null=True)
+    # Resolved from `location` on save (see geo.py).
+    latitude = models.FloatField(blank=True, null=True, editable=False)
+    longitude = models.FloatField(blank=True, null=True, editable=False)
+    geohash = models.CharField(max_length=12, blank=True, default='', editable=False)
 
     def __str__(self):
         return f"{self.user.username} ({self.role})"
 
-    class Meta:
-        app_label = 'UlinziTracker'
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_location = dict(zip(field_names, values)).get('location')
+        return instance
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'location' in update_fields:
+            geo.locate(self, getattr(self, '_loaded_location', None))
+            self._loaded_location = self.location
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'latitude', 'longitude', 'geohash'}
+        super().save(*args, **kwargs)
 
-# Signal to create Profile automatically when a new User is created
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        Profile.objects.create(user=instance)
+    class Meta:
+        app_label = 'UlinziTracker'
+        indexes = [
+            models.Index(fields=['geohash'], name='profile_geohash_idx'),
+        ]
 
 
 # ---------------------------
 # Incident/Report model
 # ---------------------------
+class IncidentQuerySet(models.QuerySet):
+    def for_listing(self):
+        # Every list template shows the reporter (and sometimes the confirming
+        # officer), so join them up front instead of one query per row.
+        return self.select_related('reporter', 'confirmed_by').order_by('-time_reported', '-id')
+
+
 class Incident(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -66,18 +92,366 @@ class Incident(models.Model):
     description = models.TextField(max_length=2000)
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, default='other')
     location = models.CharField(max_length=200, blank=True, null=True)
+    # Resolved from `location` on save (see geo.py); geohash cells make
+    # radius and hotspot queries index range scans.
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    geohash = models.CharField(max_length=12, blank=True, default='', editable=False)
     time_reported = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Time from report to first confirmation / to resolution, set on save.
     response_time = models.DurationField(blank=True, null=True)
+    resolution_time = models.DurationField(blank=True, null=True)
 
     # Multimedia fields
-    image = models.ImageField(upload_to='incident_images/', blank=True, null=True)
-    video = models.FileField(upload_to='incident_videos/', blank=True, null=True)
-    audio = models.FileField(upload_to='incident_audio/', blank=True, null=True)
-    document = models.FileField(upload_to='incident_docs/', blank=True, null=True)
+    image = BlobImageField(upload_to='incident_images/', storage=media_storage, blank=True, null=True)
+    video = BlobFileField(upload_to='incident_videos/', storage=media_storage, blank=True, null=True)
+    audio = BlobFileField(upload_to='incident_audio/', storage=media_storage, blank=True, null=True)
+    document = BlobFileField(upload_to='incident_docs/', storage=media_storage, blank=True, null=True)
+
+    # Downscaled copies of `image` generated after upload (see images.py);
+    # pages show these and keep the original for download only.
+    image_thumbnail = BlobImageField(upload_to='incident_images/thumbs/', storage=media_storage,
+                                     blank=True, null=True, editable=False)
+    image_web = BlobImageField(upload_to='incident_images/web/', storage=media_storage,
+                               blank=True, null=True, editable=False)
+
+    objects = IncidentQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.title} ({self.status})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was read so signal handlers can tell what changed on save.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'location', 'latitude', 'longitude'} & set(update_fields):
+            geo.locate(self, self.loaded_value('location') if self.pk else None)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'latitude', 'longitude', 'geohash'}
+        if update_fields is None or 'status' in update_fields:
+            timed = self.stamp_timings()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | timed
+        # Uploads take their blob reference in pre_save; keep it in the same
+        # transaction as the row.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def stamp_timings(self, now=None):
+        # Fill response_time on the first move out of 'pending' and
+        # resolution_time on the first move to 'resolved'; returns the fields set.
+        previous = self.loaded_value('status')
+        if self.pk is None or previous is None or previous == self.status:
+            return set()
+        elapsed = (now or timezone.now()) - self.time_reported
+        timed = set()
+        if previous == 'pending' and self.response_time is None:
+            self.response_time = elapsed
+            timed.add('response_time')
+        if self.status == 'resolved' and self.resolution_time is None:
+            self.resolution_time = elapsed
+            timed.add('resolution_time')
+        return timed
+
+    def loaded_value(self, attname):
+        # Value as last read from / written to the database; None for new rows.
+        return getattr(self, '_loaded_values', {}).get(attname)
+
+    MEDIA_FIELDS = ('image', 'video', 'audio', 'document', 'image_thumbnail', 'image_web')
+
+    def remember_state(self, fields=None):
+        values = getattr(self, '_loaded_values', {})
+        for field in self._meta.concrete_fields:
+            if fields is None or field.name in fields:
+                value = getattr(self, field.attname)
+                # Keep file fields as their stored name, as from_db() does.
+                values[field.attname] = value.name if isinstance(field, models.FileField) else value
+        self._loaded_values = values
+
+    def replaced_media(self, fields=None):
+        # Stored names of media files this save has replaced or cleared.
+        replaced = []
+        for name in self.MEDIA_FIELDS:
+            if fields is not None and name not in fields:
+                continue
+            old = self.loaded_value(name)
+            if old and old != (getattr(self, name).name or ''):
+                replaced.append(old)
+        return replaced
+
+    class Meta:
+        app_label = 'UlinziTracker'
+        # Match the hot access paths: lists filtered by status and/or reporter
+        # and ordered newest first, statistics grouped by category, and the
+        # admin/officer lists sorted by -time_reported.
+        indexes = [
+            models.Index(fields=['status', '-time_reported', '-id'], name='incident_status_time_idx'),
+            models.Index(fields=['reporter', 'status', '-time_reported'], name='incident_reporter_status_idx'),
+            models.Index(fields=['category', 'status'], name='incident_category_status_idx'),
+            models.Index(fields=['-time_reported', '-id'], name='incident_time_reported_idx'),
+            models.Index(fields=['geohash'], name='incident_geohash_idx'),
+            models.Index(fields=['latitude', 'longitude'], name='incident_lat_lng_idx'),
+        ]
+
+
+# ---------------------------
+# Archived incidents
+# ---------------------------
+# Resolved incidents past ARCHIVE_AFTER_DAYS are moved here by archive.py so
+# the live table and its indexes only hold recent history. Rows keep their
+# original id (transitions and PDF links still resolve) and take over the
+# incident's media references.
+class ArchivedIncident(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    reporter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_incidents')
+    confirmed_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    title = models.CharField(max_length=200)
+    description = models.TextField(max_length=2000)
+    category = models.CharField(max_length=50, choices=Incident.CATEGORY_CHOICES)
+    status = models.CharField(max_length=20, choices=Incident.STATUS_CHOICES)
+    response_notes = models.TextField(blank=True, null=True)
+    location = models.CharField(max_length=200, blank=True, null=True)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    geohash = models.CharField(max_length=12, blank=True, default='')
+    time_reported = models.DateTimeField()
+    response_time = models.DurationField(blank=True, null=True)
+    resolution_time = models.DurationField(blank=True, null=True)
+
+    image = models.ImageField(upload_to='incident_images/', storage=media_storage, blank=True, null=True)
+    video = models.FileField(upload_to='incident_videos/', storage=media_storage, blank=True, null=True)
+    audio = models.FileField(upload_to='incident_audio/', storage=media_storage, blank=True, null=True)
+    document = models.FileField(upload_to='incident_docs/', storage=media_storage, blank=True, null=True)
+    image_thumbnail = models.ImageField(upload_to='incident_images/thumbs/', storage=media_storage,
+                                        blank=True, null=True)
+    image_web = models.ImageField(upload_to='incident_images/web/', storage=media_storage, blank=True, null=True)
+
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+    class Meta:
+        app_label = 'UlinziTracker'
+        indexes = [
+            models.Index(fields=['-time_reported', '-id'], name='archived_time_reported_idx'),
+            models.Index(fields=['reporter', '-time_reported'], name='archived_reporter_time_idx'),
+        ]
+
+
+# ---------------------------
+# Place gazetteer and hotspot cells
+# ---------------------------
+# Named places ("Kibera", "Westlands") with coordinates, used to geocode the
+# free-text locations typed into incidents and profiles.
+class Place(models.Model):
+    name = models.CharField(max_length=200)
+    key = models.CharField(max_length=200, unique=True, editable=False)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.key = geo.normalise(self.name)
+        super().save(*args, **kwargs)
+
+    class Meta:
+        app_label = 'UlinziTracker'
+
+
+# Incident counts per geohash cell and category over a recent window,
+# recomputed by the refresh_hotspots job so the chiefs' heatmap is one read.
+class HotspotCell(models.Model):
+    WINDOW_CHOICES = [(window, window) for window in geo.HOTSPOT_WINDOWS]
+
+    window = models.CharField(max_length=8, choices=WINDOW_CHOICES)
+    cell = models.CharField(max_length=12)
+    category = models.CharField(max_length=50, choices=Incident.CATEGORY_CHOICES)
+    count = models.IntegerField(default=0)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.window} {self.cell} {self.category}: {self.count}"
+
+    class Meta:
+        app_label = 'UlinziTracker'
+        constraints = [
+            models.UniqueConstraint(fields=['window', 'cell', 'category'], name='unique_hotspot_cell'),
+        ]
+
+
+# ---------------------------
+# Status transition log and latency histograms
+# ---------------------------
+# One row per status change, never updated. The incident link has no database
+# constraint so the history outlives deleted or archived incidents.
+class IncidentTransition(models.Model):
+    incident = models.ForeignKey(Incident, on_delete=models.DO_NOTHING, db_constraint=False,
+                                 related_name='transitions')
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20, choices=Incident.STATUS_CHOICES)
+    category = models.CharField(max_length=50, choices=Incident.CATEGORY_CHOICES)
+    actor = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    at = models.DateTimeField(default=timezone.now)
+    # Time since the incident was reported.
+    elapsed = models.DurationField()
+
+    def __str__(self):
+        return f"#{self.incident_id}: {self.from_status or '-'} -> {self.to_status}"
+
+    class Meta:
+        app_label = 'UlinziTracker'
+        indexes = [
+            models.Index(fields=['incident', 'at'], name='transition_incident_at_idx'),
+            models.Index(fields=['to_status', 'at'], name='transition_status_at_idx'),
+        ]
+
+
+# Log-scale histogram of response/resolution latency, one row per bucket for
+# each category and each officer. Incremented as transitions happen (see
+# sla.py), so percentiles never rescan the transition log.
+class LatencyBucket(models.Model):
+    METRIC_CHOICES = [('response', 'Response'), ('resolution', 'Resolution')]
+    DIMENSION_CHOICES = [('category', 'Category'), ('officer', 'Officer')]
+
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=50)
+    bucket = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.metric}/{self.dimension}={self.key} [{self.bucket}]: {self.count}"
+
+    class Meta:
+        app_label = 'UlinziTracker'
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'dimension', 'key', 'bucket'], name='unique_latency_bucket'),
+        ]
+
+
+# ---------------------------
+# Incident statistics rollup
+# ---------------------------
+# One row per (category, status) holding the number of incidents in that
+# bucket. Kept current by the Incident signals in signals.py so the statistics
+# page never has to count the incident table itself.
+class IncidentStat(models.Model):
+    category = models.CharField(max_length=50, choices=Incident.CATEGORY_CHOICES)
+    status = models.CharField(max_length=20, choices=Incident.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.category}/{self.status}: {self.count}"
+
+    class Meta:
+        app_label = 'UlinziTracker'
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'status'], name='unique_incident_stat'),
+        ]
+
+
+# ---------------------------
+# Chunked evidence uploads
+# ---------------------------
+# A resumable upload of one media file for an existing incident. Bytes are
+# appended to a part file under UPLOAD_PARTS_DIR (see uploads.py); once all
+# `size` bytes have arrived the file is moved into the incident's field.
+class UploadSession(models.Model):
+    FIELD_CHOICES = [
+        ('image', 'Image'),
+        ('video', 'Video'),
+        ('audio', 'Audio'),
+        ('document', 'Document'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='upload_sessions')
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
+
+    class Meta:
+        app_label = 'UlinziTracker'
+
+
+# ---------------------------
+# Deduplicated media blobs
+# ---------------------------
+# Every file stored through storage.ContentAddressedStorage lives once under
+# its SHA-256 digest; `refs` counts the incident fields pointing at it and the
+# file is removed only when the last one lets go.
+class MediaBlob(models.Model):
+    digest = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    refs = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refs} refs)"
+
+    class Meta:
+        app_label = 'UlinziTracker'
+
+
+# ---------------------------
+# Background jobs
+# ---------------------------
+# Slow side effects (image derivatives, PDF warm-up, upload assembly, mail)
+# are stored here by jobs.enqueue() and executed by `manage.py run_jobs`.
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    queue = models.CharField(max_length=50, default='default')
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0)  # higher runs first
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    # Pushed forward by the running worker's heartbeat (see jobs.run); a
+    # running job whose lease has passed lost its worker.
+    lease_expires_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
     class Meta:
         app_label = 'UlinziTracker'
+        indexes = [
+            models.Index(fields=['status', 'queue', '-priority', 'run_after'], name='job_claim_idx'),
+            models.Index(fields=['status', 'finished_at'], name='job_finished_idx'),
+        ]
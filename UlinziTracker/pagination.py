@@ -0,0 +1,117 @@
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.http import urlencode
+
+
+# ---------------------------
+# Keyset (cursor) pagination
+# ---------------------------
+# Pages are addressed by the (time_reported, id) of the last row seen rather
+# than by an OFFSET, so fetching page 400 costs the same as fetching page 1.
+
+def encode_cursor(incident):
+    raw = f"{incident.time_reported.isoformat()}|{incident.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+MAX_PK = 2 ** 63 - 1
+
+
+def decode_cursor(token):
+    # Cursors come back from the browser; anything we did not issue means page 1.
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        stamp, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        stamp, pk = datetime.fromisoformat(stamp), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if stamp.tzinfo is None or not 0 < pk <= MAX_PK:
+        return None
+    return stamp, pk
+
+
+class KeysetPage:
+    def __init__(self, items, request, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self._request = request
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def _url(self, **cursor):
+        params = self._request.GET.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        params.update(cursor)
+        return '?' + urlencode(params, doseq=True) if params else '?'
+
+    @property
+    def next_url(self):
+        return self._url(after=self.next_cursor)
+
+    @property
+    def previous_url(self):
+        return self._url(before=self.prev_cursor)
+
+    @property
+    def first_url(self):
+        return self._url()
+
+
+def keyset_slice(queryset, request, per_page=None):
+    """Return ``(rows, next_cursor, prev_cursor)`` for one page, newest first.
+
+    ``?after=<cursor>`` walks towards older incidents and ``?before=<cursor>``
+    walks back towards newer ones.
+    """
+    per_page = per_page or getattr(settings, 'INCIDENTS_PER_PAGE', 25)
+    after = decode_cursor(request.GET.get('after', ''))
+    before = None if after else decode_cursor(request.GET.get('before', ''))
+
+    if before:
+        stamp, pk = before
+        queryset = queryset.filter(
+            Q(time_reported__gt=stamp) | Q(time_reported=stamp, pk__gt=pk)
+        ).order_by('time_reported', 'id')
+    else:
+        if after:
+            stamp, pk = after
+            queryset = queryset.filter(
+                Q(time_reported__lt=stamp) | Q(time_reported=stamp, pk__lt=pk)
+            )
+        queryset = queryset.order_by('-time_reported', '-id')
+
+    rows = list(queryset[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if before:
+        rows.reverse()
+        next_cursor = encode_cursor(rows[-1]) if rows else None
+        prev_cursor = encode_cursor(rows[0]) if rows and has_more else None
+    else:
+        next_cursor = encode_cursor(rows[-1]) if rows and has_more else None
+        prev_cursor = encode_cursor(rows[0]) if rows and after else None
+
+    return rows, next_cursor, prev_cursor
+
+
+def paginate_keyset(queryset, request, per_page=None):
+    rows, next_cursor, prev_cursor = keyset_slice(queryset, request, per_page)
+    return KeysetPage(rows, request, next_cursor=next_cursor, prev_cursor=prev_cursor)
@@ -0,0 +1,210 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+
+# ---------------------------
+# Incident PDF rendering
+# ---------------------------
+# Rendering works on plain dicts rather than model instances so pages can be
+# drawn in worker processes without touching the database.
+
+def incident_payload(incident):
+    return {
+        'id': incident.id,
+        'reporter': incident.reporter.username,
+        'category': incident.get_category_display(),
+        'status': incident.get_status_display(),
+        'location': incident.location,
+        'time_reported': incident.time_reported.strftime('%Y-%m-%d %H:%M'),
+        'description': incident.description,
+    }
+
+
+def draw_incident(p, data):
+    p.drawString(25, 770, "Incident Report")
+    p.drawString(30, 750, f"Reporter: {data['reporter']}")
+    p.drawString(30, 730, f"Category: {data['category']}")
+    p.drawString(30, 710, f"Status: {data['status']}")
+    p.drawString(30, 690, f"Location: {data['location']}")
+    p.drawString(30, 670, f"Time Reported: {data['time_reported']}")
+    p.drawString(30, 650, "Description:")
+    p.drawString(30, 630, data['description'])
+    p.showPage()
+
+
+def render_incident(data):
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    draw_incident(p, data)
+    p.save()
+    return buffer.getvalue()
+
+
+def render_combined(payloads, path):
+    p = canvas.Canvas(path, pagesize=A4)
+    for data in payloads:
+        draw_incident(p, data)
+    p.save()
+    return path
+
+
+# ---------------------------
+# Bulk export
+# ---------------------------
+def _workers():
+    return getattr(settings, 'PDF_EXPORT_WORKERS', 2)
+
+
+def render_in_pool(payloads, workers=None):
+    """Yield ``(payload, pdf_bytes)`` in input order, rendering in a process pool.
+
+    At most ``2 * workers`` renders are in flight, so the input iterator is
+    consumed lazily and memory stays flat however many incidents match.
+    """
+    workers = workers or _workers()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for data in payloads:
+            pending.append((data, executor.submit(render_incident, data)))
+            if len(pending) >= 2 * workers:
+                data, future = pending.popleft()
+                yield data, future.result()
+        while pending:
+            data, future = pending.popleft()
+            yield data, future.result()
+
+
+class _ZipStream:
+    # Write-only file object for ZipFile; each drain() hands back what has
+    # been written since the last call so it can be sent straight away.
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(payloads, workers=None):
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for data, pdf in render_in_pool(payloads, workers):
+            archive.writestr(f"incident_{data['id']}.pdf", pdf)
+            yield stream.drain()
+    yield stream.drain()
+
+
+def combined_limit():
+    return getattr(settings, 'PDF_COMBINED_MAX_INCIDENTS', 500)
+
+
+def render_combined_file(payloads):
+    """Render one multi-page PDF into an anonymous temporary file, rewound for reading.
+
+    ReportLab keeps every page of a document until it is saved, so callers cap
+    the number of incidents (combined_limit()); the ZIP export streams instead.
+    The file disappears once it is closed, e.g. by the response.
+    """
+    handle = tempfile.TemporaryFile(suffix='.pdf')
+    try:
+        render_combined(payloads, handle)
+    except BaseException:
+        handle.close()
+        raise
+    handle.seek(0)
+    return handle
+
+
+# ---------------------------
+# Rendition cache
+# ---------------------------
+# Rendered PDFs are kept on disk as incident_<id>_<version>.pdf where the
+# version hashes everything drawn on the page, so an edit can never serve a
+# stale file. The directory is bounded by PDF_CACHE_MAX_BYTES and evicts the
+# least recently served files first (tracked through the access time).
+
+def _cache_dir():
+    path = Path(getattr(settings, 'PDF_CACHE_DIR', Path(settings.BASE_DIR) / 'pdf_cache'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def content_version(data):
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()[:20]
+
+
+def open_rendition(data):
+    """Return ``(file, version, mtime)`` for the cached PDF, rendering on a miss."""
+    version = content_version(data)
+    path = _cache_dir() / f"incident_{data['id']}_{version}.pdf"
+    try:
+        handle = open(path, 'rb')
+    except FileNotFoundError:
+        handle, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as out:
+                out.write(render_incident(data))
+            os.replace(tmp, path)
+        except BaseException:
+            # evict() only sees finished renditions; don't leave the partial file.
+            os.unlink(tmp)
+            raise
+        handle = open(path, 'rb')
+        evict()
+    else:
+        stat = os.fstat(handle.fileno())
+        os.utime(path, (time.time(), stat.st_mtime))  # mark as recently used
+    return handle, version, os.fstat(handle.fileno()).st_mtime
+
+
+def invalidate(incident_id):
+    for path in _cache_dir().glob(f'incident_{incident_id}_*.pdf'):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def evict(max_bytes=None):
+    max_bytes = max_bytes if max_bytes is not None else getattr(settings, 'PDF_CACHE_MAX_BYTES', 200 * 1024 * 1024)
+    entries = []
+    for path in _cache_dir().glob('incident_*.pdf'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_atime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        total -= size
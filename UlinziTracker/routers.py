@@ -0,0 +1,111 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+# ---------------------------
+# Primary / read-replica routing
+# ---------------------------
+# Writes always go to "default". Reads go to a replica only inside views
+# marked @use_replica (statistics, lists, exports) or a ``with replica():``
+# block, so everything else -- including any read that must see a write made
+# a moment ago -- stays on the primary. One replica is picked per block (and
+# per request, streamed body included), so a page never mixes the snapshots
+# of replicas that lag by different amounts. After a POST/PUT/PATCH/DELETE the
+# same browser is pinned to the primary for REPLICA_PIN_SECONDS so it does
+# not miss its own change because of replication lag. Other users can still
+# see (and cache, for up to ULINZI_CACHE_TIMEOUT) a page that is behind by
+# the replica's lag.
+
+PIN_COOKIE = 'ulinzi_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica_alias = ContextVar('ulinzi_replica_alias', default=None)
+
+
+def replicas():
+    return [alias for alias in getattr(settings, 'DATABASE_REPLICAS', []) if alias in settings.DATABASES]
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _replica_alias.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication.
+        return db == 'default'
+
+
+def choose_replica():
+    aliases = replicas()
+    return random.choice(aliases) if aliases else None
+
+
+@contextmanager
+def replica(alias=None):
+    """Read from one replica for the whole block, so its queries share a snapshot."""
+    token = _replica_alias.set(alias or _replica_alias.get() or choose_replica())
+    try:
+        yield
+    finally:
+        _replica_alias.reset(token)
+
+
+def _stream_on_replica(content, alias):
+    # Streaming bodies are produced after the view returns; keep their
+    # queries on the replica the view read from.
+    iterator = iter(content)
+    done = object()
+    while True:
+        with replica(alias):
+            chunk = next(iterator, done)
+        if chunk is done:
+            return
+        yield chunk
+
+
+def use_replica(view):
+    """Serve a read-only view from a replica when one is configured."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not replicas() or request.method not in SAFE_METHODS or request.COOKIES.get(PIN_COOKIE):
+            return view(request, *args, **kwargs)
+        alias = choose_replica()
+        with replica(alias):
+            response = view(request, *args, **kwargs)
+        if getattr(response, 'streaming', False):
+            response.streaming_content = _stream_on_replica(response.streaming_content, alias)
+        return response
+    return wrapper
+
+
+class PrimaryPinMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and replicas():
+            response.set_cookie(PIN_COOKIE, '1', max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 5),
+                                httponly=True, samesite='Lax')
+        return response
+
+
+# --- Persistent connection health checks ---
+def check_connections(**kwargs):
+    """Drop persistent connections the server has closed before the request uses them."""
+    if not getattr(settings, 'DB_HEALTH_CHECKS', False):
+        return
+    for connection in connections.all():
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
@@ -0,0 +1,177 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Incident
+
+
+# ---------------------------
+# Full-text search over incidents
+# ---------------------------
+# SQLite keeps an FTS5 table keyed by incident id (rowid); PostgreSQL keeps a
+# tsvector per incident with a GIN index. Both are written from the Incident
+# signals, so a search never scans the incident table itself. The reporter's
+# username is indexed as it was at save time; rebuild_search_index refreshes
+# everything after bulk changes that bypass signals. The tables themselves
+# are created by migration 0012.
+
+FTS_TABLE = 'ulinzi_incident_fts'
+PG_TABLE = 'ulinzi_incident_search'
+INDEXED_FIELDS = ('title', 'description', 'location', 'reporter')
+# Column weights: a hit in the title counts more than one in the description.
+WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def _vendor():
+    return connection.vendor
+
+
+def is_supported():
+    return _vendor() in ('sqlite', 'postgresql')
+
+
+# --- Keeping the index in sync ---
+def _document(incident, username):
+    return (incident.title or '', incident.description or '', incident.location or '', username or '')
+
+_PG_DOCUMENT = (
+    "setweight(to_tsvector('english', %s), 'A') || setweight(to_tsvector('english', %s), 'B') || "
+    "setweight(to_tsvector('english', %s), 'C') || setweight(to_tsvector('simple', %s), 'D')"
+)
+
+
+def _write(cursor, rows):
+    if _vendor() == 'sqlite':
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows],
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, description, location, reporter) "
+            "VALUES (%s, %s, %s, %s, %s)", rows,
+        )
+    else:
+        cursor.executemany(
+            f"INSERT INTO {PG_TABLE} (incident_id, document) VALUES (%s, {_PG_DOCUMENT}) "
+            "ON CONFLICT (incident_id) DO UPDATE SET document = EXCLUDED.document", rows,
+        )
+
+
+def index_incident(incident):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        _write(cursor, [(incident.pk, *_document(incident, incident.reporter.username))])
+
+
+def remove(incident_id):
+    if not is_supported():
+        return
+    table, key = (FTS_TABLE, 'rowid') if _vendor() == 'sqlite' else (PG_TABLE, 'incident_id')
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {key} = %s", [incident_id])
+
+
+def index_many(queryset, batch_size=2000):
+    """(Re)index every incident in ``queryset``; returns the number written."""
+    if not is_supported():
+        return 0
+    rows = (queryset.order_by()
+            .values_list('pk', 'title', 'description', 'location', 'reporter__username')
+            .iterator(chunk_size=batch_size))
+    written = 0
+    batch = []
+    with connection.cursor() as cursor:
+        for pk, *text in rows:
+            batch.append((pk, *(value or '' for value in text)))
+            if len(batch) >= batch_size:
+                _write(cursor, batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            _write(cursor, batch)
+            written += len(batch)
+    return written
+
+
+def rebuild():
+    if not is_supported():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE if _vendor() == 'sqlite' else PG_TABLE}")
+    return index_many(Incident.objects.all())
+
+
+# --- Querying ---
+def _fts_query(text):
+    # Quote every word so user input can never be parsed as FTS5 syntax.
+    return ' '.join('"%s"' % token for token in TOKEN.findall(text or ''))
+
+
+def _match_sql(text):
+    """Return ``(sql, params)`` selecting the ids of incidents matching ``text``."""
+    if _vendor() == 'sqlite':
+        return f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [_fts_query(text)]
+    return (f"SELECT incident_id FROM {PG_TABLE} WHERE document @@ websearch_to_tsquery('english', %s)",
+            [text])
+
+
+def filter_matching(queryset, text):
+    """Restrict ``queryset`` to incidents matching ``text`` (unranked)."""
+    if not TOKEN.search(text or ''):
+        return queryset.none()
+    if not is_supported():
+        return queryset.filter(title__icontains=text) | queryset.filter(description__icontains=text)
+    sql, params = _match_sql(text)
+    return queryset.filter(pk__in=RawSQL(sql, params))
+
+
+def ranked_ids(text, limit=25, offset=0, **filters):
+    """Return ``[(incident_id, score), ...]`` best match first.
+
+    ``filters`` are equality conditions on incident columns (e.g.
+    ``reporter_id=5``, ``status='pending'``) applied inside the same query, so
+    scoping a resident to their own reports does not cost a second pass.
+    """
+    if not TOKEN.search(text or '') or not is_supported():
+        return []
+    incident_table = connection.ops.quote_name(Incident._meta.db_table)
+    columns = {field.attname: field.column for field in Incident._meta.concrete_fields}
+    where, params = [], []
+    for attname, value in filters.items():
+        where.append(f"i.{connection.ops.quote_name(columns[attname])} = %s")
+        params.append(value)
+    extra = ''.join(f' AND {clause}' for clause in where)
+
+    if _vendor() == 'sqlite':
+        weights = ', '.join(str(weight) for weight in WEIGHTS)
+        sql = (f"SELECT f.rowid, bm25({FTS_TABLE}, {weights}) AS score "
+               f"FROM {FTS_TABLE} f JOIN {incident_table} i ON i.id = f.rowid "
+               f"WHERE {FTS_TABLE} MATCH %s{extra} ORDER BY score, f.rowid DESC LIMIT %s OFFSET %s")
+        params = [_fts_query(text), *params, limit, offset]
+    else:
+        sql = (f"SELECT s.incident_id, ts_rank_cd(s.document, q) AS score "
+               f"FROM {PG_TABLE} s JOIN {incident_table} i ON i.id = s.incident_id, "
+               f"websearch_to_tsquery('english', %s) q "
+               f"WHERE s.document @@ q{extra} ORDER BY score DESC, s.incident_id DESC LIMIT %s OFFSET %s")
+        params = [text, *params, limit, offset]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        # bm25() is lower-is-better; flip it so both backends rank high-to-low.
+        sign = -1 if _vendor() == 'sqlite' else 1
+        return [(pk, sign * score) for pk, score in cursor.fetchall()]
+
+
+def search(text, limit=25, offset=0, **filters):
+    """Ranked incidents for ``text``, each with a ``search_score`` attribute."""
+    hits = ranked_ids(text, limit=limit, offset=offset, **filters)
+    incidents = Incident.objects.select_related('reporter', 'confirmed_by').in_bulk([pk for pk, _ in hits])
+    results = []
+    for pk, score in hits:
+        incident = incidents.get(pk)
+        if incident is not None:
+            incident.search_score = score
+            results.append(incident)
+    return results
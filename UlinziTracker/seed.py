@@ -0,0 +1,223 @@
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import NotSupportedError, connections, router, transaction
+from django.utils import timezone
+
+from . import caching, geo, search, sla, stats
+from .models import Incident, IncidentTransition, Place, Profile
+
+
+# ---------------------------
+# Synthetic data for load testing
+# ---------------------------
+# Everything is written with bulk_create, which skips save() and the model
+# signals, so the derived data those would maintain (incident rollup, search
+# index, transition log and SLA histograms, coordinates) is filled in here and
+# rebuilt once at the end. All randomness comes from one seeded Random, so the
+# same arguments always produce the same data set.
+
+DEFAULT_PASSWORD = 'pass12345'
+USERNAME_PREFIX = 'seed'
+
+CATEGORY_WEIGHTS = {
+    'suspicious_activity': 35,
+    'disturbance': 30,
+    'other': 20,
+    'emergency': 15,
+}
+# Reports per hour of day: quiet mornings, busiest in the evening.
+HOUR_WEIGHTS = [3, 2, 2, 1, 1, 1, 2, 3, 4, 4, 4, 5, 5, 5, 5, 6, 6, 7, 8, 9, 9, 8, 6, 4]
+MEDIAN_RESPONSE_HOURS = 2
+MEDIAN_RESOLUTION_HOURS = 36
+
+# Used when the Place gazetteer is empty.
+NEIGHBOURHOODS = [
+    ('Kibera', -1.3133, 36.7892),
+    ('Westlands', -1.2676, 36.8108),
+    ('Eastleigh', -1.2741, 36.8513),
+    ('Kilimani', -1.2921, 36.7856),
+    ('Embakasi', -1.3230, 36.8947),
+    ('Kasarani', -1.2195, 36.8969),
+    ('Langata', -1.3621, 36.7430),
+    ('Mathare', -1.2603, 36.8580),
+    ('Karen', -1.3197, 36.7073),
+    ('Githurai', -1.2050, 36.9167),
+]
+
+TITLES = {
+    'suspicious_activity': ['Unknown people loitering', 'Car parked overnight', 'Someone checking gates'],
+    'disturbance': ['Loud music past midnight', 'Fight outside the bar', 'Crowd blocking the road'],
+    'emergency': ['House fire', 'Break-in in progress', 'Person injured on the road'],
+    'other': ['Street light out', 'Burst water pipe', 'Stray dogs near school'],
+}
+
+
+def _lognormal(rng, median_hours):
+    return timedelta(hours=rng.lognormvariate(math.log(median_hours), 1.0))
+
+
+def insert_incidents(batch):
+    """bulk_create ``batch`` inside the caller's transaction; returns a queryset of just those rows.
+
+    Each row keeps the ``time_reported`` it was built with.
+    """
+    reported = [incident.time_reported for incident in batch]
+    Incident.objects.bulk_create(batch)
+    connection = connections[router.db_for_write(Incident)]
+    if not connection.features.can_return_rows_from_bulk_insert:
+        if connection.vendor != 'sqlite':
+            raise NotSupportedError("Bulk inserts need a backend that returns the new keys.")
+        # SQLite hands out AUTOINCREMENT keys in order and the insert holds
+        # the write lock until commit, so this transaction's rows are the
+        # newest ones, in batch order.
+        last_id = Incident.objects.order_by('-pk').values_list('pk', flat=True).first()
+        for pk, incident in enumerate(batch, start=last_id - len(batch) + 1):
+            incident.pk = pk
+    # time_reported is auto_now_add, so the insert stamped every row with
+    # now; put the historical times back in one statement per batch.
+    historical = []
+    for incident, value in zip(batch, reported):
+        if value is not None:
+            incident.time_reported = value
+            historical.append(incident)
+    Incident.objects.bulk_update(historical, ['time_reported'])
+    if connection.vendor == 'sqlite':
+        return Incident.objects.filter(pk__range=(batch[0].pk, batch[-1].pk))
+    return Incident.objects.filter(pk__in=[incident.pk for incident in batch])
+
+
+# --- Users ---
+def seed_users(per_role, password=DEFAULT_PASSWORD, batch_size=1000):
+    """Create ``per_role[role]`` users for each role; returns ``{role: [user ids]}``."""
+    hashed = make_password(password)  # hashing once keeps thousands of users cheap
+    now = timezone.now()
+    created = {}
+    for role, count in per_role.items():
+        prefix = f'{USERNAME_PREFIX}_{role}_'
+        start = User.objects.filter(username__startswith=prefix).count()
+        usernames = [f'{prefix}{n}' for n in range(start, start + count)]
+        User.objects.bulk_create(
+            (User(username=name, email=f'{name}@example.com', password=hashed, date_joined=now)
+             for name in usernames),
+            batch_size=batch_size,
+        )
+        ids = list(User.objects.filter(username__in=usernames).values_list('pk', flat=True))
+        Profile.objects.bulk_create((Profile(user_id=pk, role=role) for pk in ids), batch_size=batch_size)
+        created[role] = ids
+    return created
+
+
+# --- Incidents ---
+def _places():
+    places = list(Place.objects.values_list('name', 'latitude', 'longitude')[:500])
+    return places or NEIGHBOURHOODS
+
+
+def _status_for(rng, age):
+    # Older reports are more likely to have been worked through.
+    hours = age.total_seconds() / 3600
+    if hours < 2:
+        weights = (85, 10, 5, 0)
+    elif hours < 48:
+        weights = (30, 25, 30, 15)
+    else:
+        weights = (5, 5, 10, 80)
+    return rng.choices(('pending', 'confirmed', 'in_progress', 'resolved'), weights)[0]
+
+
+def build_incident(rng, now, days, reporters, officers, places):
+    category = rng.choices(list(CATEGORY_WEIGHTS), list(CATEGORY_WEIGHTS.values()))[0]
+    day = rng.randrange(days)
+    hour = rng.choices(range(24), HOUR_WEIGHTS)[0]
+    # Pick the hour on the local clock, where the daily rhythm happens.
+    reported = timezone.localtime(now) - timedelta(days=day)
+    reported = reported.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60))
+    if reported > now:
+        reported -= timedelta(days=1)
+    status = _status_for(rng, now - reported)
+
+    incident = Incident(
+        reporter_id=rng.choice(reporters),
+        title=rng.choice(TITLES[category]),
+        category=category,
+        status=status,
+        time_reported=reported,
+    )
+    name, latitude, longitude = rng.choice(places)
+    incident.latitude = latitude + rng.uniform(-0.01, 0.01)
+    incident.longitude = longitude + rng.uniform(-0.01, 0.01)
+    incident.geohash = geo.encode(incident.latitude, incident.longitude)
+    incident.location = name
+    incident.description = f"{incident.title} reported near {name}."
+
+    if status != 'pending':
+        age = now - reported
+        incident.confirmed_by_id = rng.choice(officers) if officers else None
+        incident.response_time = min(_lognormal(rng, MEDIAN_RESPONSE_HOURS), age)
+        incident.response_notes = 'Officer dispatched.'
+        if status == 'resolved':
+            incident.resolution_time = min(incident.response_time + _lognormal(rng, MEDIAN_RESOLUTION_HOURS), age)
+    return incident
+
+
+def _transitions(incidents):
+    # The same rows the signal handlers would have logged: pending ->
+    # confirmed when responded, then -> in_progress / resolved.
+    rows = []
+    for incident in incidents:
+        if incident.response_time is None:
+            continue
+        responded = incident.time_reported + incident.response_time
+        rows.append(sla.transition(incident, 'pending', 'confirmed', incident.confirmed_by_id, responded))
+        if incident.status == 'in_progress':
+            rows.append(sla.transition(incident, 'confirmed', 'in_progress', incident.confirmed_by_id, responded))
+        elif incident.status == 'resolved':
+            rows.append(sla.transition(incident, 'confirmed', 'resolved', incident.confirmed_by_id,
+                                       incident.time_reported + incident.resolution_time))
+    return rows
+
+
+def seed_incidents(count, reporters, officers, days=365, seed=0, batch_size=2000, now=None):
+    """Create ``count`` incidents spread over the last ``days``; returns how many were written."""
+    rng = random.Random(seed)
+    now = now or timezone.now()
+    places = _places()
+    written = 0
+    while written < count:
+        batch = [build_incident(rng, now, days, reporters, officers, places)
+                 for _ in range(min(batch_size, count - written))]
+        with transaction.atomic():
+            saved = list(insert_incidents(batch).order_by('pk')
+                         .only('pk', 'category', 'status', 'time_reported', 'confirmed_by',
+                               'response_time', 'resolution_time'))
+            IncidentTransition.objects.bulk_create(_transitions(saved), batch_size=batch_size)
+        written += len(batch)
+    return written
+
+
+def refresh_derived():
+    """Rebuild everything bulk_create skipped; returns the per-step counts."""
+    stats.rebuild()
+    done = {
+        'indexed': search.rebuild(),
+        'latency_buckets': sla.rebuild(),
+        'hotspot_cells': geo.refresh_hotspots(),
+    }
+    caching.invalidate()
+    return done
+
+
+def seed(per_role, incidents, days=365, seed=0, password=DEFAULT_PASSWORD):
+    users = seed_users(per_role, password)
+    reporters = users.get('resident') or list(
+        Profile.objects.filter(role='resident').values_list('user_id', flat=True))
+    officers = users.get('officer') or list(
+        Profile.objects.filter(role='officer').values_list('user_id', flat=True))
+    if incidents and not reporters:
+        raise ValueError("At least one resident is needed to report incidents.")
+    written = seed_incidents(incidents, reporters, officers, days=days, seed=seed)
+    return {'users': {role: len(ids) for role, ids in users.items()}, 'incidents': written, **refresh_derived()}
@@ -1,13 +1,119 @@
-from django.db.models.signals import post_save
+from django.core.signals import request_started
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.dispatch import receiver
-from .models import Profile
+from .models import ArchivedIncident, Profile, Incident
+from . import caching, events, pdf, routers, search, sla, stats, tasks
+from .storage import media_storage
 
+# --- Every user gets exactly one profile, created here and nowhere else ---
 @receiver(post_save, sender=User, dispatch_uid='create_user_profile')
 def create_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
 
-@receiver(post_save, sender=User, dispatch_uid='save_user_profile')
-def save_profile(sender, instance, **kwargs):
-    instance.profile.save()
+
+# --- Incident bookkeeping ---
+def _stats_key(category, status):
+    if category is None or status is None:
+        return None
+    return (category, status)
+
+TRACKED_FIELDS = ('category', 'status', 'response_time', 'resolution_time') + Incident.MEDIA_FIELDS
+
+def _load_stored_state(instance):
+    # The handlers compare against the values the instance was read with
+    # (Incident.remember_state keeps them current across saves). Only an
+    # instance built by hand with a pk, or loaded with only()/defer(), lacks
+    # some of them; read just those from the database.
+    if instance.pk is None:
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    missing = [name for name in TRACKED_FIELDS if name not in loaded]
+    if not missing:
+        return
+    stored = Incident.objects.filter(pk=instance.pk).values(*missing).first()
+    if stored:
+        instance._loaded_values = {**loaded, **stored}
+
+@receiver(pre_save, sender=Incident, dispatch_uid='incident_pre_save')
+def incident_pre_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _load_stored_state(instance)
+
+def _release_media(names):
+    # Drop one blob reference per name once the change is committed.
+    def release():
+        for name in names:
+            media_storage().delete(name)
+    if names:
+        transaction.on_commit(release)
+
+@receiver(post_save, sender=Incident, dispatch_uid='incident_saved')
+def incident_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    old_key = None if created else _stats_key(instance.loaded_value('category'), instance.loaded_value('status'))
+    stats.record_change(old_key, (instance.category, instance.status))
+    old_status = None if created else instance.loaded_value('status')
+    if created or old_status != instance.status:
+        actor = sla.actor_id(instance) or (instance.reporter_id if created else None)
+        sla.record(instance, old_status, actor)
+        event = events.incident_event(instance, 'created' if created else 'status', old_status)
+        transaction.on_commit(lambda: events.publish(event))
+    if (instance.image.name or '') != (instance.loaded_value('image') or ''):
+        tasks.generate_image_derivatives.enqueue(instance.pk)
+    _release_media(instance.replaced_media(update_fields))
+    instance.remember_state(update_fields)
+    if update_fields is None or set(update_fields) & set(search.INDEXED_FIELDS):
+        search.index_incident(instance)
+    transaction.on_commit(caching.invalidate)
+    if update_fields is None or not set(update_fields) <= set(Incident.MEDIA_FIELDS):
+        # Media-only saves (derivatives, uploads) don't change the PDF. The
+        # warm-up is queued after the stale rendition is gone, once per incident.
+        incident_id = instance.pk
+
+        def refresh_pdf():
+            pdf.invalidate(incident_id)
+            tasks.warm_incident_pdf.enqueue(incident_id, unique=True)
+        transaction.on_commit(refresh_pdf)
+
+@receiver(pre_delete, sender=Incident, dispatch_uid='incident_pre_delete')
+def incident_pre_delete(sender, instance, **kwargs):
+    if not getattr(instance, '_archiving', False):
+        _load_stored_state(instance)
+
+@receiver(post_delete, sender=Incident, dispatch_uid='incident_deleted')
+def incident_deleted(sender, instance, **kwargs):
+    if getattr(instance, '_archiving', False):
+        # Moved to ArchivedIncident (see archive.py): it still counts in the
+        # rollup, its media now belongs to the archive row and its PDF is
+        # unchanged. archive() invalidates the view cache once per run.
+        search.remove(instance.pk)
+        return
+    stats.record_change(_stats_key(instance.loaded_value('category'), instance.loaded_value('status')), None)
+    _release_media([instance.loaded_value(name) for name in Incident.MEDIA_FIELDS if instance.loaded_value(name)])
+    search.remove(instance.pk)
+    transaction.on_commit(caching.invalidate)
+    incident_id = instance.pk
+    transaction.on_commit(lambda: pdf.invalidate(incident_id))
+
+@receiver(post_delete, sender=ArchivedIncident, dispatch_uid='archived_incident_deleted')
+def archived_incident_deleted(sender, instance, **kwargs):
+    # Same bookkeeping as incident_deleted (e.g. a reporter's account being
+    # removed): archived rows still count in the rollup and hold media.
+    stats.record_change(_stats_key(instance.category, instance.status), None)
+    _release_media([getattr(instance, name).name for name in Incident.MEDIA_FIELDS if getattr(instance, name)])
+    transaction.on_commit(caching.invalidate)
+    incident_id = instance.pk
+    transaction.on_commit(lambda: pdf.invalidate(incident_id))
+# --- Profile changes (role, area) alter what cached pages show ---
+@receiver(post_save, sender=Profile, dispatch_uid='profile_saved')
+@receiver(post_delete, sender=Profile, dispatch_uid='profile_deleted')
+def profile_changed(sender, **kwargs):
+    transaction.on_commit(caching.invalidate)
+
+
+# --- Persistent database connections: drop dead ones before each request ---
+request_started.connect(routers.check_connections, dispatch_uid='check_db_connections')
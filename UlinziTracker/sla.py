@@ -0,0 +1,164 @@
+import math
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import IncidentTransition, LatencyBucket
+
+
+# ---------------------------
+# Response-time SLA histograms
+# ---------------------------
+# Latencies fall into log-spaced buckets (each 25% wider than the last, from
+# one minute to about a year), so a percentile read is a walk over at most
+# BUCKETS counters per key and is never more than one bucket width off.
+
+FIRST_BOUND = 60.0          # seconds
+GROWTH = 1.25
+BUCKETS = 60
+PERCENTILES = (50, 90, 99)
+
+
+def bucket_for(seconds):
+    if seconds <= FIRST_BOUND:
+        return 0
+    return min(int(math.ceil(math.log(seconds / FIRST_BOUND, GROWTH))), BUCKETS - 1)
+
+
+def upper_bound(bucket):
+    return FIRST_BOUND * GROWTH ** bucket
+
+
+# --- Writing ---
+def _bump(metric, dimension, key, bucket, delta=1):
+    rows = LatencyBucket.objects.filter(metric=metric, dimension=dimension, key=key, bucket=bucket)
+    if rows.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            LatencyBucket.objects.create(metric=metric, dimension=dimension, key=key, bucket=bucket, count=delta)
+    except IntegrityError:
+        rows.update(count=F('count') + delta)
+
+
+def record_latency(metric, category, officer_id, elapsed):
+    bucket = bucket_for(elapsed.total_seconds())
+    _bump(metric, 'category', category, bucket)
+    if officer_id:
+        _bump(metric, 'officer', str(officer_id), bucket)
+
+
+def record_latencies(metric, entries):
+    """Add many ``(category, officer_id, elapsed)`` latencies with one write per bucket."""
+    deltas = defaultdict(int)
+    for category, officer_id, elapsed in entries:
+        bucket = bucket_for(elapsed.total_seconds())
+        deltas[('category', category, bucket)] += 1
+        if officer_id:
+            deltas[('officer', str(officer_id), bucket)] += 1
+    for (dimension, key, bucket), delta in deltas.items():
+        _bump(metric, dimension, key, bucket, delta)
+
+
+def transition(incident, from_status, to_status, actor_id=None, at=None):
+    """Build (unsaved) the transition row for one status change of ``incident``."""
+    at = at or timezone.now()
+    return IncidentTransition(
+        incident_id=incident.pk,
+        from_status=from_status or '',
+        to_status=to_status,
+        category=incident.category,
+        actor_id=actor_id,
+        at=at,
+        elapsed=at - incident.time_reported,
+    )
+
+
+def actor_id(incident):
+    # Views set ``incident._actor = request.user`` before saving a status change.
+    actor = getattr(incident, '_actor', None)
+    return actor.pk if getattr(actor, 'is_authenticated', False) else None
+
+
+def record(incident, from_status, actor_id=None):
+    """Log a status change of a saved ``incident`` and feed the histograms."""
+    row = transition(incident, from_status, incident.status, actor_id)
+    row.save()
+    officer_id = row.actor_id or incident.confirmed_by_id
+    if incident.response_time is not None and incident.loaded_value('response_time') is None:
+        record_latency('response', incident.category, officer_id, incident.response_time)
+    if incident.resolution_time is not None and incident.loaded_value('resolution_time') is None:
+        record_latency('resolution', incident.category, row.actor_id or officer_id, incident.resolution_time)
+    return row
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute every histogram from the transition log."""
+    counts = defaultdict(int)
+    seen = set()
+    rows = (IncidentTransition.objects.order_by('incident_id', 'at', 'id')
+            .values_list('incident_id', 'from_status', 'to_status', 'category', 'actor_id', 'elapsed')
+            .iterator(chunk_size=5000))
+    responders = {}
+    for incident_id, from_status, to_status, category, actor_id, elapsed in rows:
+        if from_status == 'pending' and ('response', incident_id) not in seen:
+            seen.add(('response', incident_id))
+            responders[incident_id] = actor_id
+            bucket = bucket_for(elapsed.total_seconds())
+            counts[('response', 'category', category, bucket)] += 1
+            if actor_id:
+                counts[('response', 'officer', str(actor_id), bucket)] += 1
+        if to_status == 'resolved' and ('resolution', incident_id) not in seen:
+            seen.add(('resolution', incident_id))
+            officer = actor_id or responders.get(incident_id)
+            bucket = bucket_for(elapsed.total_seconds())
+            counts[('resolution', 'category', category, bucket)] += 1
+            if officer:
+                counts[('resolution', 'officer', str(officer), bucket)] += 1
+    LatencyBucket.objects.all().delete()
+    LatencyBucket.objects.bulk_create(
+        LatencyBucket(metric=metric, dimension=dimension, key=key, bucket=bucket, count=n)
+        for (metric, dimension, key, bucket), n in counts.items()
+    )
+    return len(counts)
+
+
+# --- Reading ---
+def _percentiles(histogram):
+    total = sum(histogram.values())
+    result = {'count': total}
+    for percentile in PERCENTILES:
+        if not total:
+            result[f'p{percentile}'] = None
+            continue
+        rank = math.ceil(total * percentile / 100)
+        running = 0
+        for bucket in sorted(histogram):
+            running += histogram[bucket]
+            if running >= rank:
+                result[f'p{percentile}'] = round(upper_bound(bucket))
+                break
+    return result
+
+
+def report():
+    """p50/p90/p99 (seconds) of response and resolution per category and officer."""
+    histograms = defaultdict(dict)
+    for metric, dimension, key, bucket, n in LatencyBucket.objects.filter(count__gt=0).values_list(
+            'metric', 'dimension', 'key', 'bucket', 'count'):
+        histograms[(metric, dimension, key)][bucket] = n
+
+    officer_ids = {int(key) for (_, dimension, key) in histograms if dimension == 'officer'}
+    names = dict(User.objects.filter(pk__in=officer_ids).values_list('pk', 'username'))
+
+    result = {metric: {'category': {}, 'officer': {}} for metric, _ in LatencyBucket.METRIC_CHOICES}
+    for (metric, dimension, key), histogram in sorted(histograms.items()):
+        entry = _percentiles(histogram)
+        if dimension == 'officer':
+            entry['username'] = names.get(int(key))
+        result[metric][dimension][key] = entry
+    return result
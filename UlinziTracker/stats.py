@@ -0,0 +1,95 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import ArchivedIncident, Incident, IncidentStat
+
+
+# ---------------------------
+# Rollup maintenance
+# ---------------------------
+def adjust(category, status, delta):
+    """Add ``delta`` to the (category, status) bucket, creating it if needed."""
+    if not delta:
+        return
+    bucket = IncidentStat.objects.filter(category=category, status=status)
+    if bucket.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            IncidentStat.objects.create(category=category, status=status, count=delta)
+    except IntegrityError:
+        # Another request created the bucket between our update and insert.
+        bucket.update(count=F('count') + delta)
+
+
+def record_change(old_key, new_key):
+    # Keys are (category, status) tuples; None means "did not exist".
+    if old_key == new_key:
+        return
+    if old_key is not None:
+        adjust(*old_key, -1)
+    if new_key is not None:
+        adjust(*new_key, 1)
+
+
+def actual_counts():
+    # Archived incidents still count (see archive.py).
+    counts = {}
+    for model in (Incident, ArchivedIncident):
+        for category, status, n in model.objects.values_list('category', 'status').annotate(n=Count('id')).order_by():
+            counts[(category, status)] = counts.get((category, status), 0) + n
+    return counts
+
+
+def rollup_counts():
+    rows = IncidentStat.objects.values_list('category', 'status', 'count')
+    return {(category, status): n for category, status, n in rows if n}
+
+
+def drift():
+    """Return [(category, status, expected, stored)] for buckets that disagree."""
+    expected = actual_counts()
+    stored = rollup_counts()
+    return sorted(
+        (category, status, expected.get((category, status), 0), stored.get((category, status), 0))
+        for category, status in set(expected) | set(stored)
+        if expected.get((category, status), 0) != stored.get((category, status), 0)
+    )
+
+
+@transaction.atomic
+def rebuild():
+    IncidentStat.objects.all().delete()
+    IncidentStat.objects.bulk_create(
+        IncidentStat(category=category, status=status, count=n)
+        for (category, status), n in actual_counts().items()
+    )
+
+
+# ---------------------------
+# Reading the rollup
+# ---------------------------
+def snapshot():
+    """Totals and the per-category breakdown used by the statistics page."""
+    per_category = {}
+    totals = {}
+    for category, status, n in IncidentStat.objects.values_list('category', 'status', 'count'):
+        row = per_category.setdefault(category, {
+            'category': category, 'total': 0, 'resolved': 0, 'pending': 0, 'inprogress': 0,
+        })
+        row['total'] += n
+        if status == 'resolved':
+            row['resolved'] += n
+        elif status == 'pending':
+            row['pending'] += n
+        elif status == 'in_progress':
+            row['inprogress'] += n
+        totals[status] = totals.get(status, 0) + n
+
+    return {
+        'total': sum(totals.values()),
+        'pending': totals.get('pending', 0),
+        'resolved': totals.get('resolved', 0),
+        'inprogress': totals.get('in_progress', 0),
+        'dataset': [per_category[c] for c in sorted(per_category) if per_category[c]['total']],
+    }
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.fields.files import FieldFile, ImageFieldFile
+
+
+# ---------------------------
+# Content-addressed media storage
+# ---------------------------
+# Uploads are hashed while they are copied to a temporary file and then kept
+# once as blobs/<aa>/<bb>/<sha256><ext>. Saving identical content again only
+# bumps the MediaBlob reference count, inside the caller's transaction so a
+# rolled-back save takes its reference with it; storing content over a field
+# that already holds it takes no new reference. delete() drops a reference;
+# the last one leaves a refs=0 row, and the file is unlinked after commit
+# while that row is locked, so a concurrent save of the same content either
+# revives the row first or waits and writes the file again. Names written
+# before this storage existed (incident_images/... etc.) are still read and
+# deleted as plain files.
+
+BLOB_DIR = 'blobs'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def save(self, name, content, max_length=None, current=None):
+        """Store ``content``; ``current`` is the name the field holds now, if any."""
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        return self._save(self.get_available_name(name, max_length=max_length), content, current)
+
+    def _save(self, name, content, current=None):
+        from .models import MediaBlob
+
+        blob_root = os.path.join(self.location, BLOB_DIR)
+        os.makedirs(blob_root, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        handle, tmp_path = tempfile.mkstemp(dir=blob_root, suffix='.upload')
+        try:
+            with os.fdopen(handle, 'wb') as tmp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            digest = digest.hexdigest()
+            extension = os.path.splitext(name)[1].lower()
+            blob_name = f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+            # Joins the caller's transaction; the row lock is held until it ends.
+            with transaction.atomic(savepoint=False):
+                blob, _ = MediaBlob.objects.select_for_update().get_or_create(
+                    digest=digest, defaults={'name': blob_name, 'size': size},
+                )
+                if blob.name != current:
+                    MediaBlob.objects.filter(pk=digest).update(refs=F('refs') + 1)
+
+                path = self.path(blob.name)
+                if os.path.exists(path):
+                    os.remove(tmp_path)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return blob.name
+
+    def delete(self, name):
+        from .models import MediaBlob
+
+        if not name:
+            return
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                super().delete(name)
+                return
+            MediaBlob.objects.filter(pk=blob.pk).update(refs=F('refs') - 1)
+            if blob.refs <= 1:
+                transaction.on_commit(lambda: self.purge(blob.pk))
+
+    def purge(self, digest):
+        """Remove an unreferenced blob and its file, unless it was saved again meanwhile."""
+        from .models import MediaBlob
+
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(pk=digest, refs__lte=0).first()
+            if blob is None:
+                return
+            super().delete(blob.name)
+            blob.delete()
+
+    def retain(self, name):
+        """Add a reference to an existing blob, e.g. when copying a field value."""
+        from .models import MediaBlob
+
+        MediaBlob.objects.filter(name=name).update(refs=F('refs') + 1)
+
+
+# --- Model fields ---
+class _BlobFieldFileMixin:
+    def save(self, name, content, save=True):
+        # As FieldFile.save, but tells the storage what the row holds already.
+        name = self.field.generate_filename(self.instance, name)
+        self.name = self.storage.save(name, content, max_length=self.field.max_length,
+                                      current=self.instance.loaded_value(self.field.attname))
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = True
+        if save:
+            self.instance.save()
+    save.alters_data = True
+
+
+class BlobFieldFile(_BlobFieldFileMixin, FieldFile):
+    pass
+
+
+class BlobImageFieldFile(_BlobFieldFileMixin, ImageFieldFile):
+    pass
+
+
+class BlobFileField(models.FileField):
+    """FileField for Incident media; the model must provide loaded_value()."""
+    attr_class = BlobFieldFile
+
+
+class BlobImageField(models.ImageField):
+    attr_class = BlobImageFieldFile
+
+
+_media_storage = ContentAddressedStorage()
+
+
+def media_storage():
+    return _media_storage
@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMultiAlternatives
+from django.template import loader
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from . import archive, geo, images, pdf, uploads
+from .jobs import job
+from .models import Incident, Job, UploadSession
+
+
+# ---------------------------
+# Background job functions
+# ---------------------------
+@job(queue='media')
+def generate_image_derivatives(incident_id):
+    images.generate(incident_id)
+
+
+@job(queue='pdf', priority=-10)
+def warm_incident_pdf(incident_id):
+    # Render ahead of time so the next pdf_view is served from the cache.
+    incident = Incident.objects.select_related('reporter').filter(pk=incident_id).first()
+    if incident is not None:
+        handle, _, _ = pdf.open_rendition(pdf.incident_payload(incident))
+        handle.close()
+
+
+@job(queue='uploads', priority=10)
+def assemble_upload(session_id):
+    session = UploadSession.objects.select_related('incident').filter(
+        pk=session_id, completed_at__isnull=True,
+    ).first()
+    if session is not None:
+        uploads.assemble(session)
+
+
+@job(queue='mail', max_attempts=5)
+def send_email(subject, body, from_email, to, html_body=None):
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html_body:
+        message.attach_alternative(html_body, 'text/html')
+    message.send()
+
+
+@job(queue='mail', max_attempts=5)
+def send_password_reset(user_id, to_email, subject_template_name, email_template_name,
+                        html_email_template_name=None, from_email=None, domain='', site_name='', protocol='https'):
+    # Rendered here so the token exists only in the sent message.
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return
+    context = {
+        'email': to_email,
+        'domain': domain,
+        'site_name': site_name,
+        'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+        'user': user,
+        'token': default_token_generator.make_token(user),
+        'protocol': protocol,
+    }
+    subject = ''.join(loader.render_to_string(subject_template_name, context).splitlines())
+    body = loader.render_to_string(email_template_name, context)
+    html_body = None
+    if html_email_template_name is not None:
+        html_body = loader.render_to_string(html_email_template_name, context)
+    send_email(subject, body, from_email, [to_email], html_body=html_body)
+
+
+@job(queue='default', priority=-5)
+def refresh_hotspots(reschedule=True):
+    geo.refresh_hotspots()
+    if reschedule and not Job.objects.filter(name='refresh_hotspots', status='queued').exists():
+        minutes = getattr(settings, 'GEO_HOTSPOT_REFRESH_MINUTES', 15)
+        refresh_hotspots.enqueue(reschedule=True, delay=timedelta(minutes=minutes))
+
+
+@job(queue='default', priority=-10)
+def archive_incidents(reschedule=True):
+    archive.archive()
+    if reschedule and not Job.objects.filter(name='archive_incidents', status='queued').exists():
+        hours = getattr(settings, 'ARCHIVE_INTERVAL_HOURS', 24)
+        archive_incidents.enqueue(reschedule=True, delay=timedelta(hours=hours))
@@ -1,3 +1,1286 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection, connections
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+from PIL import Image
+
+from . import (
+    analytics, api, archive, benchmark, caching, events, export, geo, importer, jobs, media, metrics, pagination, pdf,
+    routers, search, seed, sla, stats, uploads, views,
+)
+from .forms import QueuedPasswordResetForm
+from .management.commands.run_jobs import Command as RunJobsCommand
+from .models import (
+    ArchivedIncident, HotspotCell, Incident, IncidentTransition, Job, LatencyBucket, MediaBlob, Profile,
+    UploadSession,
+)
+from .storage import media_storage
+
+
+def make_user(username, role):
+    user = User.objects.create_user(username, password='pass12345')
+    user.profile.role = role
+    user.profile.save()
+    return user
+
+
+# ---------------------------
+# Keyset-paginated incident lists
+# ---------------------------
+@override_settings(INCIDENTS_PER_PAGE=2)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        resident = make_user('resident', 'resident')
+        now = timezone.now()
+        for n in range(5):
+            incident = Incident.objects.create(reporter=resident, title=f'Gate {n}', description='d')
+            Incident.objects.filter(pk=incident.pk).update(time_reported=now - timedelta(hours=n))
+        self.client.force_login(make_user('officer', 'officer'))
+        self.url = reverse('UlinziTracker:incident_list')
+
+    def page(self, query=''):
+        response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, 200)
+        page = response.context['page']
+        return [incident.title for incident in page], page
+
+    def test_pages_forward_and_back(self):
+        titles, first = self.page()
+        self.assertEqual((titles, first.has_previous), (['Gate 0', 'Gate 1'], False))
+        titles, second = self.page(first.next_url)
+        self.assertEqual(titles, ['Gate 2', 'Gate 3'])
+        titles, third = self.page(second.next_url)
+        self.assertEqual((titles, third.has_next), (['Gate 4'], False))
+
+        titles, back = self.page(third.previous_url)
+        self.assertEqual(titles, ['Gate 2', 'Gate 3'])
+        self.assertTrue(back.has_previous)
+        titles, newest = self.page(back.previous_url)
+        self.assertEqual((titles, newest.has_previous), (['Gate 0', 'Gate 1'], False))
+        self.assertTrue(newest.has_next)
+
+    def test_bad_cursors_fall_back_to_the_first_page(self):
+        naive = pagination.encode_cursor(Incident(pk=1, time_reported=timezone.now().replace(tzinfo=None)))
+        huge = base64.urlsafe_b64encode(f'{timezone.now().isoformat()}|{10 ** 30}'.encode()).decode()
+        for token in ('garbage', '%%%', 'w6k', 'bm90fGE', naive, huge, 'é'):
+            for direction in ('after', 'before'):
+                with self.subTest(token=token, direction=direction):
+                    titles, page = self.page('?' + urlencode({direction: token}))
+                    self.assertEqual(titles, ['Gate 0', 'Gate 1'])
+
+
+# ---------------------------
+# Query plan regression checks
+# ---------------------------
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN parsing is SQLite specific')
+class IncidentQueryPlanTests(TestCase):
+    # A bare "SCAN <incident table>" (no USING INDEX) is a full table scan.
+    FULL_SCAN = re.compile(r'^SCAN (TABLE )?"?%s"?( AS \w+)?$' % re.escape(Incident._meta.db_table))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.resident = make_user('resident', 'resident')
+        cls.officer = make_user('officer', 'officer')
+        cls.chief = make_user('chief', 'chief')
+        statuses = [s for s, _ in Incident.STATUS_CHOICES]
+        categories = [c for c, _ in Incident.CATEGORY_CHOICES]
+        for i in range(40):
+            Incident.objects.create(
+                reporter=cls.resident,
+                title=f'Incident {i}',
+                description='Test incident',
+                status=statuses[i % len(statuses)],
+                category=categories[i % len(categories)],
+            )
+
+    def setUp(self):
+        # The view cache would otherwise answer repeat requests without SQL.
+        cache.clear()
+
+    def incident_queries(self, user, url_name):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        quoted = '"%s"' % Incident._meta.db_table
+        return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT') and quoted in q['sql']]
+
+    def assert_no_full_scan(self, user, url_name):
+        table = Incident._meta.db_table
+        checked = 0
+        for sql in self.incident_queries(user, url_name):
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = [row[-1] for row in cursor.fetchall()]
+            checked += 1
+            for step in plan:
+                self.assertIsNone(
+                    self.FULL_SCAN.match(step),
+                    f'{url_name} does a full scan of {table}:\n{sql}\n{plan}',
+                )
+        self.assertGreater(checked, 0, f'{url_name} ran no incident queries')
+
+    def test_officer_lists(self):
+        for url_name in ('UlinziTracker:incident_list', 'UlinziTracker:allincidents',
+                         'UlinziTracker:pending_incidents', 'UlinziTracker:resolved_incidents'):
+            with self.subTest(url_name=url_name):
+                self.assert_no_full_scan(self.officer, url_name)
+
+    def test_resident_lists(self):
+        for url_name in ('UlinziTracker:incident_list', 'UlinziTracker:pending_incidents',
+                         'UlinziTracker:resolved_incidents', 'UlinziTracker:dashboard'):
+            with self.subTest(url_name=url_name):
+                self.assert_no_full_scan(self.resident, url_name)
+
+    def test_statistics_reads_rollup_only(self):
+        self.assertEqual(self.incident_queries(self.chief, 'UlinziTracker:incidentStats'), [])
+
+
+# ---------------------------
+# Incident statistics rollup
+# ---------------------------
+class StatsRollupTests(TestCase):
+    def setUp(self):
+        self.resident = make_user('resident', 'resident')
+        self.incident = Incident.objects.create(reporter=self.resident, title='Gate', description='d')
+
+    def incident_selects(self, save):
+        table = '"%s"' % Incident._meta.db_table
+        with CaptureQueriesContext(connection) as queries:
+            save()
+        return [q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT') and table in q['sql']]
+
+    def test_saving_a_loaded_incident_does_not_reread_it(self):
+        incident = Incident.objects.get(pk=self.incident.pk)
+        incident.status = 'confirmed'
+        self.assertEqual(self.incident_selects(incident.save), [])
+        incident.document = 'incident_docs/notes.txt'
+        self.assertEqual(self.incident_selects(lambda: incident.save(update_fields=['document'])), [])
+        self.assertEqual(stats.drift(), [])
+
+    def test_partial_or_hand_built_instances_read_what_is_missing(self):
+        partial = Incident.objects.only('pk', 'reporter', 'status').get(pk=self.incident.pk)
+        partial.status = 'confirmed'
+        partial.save()
+        self.assertEqual(stats.drift(), [])
+
+        by_hand = Incident(pk=self.incident.pk, reporter=self.resident, title='Gate', description='d',
+                           category=self.incident.category, status='resolved',
+                           time_reported=self.incident.time_reported)
+        by_hand.save()
+        self.assertEqual(stats.drift(), [])
+        self.assertEqual(stats.snapshot()['resolved'], 1)
+
+
+# ---------------------------
+# Role-aware view cache
+# ---------------------------
+class ViewCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.officer = make_user('officer', 'officer')
+        self.client.force_login(self.officer)
+
+    def test_incident_write_invalidates_cached_list(self):
+        resident = make_user('resident', 'resident')
+        Incident.objects.create(reporter=resident, title='Broken gate', description='d')
+        url = reverse('UlinziTracker:incident_list')
+        self.assertContains(self.client.get(url), 'Broken gate')
+        with self.captureOnCommitCallbacks(execute=True):
+            Incident.objects.create(reporter=resident, title='Street light out', description='d')
+        self.assertContains(self.client.get(url), 'Street light out')
+
+    def test_profile_change_invalidates_cached_entries(self):
+        before = caching.generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.officer.profile.location = 'Kibera'
+            self.officer.profile.save()
+        self.assertGreater(caching.generation(), before)
+
+    def test_private_roles_are_scoped_per_user(self):
+        first, second = make_user('first', 'authority'), make_user('second', 'authority')
+        self.assertNotEqual(caching.scope_for(first), caching.scope_for(second))
+        self.assertEqual(caching.scope_for(self.officer), 'officer')
+
+    def test_lookups_are_counted_without_cache_writes(self):
+        caching.generation()
+        before = caching.counters()
+        with mock.patch.object(cache, 'incr') as incr, mock.patch.object(cache, 'set', wraps=cache.set) as store:
+            caching.cached('test', self.officer, lambda: 1)
+            self.assertEqual(caching.cached('test', self.officer, lambda: 2), 1)
+        after = caching.counters()
+        self.assertEqual((after['hits'] - before['hits'], after['misses'] - before['misses']), (1, 1))
+        incr.assert_not_called()
+        self.assertEqual(store.call_count, 1)
+
+
+# ---------------------------
+# Bulk PDF export
+# ---------------------------
+class PdfExportTests(TestCase):
+    def setUp(self):
+        resident = make_user('resident', 'resident')
+        for i in range(3):
+            Incident.objects.create(reporter=resident, title=f'Gate {i}', description='d')
+        self.client.force_login(make_user('officer', 'officer'))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = Path(directory.name)
+        settings_override = self.settings(PDF_CACHE_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_combined_pdf(self):
+        response = self.client.get(reverse('UlinziTracker:export_pdfs'), {'format': 'pdf'})
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        response.close()
+
+    def test_rendition_etag_follows_content_and_revalidates(self):
+        incident = Incident.objects.first()
+        url = reverse('UlinziTracker:pdf_view', args=[incident.pk])
+        first = self.client.get(url)
+        self.assertTrue(b''.join(first.streaming_content).startswith(b'%PDF'))
+        first.close()
+        etag = first['ETag']
+        self.assertEqual(etag, f'"{pdf.content_version(pdf.incident_payload(incident))}"')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        incident.description = 'Gate left open all night'
+        incident.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+        changed.close()
+
+    def test_eviction_drops_least_recently_served(self):
+        for age, name in enumerate(['incident_1_new.pdf', 'incident_2_mid.pdf', 'incident_3_old.pdf']):
+            path = self.cache_dir / name
+            path.write_bytes(b'x' * 100)
+            os.utime(path, (time.time() - age * 60, time.time()))
+        pdf.evict(max_bytes=150)
+        self.assertEqual(sorted(path.name for path in self.cache_dir.iterdir()), ['incident_1_new.pdf'])
+
+    def test_failed_render_leaves_no_temporary_file(self):
+        payload = pdf.incident_payload(Incident.objects.first())
+        with mock.patch.object(pdf, 'render_incident', side_effect=RuntimeError('boom')):
+            self.assertRaises(RuntimeError, pdf.open_rendition, payload)
+        self.assertEqual(list(self.cache_dir.iterdir()), [])
+
+    def test_combined_pdf_is_capped(self):
+        with self.settings(PDF_COMBINED_MAX_INCIDENTS=2):
+            response = self.client.get(reverse('UlinziTracker:export_pdfs'), {'format': 'pdf'})
+        self.assertContains(response, 'limited to 2 incidents')
+
+
+# ---------------------------
+# Chunked, resumable uploads
+# ---------------------------
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = self.settings(MEDIA_ROOT=directory.name, UPLOAD_PARTS_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.resident = make_user('resident', 'resident')
+        self.incident = Incident.objects.create(reporter=self.resident, title='Gate', description='d')
+        self.client.force_login(self.resident)
+
+    def start(self, field, filename, size):
+        response = self.client.post(reverse('UlinziTracker:upload_start'),
+                                    {'incident': self.incident.pk, 'field': field, 'filename': filename, 'size': size})
+        self.assertEqual(response.status_code, 201)
+        return reverse('UlinziTracker:upload_chunk', args=[response.json()['id']])
+
+    def put(self, url, data, start, total):
+        return self.client.put(url, data, content_type='application/octet-stream',
+                               HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(data) - 1}/{total}')
+
+    def test_resume_offset_mismatch_and_assembly(self):
+        url = self.start('document', 'notes.txt', 8)
+        self.assertEqual(self.put(url, b'abcd', 0, 8).json()['offset'], 4)
+        self.assertEqual(self.client.get(url).json()['offset'], 4)
+
+        # A retried chunk for an offset already written is refused.
+        response = self.put(url, b'abcd', 0, 8)
+        self.assertEqual((response.status_code, response.json()['offset']), (409, 4))
+
+        self.assertEqual(self.put(url, b'efgh', 4, 8).status_code, 202)
+        uploads.assemble(UploadSession.objects.select_related('incident').get())
+        self.incident.refresh_from_db()
+        with self.incident.document.open('rb') as document:
+            self.assertEqual(document.read(), b'abcdefgh')
+        self.assertTrue(self.client.get(url).json()['complete'])
+
+    def test_overlapping_appends_do_not_interleave(self):
+        url = self.start('document', 'notes.txt', 8)
+        session = UploadSession.objects.get()
+        overlapping, test = [], self
+
+        class SlowClient(io.BytesIO):
+            # While the first PUT is still reading its body, a retry of the
+            # same chunk arrives.
+            def read(self, size=-1):
+                if not overlapping:
+                    overlapping.append(self)
+                    with test.assertRaises(uploads.UploadBusy):
+                        uploads.append_chunk(session, io.BytesIO(b'abcd'), 0, 4)
+                return super().read(size)
+
+        self.assertEqual(uploads.append_chunk(session, SlowClient(b'abcd'), 0, 4), 4)
+        self.assertEqual(uploads.part_path(session).read_bytes(), b'abcd')
+        response = self.put(url, b'abcd', 0, 8)
+        self.assertEqual((response.status_code, response.json()['offset']), (409, 4))
+
+    def test_assembly_runs_form_validation(self):
+        url = self.start('image', 'photo.jpg', 8)
+        response = self.put(url, b'not jpeg', 0, 8)
+        self.assertEqual((response.status_code, response.json()['offset']), (400, 0))
+        # The worker checks again, whatever put the part file in place.
+        session = UploadSession.objects.select_related('incident').get()
+        uploads.part_path(session).write_bytes(b'not jpeg')
+        self.assertRaises(uploads.UploadError, uploads.assemble, session)
+        self.incident.refresh_from_db()
+        self.assertFalse(self.incident.image)
+
+
+# ---------------------------
+# Image derivatives
+# ---------------------------
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = self.settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.resident = make_user('resident', 'resident')
+        buffer = io.BytesIO()
+        Image.new('RGB', (2000, 1000), 'red').save(buffer, format='JPEG')
+        self.incident = Incident(reporter=self.resident, title='Gate', description='d')
+        self.incident.image = ContentFile(buffer.getvalue(), name='gate.jpg')
+        self.incident.save()
+        self.client.force_login(self.resident)
+
+    def fetch(self, variant):
+        response = self.client.get(reverse('UlinziTracker:incident_image', args=[self.incident.pk, variant]))
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content)
+        return response, Image.open(io.BytesIO(body)).size
+
+    def test_saved_image_gets_thumb_and_web_variants(self):
+        # Until the job has run, every variant is the original.
+        self.assertEqual(self.fetch('thumb')[1], (2000, 1000))
+        job_row = jobs.claim(['media'])
+        self.assertEqual((job_row.name, job_row.args), ('generate_image_derivatives', [self.incident.pk]))
+        self.assertTrue(jobs.run(job_row), Job.objects.get(pk=job_row.pk).last_error)
+
+        self.incident.refresh_from_db()
+        names = {self.incident.image.name, self.incident.image_thumbnail.name, self.incident.image_web.name}
+        self.assertEqual(len(names), 3)
+        response, size = self.fetch('thumb')
+        self.assertEqual(size, (320, 160))
+        self.assertTrue(response['Content-Disposition'].startswith('inline;'))
+        self.assertEqual(self.fetch('web')[1], (1280, 640))
+        response, size = self.fetch('original')
+        self.assertEqual(size, (2000, 1000))
+        self.assertTrue(response['Content-Disposition'].startswith('attachment;'))
+
+    def test_unknown_variant_is_404(self):
+        response = self.client.get(reverse('UlinziTracker:incident_image', args=[self.incident.pk, 'huge']))
+        self.assertEqual(response.status_code, 404)
+
+
+# ---------------------------
+# Content-addressed media storage
+# ---------------------------
+class BlobStorageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = self.settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.resident = make_user('resident', 'resident')
+
+    def report(self, content):
+        incident = Incident(reporter=self.resident, title='Gate', description='d')
+        incident.document = ContentFile(content, name='note.txt')
+        incident.save()
+        return incident
+
+    def test_identical_uploads_share_one_blob(self):
+        first, second = self.report(b'same'), self.report(b'same')
+        self.assertEqual(first.document.name, second.document.name)
+        self.assertEqual(MediaBlob.objects.get().refs, 2)
+        self.assertTrue(media_storage().exists(first.document.name))
+
+    def test_resaving_identical_content_takes_no_reference(self):
+        incident = self.report(b'same')
+        incident.document = ContentFile(b'same', name='again.txt')
+        incident.save()
+        self.assertEqual(MediaBlob.objects.get().refs, 1)
+
+    def test_last_release_removes_file_after_commit(self):
+        name = self.report(b'same').document.name
+        self.report(b'same')
+        media_storage().delete(name)
+        self.assertEqual(MediaBlob.objects.get().refs, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            media_storage().delete(name)
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(media_storage().exists(name))
+
+    def test_blob_saved_again_before_purge_is_kept(self):
+        name = self.report(b'same').document.name
+        with self.captureOnCommitCallbacks() as purge:
+            media_storage().delete(name)
+        self.report(b'same')
+        for callback in purge:
+            callback()
+        self.assertEqual(MediaBlob.objects.get().refs, 1)
+        self.assertTrue(media_storage().exists(name))
+
+
+# ---------------------------
+# Media Range requests
+# ---------------------------
+class MediaRangeTests(SimpleTestCase):
+    def test_parse_range(self):
+        self.assertEqual(media.parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(media.parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(media.parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(media.parse_range('bytes=-5000', 1000), (0, 999))
+        self.assertEqual(media.parse_range('bytes=990-5000', 1000), (990, 999))
+        # Multi-range and malformed headers get the whole file.
+        self.assertIsNone(media.parse_range('bytes=0-1,5-6', 1000))
+        self.assertIsNone(media.parse_range('items=0-1', 1000))
+        self.assertIsNone(media.parse_range(None, 1000))
+
+    def test_unsatisfiable_ranges(self):
+        for header, size in (('bytes=1000-', 1000), ('bytes=-0', 1000), ('bytes=5-2', 1000),
+                             ('bytes=-1', 0), ('bytes=0-', 0)):
+            with self.subTest(header=header, size=size):
+                self.assertRaises(media.RangeNotSatisfiable, media.parse_range, header, size)
+
+    def test_content_disposition_is_encoded(self):
+        def disposition(name):
+            return media._disposition(ContentFile(b'', name=name), as_attachment=True)
+        self.assertEqual(disposition('clip.mp4'), 'attachment; filename="clip.mp4"')
+        self.assertEqual(disposition('say "hi".mp4'), r'attachment; filename="say \"hi\".mp4"')
+        self.assertEqual(disposition('sauti ya ñ.mp3'), "attachment; filename*=utf-8''sauti%20ya%20%C3%B1.mp3")
+
+
+# ---------------------------
+# Background jobs
+# ---------------------------
+@jobs.job(name='test_flaky', queue='test', max_attempts=2)
+def flaky():
+    raise RuntimeError('boom')
+
+
+@jobs.job(name='test_noop', queue='test')
+def noop(*args, **kwargs):
+    pass
+
+
+class JobQueueTests(TestCase):
+    def test_claim_takes_highest_priority_runnable_job(self):
+        low = jobs.enqueue('test_noop', 'low')
+        high = jobs.enqueue('test_noop', 'high', priority=5)
+        jobs.enqueue('test_noop', 'later', priority=10, delay=timedelta(hours=1))
+        self.assertEqual(jobs.claim(['test']).pk, high.pk)
+        self.assertEqual(jobs.claim(['test']).pk, low.pk)
+        self.assertIsNone(jobs.claim(['test']))
+        self.assertIsNone(jobs.claim(['other']))
+
+    def test_failed_job_backs_off_then_gives_up(self):
+        jobs.enqueue('test_flaky')
+        with self.assertLogs('UlinziTracker.jobs', 'WARNING'):
+            self.assertFalse(jobs.run(jobs.claim(['test'])))
+        row = Job.objects.get()
+        self.assertEqual((row.status, row.attempts), ('queued', 1))
+        self.assertGreater(row.run_after, timezone.now() + timedelta(seconds=20))
+        self.assertIsNone(jobs.claim(['test']))
+
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs('UlinziTracker.jobs', 'WARNING'):
+            self.assertFalse(jobs.run(jobs.claim(['test'])))
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ('failed', 2))
+        self.assertIn('boom', row.last_error)
+
+    def test_only_jobs_with_an_expired_lease_are_requeued(self):
+        jobs.enqueue('test_noop')
+        jobs.claim(['test'])
+        # Long running but still renewed: left alone.
+        Job.objects.update(started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(), 0)
+        Job.objects.update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(Job.objects.get().status, 'queued')
+
+    def test_heartbeat_renews_the_lease_while_running(self):
+        jobs.enqueue('test_noop')
+        row = jobs.claim(['test'])
+        renewed, started = [], timezone.now()
+
+        def update(queryset, **values):
+            renewed.append(values['lease_expires_at'])
+            heartbeat.stopped.set()
+            return 1
+
+        with self.settings(JOB_LEASE_SECONDS=0.03), mock.patch.object(QuerySet, 'update', update):
+            heartbeat = jobs._Heartbeat(row.pk)
+            heartbeat.start()
+            heartbeat.join(5)
+        self.assertEqual(len(renewed), 1)
+        self.assertGreater(renewed[0], started)
+
+    def test_once_drains_the_queue_when_slots_are_busy(self):
+        for n in range(3):
+            jobs.enqueue('test_noop', n)
+        command = RunJobsCommand()
+        command.slots = {'test': threading.BoundedSemaphore(1)}
+        command.once, command.poll, command.stopping = True, 0, threading.Event()
+        command.slots['test'].acquire()   # another thread is busy with a job
+        release = threading.Timer(0.05, command.slots['test'].release)
+        release.start()
+        with mock.patch('UlinziTracker.management.commands.run_jobs.close_old_connections'):
+            command.work()
+        release.join()
+        self.assertEqual(Job.objects.filter(status='done').count(), 3)
+
+    def test_queue_concurrency_limit(self):
+        command = RunJobsCommand()
+        command.slots = {'test': threading.BoundedSemaphore(1), 'other': threading.BoundedSemaphore(1)}
+        self.assertEqual(command._acquire(), ['test', 'other'])
+        command.slots['other'].release()
+        self.assertEqual(command._acquire(), ['other'])
+
+    def test_pdf_warmup_queued_once_after_commit(self):
+        resident = make_user('resident', 'resident')
+        with self.captureOnCommitCallbacks(execute=True):
+            incident = Incident.objects.create(reporter=resident, title='Gate', description='d')
+            incident.status = 'confirmed'
+            incident.save()
+            self.assertFalse(Job.objects.filter(name='warm_incident_pdf').exists())
+        self.assertEqual(Job.objects.filter(name='warm_incident_pdf', args=[incident.pk]).count(), 1)
+
+    def test_password_reset_token_is_not_stored(self):
+        user = make_user('resident', 'resident')
+        user.email = 'resident@example.com'
+        user.save()
+        with tempfile.TemporaryDirectory() as templates:
+            Path(templates, 'reset.txt').write_text('{{ uid }} {{ token }}')
+            engine = {'BACKEND': 'django.template.backends.django.DjangoTemplates',
+                      'DIRS': [templates], 'APP_DIRS': True}
+            with self.settings(TEMPLATES=[engine]):
+                form = QueuedPasswordResetForm({'email': user.email})
+                self.assertTrue(form.is_valid())
+                form.save(domain_override='testserver', email_template_name='reset.txt')
+                row = Job.objects.get(name='send_password_reset')
+                stored = [value for value in [*row.args, *row.kwargs.values()] if isinstance(value, str)]
+                self.assertFalse([value for value in stored if default_token_generator.check_token(user, value)])
+                self.assertTrue(jobs.run(jobs.claim(['mail'])), Job.objects.get().last_error)
+        token = mail.outbox[0].body.split()[1]
+        self.assertTrue(default_token_generator.check_token(user, token))
+
+
+# ---------------------------
+# Full-text search
+# ---------------------------
+@unittest.skipUnless(connection.vendor == 'sqlite', 'exercises the SQLite FTS5 index')
+class SearchTests(TestCase):
+    def test_index_follows_saves_and_deletes(self):
+        resident = make_user('resident', 'resident')
+        other = make_user('other', 'resident')
+        gate = Incident.objects.create(reporter=resident, title='Broken gate', description='Left open at night',
+                                       location='Kibera')
+        Incident.objects.create(reporter=other, title='Street light', description='Gate area is dark')
+
+        self.assertEqual([incident.pk for incident in search.search('gate')][0], gate.pk)
+        self.assertEqual(search.filter_matching(Incident.objects.all(), 'kibera').get(), gate)
+        self.assertEqual([pk for pk, _ in search.ranked_ids('gate', reporter_id=other.pk)],
+                         [Incident.objects.get(reporter=other).pk])
+        self.assertEqual(search.ranked_ids('"OR" NEAR('), [])
+
+        gate.title = 'Broken fence'
+        gate.description = 'Left open'
+        gate.save()
+        self.assertEqual(search.ranked_ids('fences'), [(gate.pk, mock.ANY)])
+        self.assertNotIn(gate.pk, [pk for pk, _ in search.ranked_ids('gate')])
+
+        gate.delete()
+        self.assertEqual(search.ranked_ids('fence'), [])
+
+
+# ---------------------------
+# Geohash cells and nearby search
+# ---------------------------
+class GeoTests(TestCase):
+    def test_encode_matches_reference_geohash(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geo.encode(-1.2921, 36.8219, 5), 'kzf0t')
+
+    def test_neighbours_are_the_surrounding_block(self):
+        self.assertEqual(geo.neighbours('ezs42'),
+                         {'ezefp', 'ezefr', 'ezefx', 'ezs40', 'ezs41', 'ezs42', 'ezs43', 'ezs48', 'ezs49'})
+
+    def test_neighbours_wrap_the_antimeridian(self):
+        cells = geo.neighbours(geo.encode(0.1, 179.99, 5))
+        self.assertTrue(any(geo.center(cell)[1] < 0 for cell in cells))
+
+    def test_near_filters_by_radius_and_orders_by_distance(self):
+        reporter = make_user('resident', 'resident')
+        for title, lat, lng in [('far', -1.2921, 36.8519), ('close', -1.2921, 36.8229),
+                                ('mid', -1.2921, 36.8319), ('other city', -4.0435, 39.6682)]:
+            Incident.objects.create(reporter=reporter, title=title, description='d',
+                                    latitude=lat, longitude=lng)
+        rows = geo.near(Incident.objects.all(), -1.2921, 36.8219, 2)
+        self.assertEqual([row.title for row in rows], ['close', 'mid'])
+        self.assertLess(rows[0].distance_km, rows[1].distance_km)
+
+    def test_near_applies_the_limit_in_sql(self):
+        reporter = make_user('resident', 'resident')
+        for i in range(5):
+            Incident.objects.create(reporter=reporter, title=f'gate {i}', description='d',
+                                    latitude=-1.2921, longitude=36.8219 + i * 0.001)
+        with CaptureQueriesContext(connection) as queries:
+            rows = geo.near(Incident.objects.all(), -1.2921, 36.8219, 1, limit=2)
+        self.assertEqual([row.title for row in rows], ['gate 0', 'gate 1'])
+        self.assertIn('LIMIT 2', queries.captured_queries[-1]['sql'])
+
+
+# ---------------------------
+# Incident trend analytics
+# ---------------------------
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        resident = make_user('resident', 'resident')
+        self.now = timezone.now()
+        for days, category, status in [(1, 'emergency', 'pending'), (1, 'other', 'pending'),
+                                       (3, 'other', 'resolved'), (3, 'emergency', 'resolved')]:
+            incident = Incident.objects.create(reporter=resident, title='Gate', description='d', category=category,
+                                               status=status, latitude=-1.2921, longitude=36.8219)
+            Incident.objects.filter(pk=incident.pk).update(time_reported=self.now - timedelta(days=days))
+        # The resolved pair moves to the archive table.
+        self.assertEqual(archive.archive(days=2), 2)
+
+    def test_trends_count_live_and_archived_incidents(self):
+        result = analytics.trends('7d', now=self.now)
+        self.assertEqual(result['total'], 4)
+        self.assertEqual(result['daily']['counts'][-4:], [2, 0, 2, 0])
+        self.assertEqual(result['status_totals']['pending'], 2)
+        self.assertEqual(result['status_totals']['resolved'], 2)
+        self.assertEqual(sum(result['daily_by_category']['other']), 2)
+        self.assertEqual(sum(map(sum, result['heatmap'])), 4)
+        self.assertEqual(sum(result['hourly']['counts']), 4)
+        self.assertEqual(analytics.trends('7d', category='emergency', now=self.now)['total'], 2)
+
+    def test_rolling_mean_waits_for_a_full_window(self):
+        self.assertEqual(analytics.rolling_mean(np.array([1, 2, 3, 6]), 3), [None, None, 2.0, 3.667])
+        self.assertEqual(analytics.rolling_mean(np.array([1]), 3), [None])
+
+    def test_hotspots_count_archived_incidents(self):
+        geo.refresh_hotspots(['7d'])
+        cells = HotspotCell.objects.filter(window='7d')
+        self.assertEqual(sum(cell.count for cell in cells), 4)
+        self.assertEqual({cell.category: cell.count for cell in cells}, {'emergency': 2, 'other': 2})
+
+
+# ---------------------------
+# Status transitions and SLA percentiles
+# ---------------------------
+class SlaTests(TestCase):
+    def buckets(self, metric):
+        return {(dimension, key): (bucket, count) for dimension, key, bucket, count in
+                LatencyBucket.objects.filter(metric=metric).values_list('dimension', 'key', 'bucket', 'count')}
+
+    def test_confirm_and_resolve_feed_histograms_and_log(self):
+        resident = make_user('resident', 'resident')
+        first, second = make_user('first', 'officer'), make_user('second', 'officer')
+        incident = Incident.objects.create(reporter=resident, title='Gate', description='d', category='other')
+        Incident.objects.filter(pk=incident.pk).update(time_reported=timezone.now() - timedelta(hours=2))
+
+        self.client.force_login(first)
+        self.client.post(reverse('UlinziTracker:confirm_incident', args=[incident.pk]), {'response_notes': 'On it'})
+        response_bucket = sla.bucket_for(2 * 3600)
+        self.assertEqual(self.buckets('response'), {('category', 'other'): (response_bucket, 1),
+                                                    ('officer', str(first.pk)): (response_bucket, 1)})
+
+        self.client.force_login(second)
+        self.client.get(reverse('UlinziTracker:resolve_incident', args=[incident.pk]))
+        resolution = self.buckets('resolution')
+        self.assertEqual(set(resolution), {('category', 'other'), ('officer', str(second.pk))})
+        self.assertEqual(resolution[('category', 'other')], (response_bucket, 1))
+
+        log = list(IncidentTransition.objects.filter(incident=incident).order_by('at', 'id')
+                   .values_list('from_status', 'to_status', 'actor_id'))
+        self.assertEqual(log, [('', 'pending', resident.pk), ('pending', 'confirmed', first.pk),
+                               ('confirmed', 'resolved', second.pk)])
+
+        # Rebuilding from the log gives the same histograms.
+        before = (self.buckets('response'), resolution)
+        sla.rebuild()
+        self.assertEqual((self.buckets('response'), self.buckets('resolution')), before)
+        report = sla.report()
+        self.assertEqual(report['response']['officer'][str(first.pk)]['username'], 'first')
+        self.assertEqual(report['response']['category']['other']['p50'], round(sla.upper_bound(response_bucket)))
+
+    def test_actor_is_only_an_authenticated_user(self):
+        incident = Incident(title='Gate')
+        self.assertIsNone(sla.actor_id(incident))
+        incident._actor = AnonymousUser()
+        self.assertIsNone(sla.actor_id(incident))
+        incident._actor = make_user('officer', 'officer')
+        self.assertEqual(sla.actor_id(incident), incident._actor.pk)
+
+    def test_buckets_are_log_spaced(self):
+        self.assertEqual(sla.bucket_for(30), 0)
+        self.assertEqual(sla.bucket_for(60), 0)
+        self.assertEqual(sla.bucket_for(61), 1)
+        self.assertEqual(sla.bucket_for(75), 1)
+        self.assertEqual(sla.bucket_for(10 ** 12), sla.BUCKETS - 1)
+
+
+# ---------------------------
+# Bulk confirm / resolve
+# ---------------------------
+class BulkActionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.officer = make_user('officer', 'officer')
+        resident = make_user('resident', 'resident')
+        cls.incidents = [Incident.objects.create(reporter=resident, title=f'Gate {i}', description='d')
+                         for i in range(3)]
+
+    def setUp(self):
+        self.client.force_login(self.officer)
+        self.url = reverse('UlinziTracker:bulk_incidents')
+
+    def post_json(self, payload):
+        return self.client.post(self.url, json.dumps(payload), content_type='application/json')
+
+    def test_confirm_reports_per_incident_results(self):
+        ids = [incident.pk for incident in self.incidents[:2]]
+        response = self.post_json({'action': 'confirm', 'ids': ids + [999999]})
+        body = response.json()
+        self.assertEqual(body['updated'], 2)
+        self.assertEqual([result['ok'] for result in body['results']], [True, True, False])
+        self.assertEqual(Incident.objects.filter(status='confirmed').count(), 2)
+        self.assertEqual(stats.drift(), [])
+
+    def test_malformed_json_is_rejected(self):
+        for payload in (['confirm'], 'confirm', {'action': 'confirm', 'ids': '12'}, {'action': 'confirm', 'ids': 12}):
+            with self.subTest(payload=payload):
+                self.assertEqual(self.post_json(payload).status_code, 400)
+        self.assertFalse(Incident.objects.filter(status='confirmed').exists())
+
+    def test_next_must_stay_on_site(self):
+        data = {'action': 'resolve', 'ids': [self.incidents[0].pk]}
+        response = self.client.post(self.url, {**data, 'next': '/incidents/'})
+        self.assertRedirects(response, '/incidents/', fetch_redirect_response=False)
+        for next_url in ('//evil.example/', '/\\evil.example', 'https://evil.example/'):
+            with self.subTest(next_url=next_url):
+                response = self.client.post(self.url, {**data, 'next': next_url})
+                self.assertEqual(response['Content-Type'], 'application/json')
+
+
+# ---------------------------
+# JSON API
+# ---------------------------
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.resident = make_user('resident', 'resident')
+        cls.neighbour = make_user('neighbour', 'resident')
+        cls.officer = make_user('officer', 'officer')
+        for i in range(5):
+            Incident.objects.create(reporter=cls.resident, title=f'Mine {i}', description='d')
+        cls.other = Incident.objects.create(reporter=cls.neighbour, title='Theirs', description='d')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cursor_pagination_visits_every_visible_incident_once(self):
+        self.client.force_login(self.resident)
+        url = reverse('UlinziTracker:api_incidents')
+        seen, params = [], {'limit': 2}
+        while True:
+            page = self.client.get(url, params).json()
+            seen += [row['id'] for row in page['results']]
+            if not page['next']:
+                break
+            params = {'limit': 2, 'after': page['next']}
+        mine = Incident.objects.filter(reporter=self.resident).order_by('-time_reported', '-id')
+        self.assertEqual(seen, list(mine.values_list('pk', flat=True)))
+
+    def test_role_scoping(self):
+        self.client.force_login(self.resident)
+        self.assertEqual(self.client.get(reverse('UlinziTracker:api_incident', args=[self.other.pk])).status_code,
+                         404)
+        self.client.force_login(self.officer)
+        page = self.client.get(reverse('UlinziTracker:api_incidents'), {'limit': 100}).json()
+        self.assertEqual(len(page['results']), 6)
+
+    def test_field_selection(self):
+        Incident.objects.filter(pk=self.other.pk).update(image_thumbnail='incidents/thumbs/x.jpg')
+        self.client.force_login(self.officer)
+        url = reverse('UlinziTracker:api_incident', args=[self.other.pk])
+        body = self.client.get(url, {'fields': 'id,thumbnail'}).json()
+        self.assertEqual(set(body), {'id', 'thumbnail'})
+        self.assertIn(resolve(body['thumbnail']).kwargs['variant'], views.IMAGE_VARIANTS)
+        self.assertEqual(self.client.get(url, {'fields': 'id,secret'}).status_code, 400)
+
+    def test_etag_and_conditional_requests(self):
+        self.client.force_login(self.officer)
+        url = reverse('UlinziTracker:api_incident', args=[self.other.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        status_url = reverse('UlinziTracker:api_incident_status', args=[self.other.pk])
+        body = json.dumps({'status': 'confirmed'})
+        etag = self.client.get(url, {'fields': ','.join(api.STATUS_FIELDS)})['ETag']
+        response = self.client.post(status_url, body, content_type='application/json', HTTP_IF_MATCH='"stale"')
+        self.assertEqual(response.status_code, 412)
+        response = self.client.post(status_url, body, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(self.client.get(url, {'fields': ','.join(api.STATUS_FIELDS)})['ETag'], etag)
+
+    def test_concurrent_notes_edit_fails_the_precondition(self):
+        self.client.force_login(self.officer)
+        status_url = reverse('UlinziTracker:api_incident_status', args=[self.other.pk])
+        body = json.dumps({'status': 'confirmed', 'response_notes': 'On our way'})
+        etag = self.client.post(status_url, body, content_type='application/json')['ETag']
+
+        Incident.objects.filter(pk=self.other.pk).update(response_notes='Edited elsewhere')
+        body = json.dumps({'status': 'resolved', 'response_notes': 'Done'})
+        response = self.client.post(status_url, body, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.response_notes, 'Edited elsewhere')
+
+        etag = self.client.get(reverse('UlinziTracker:api_incident', args=[self.other.pk]),
+                               {'fields': ','.join(api.STATUS_FIELDS)})['ETag']
+        response = self.client.post(status_url, body, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['response_notes'], 'Done')
+
+    def test_non_string_response_notes_is_rejected(self):
+        self.client.force_login(self.officer)
+        status_url = reverse('UlinziTracker:api_incident_status', args=[self.other.pk])
+        for notes in (['a'], {'a': 1}, 3):
+            with self.subTest(notes=notes):
+                body = json.dumps({'status': 'resolved', 'response_notes': notes})
+                response = self.client.post(status_url, body, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.status, 'pending')
+
+    def test_non_object_json_body_is_rejected(self):
+        self.client.force_login(self.officer)
+        status_url = reverse('UlinziTracker:api_incident_status', args=[self.other.pk])
+        for body in ('["resolved"]', '"resolved"', '3'):
+            with self.subTest(body=body):
+                response = self.client.post(status_url, body, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+        self.client.force_login(self.resident)
+        response = self.client.post(reverse('UlinziTracker:api_incidents'), '[]', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+# ---------------------------
+# Incident event stream
+# ---------------------------
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.hub = events.Hub()
+        for target in (mock.patch.object(events, 'hub', self.hub),
+                       # Like the test client: keep the test's transaction open.
+                       mock.patch.object(events, 'close_old_connections')):
+            target.start()
+            self.addCleanup(target.stop)
+
+    def event(self, reporter_id, geohash='kzf0tq', event_id=None):
+        event = {'type': 'created', 'incident': 1, 'reporter_id': reporter_id, 'geohash': geohash}
+        if event_id is not None:
+            event['id'] = event_id
+        return event
+
+    def scope(self, user=None, last_event_id=None):
+        headers = []
+        if user is not None:
+            self.client.force_login(user)
+            session_key = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+            headers.append((b'cookie', f'{settings.SESSION_COOKIE_NAME}={session_key}'.encode()))
+        if last_event_id is not None:
+            headers.append((b'last-event-id', str(last_event_id).encode()))
+        return {'type': 'http', 'path': events.EVENTS_PATH, 'query_string': b'', 'headers': headers}
+
+    async def stream(self, scope):
+        # The client hangs up as soon as it has received one event.
+        sent, hung_up = [], asyncio.Event()
+
+        async def receive():
+            await hung_up.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            if message.get('body', b'').startswith(b'id: '):
+                hung_up.set()
+
+        await asyncio.wait_for(events.sse_app(scope, receive, send), 5)
+        return sent
+
+    def test_subscribers_only_get_what_they_may_see(self):
+        resident = events.Subscriber(7, 'resident')
+        self.assertTrue(resident.wants(self.event(7)))
+        self.assertFalse(resident.wants(self.event(8)))
+        chief = events.Subscriber(1, 'chief', area=events._area_for('chief', 'kzf0tqxyz', None))
+        self.assertTrue(chief.wants(self.event(8, 'kzf0tq')))
+        self.assertFalse(chief.wants(self.event(8, 'kzf1aa')))
+        self.assertTrue(events.Subscriber(1, 'officer').wants(self.event(8, '')))
+        self.assertEqual(events._area_for('resident', '', 'kzf'), '')
+
+    def test_reconnect_replays_missed_events(self):
+        for event_id in (1, 2, 3):
+            self.hub._fan_out(self.event(7, event_id=event_id))
+        subscriber = events.Subscriber(7, 'resident')
+        self.hub.subscribe(subscriber, last_event_id=1)
+        self.assertEqual([subscriber.queue.get_nowait()['id'] for _ in range(subscriber.queue.qsize())], [2, 3])
+
+    def test_event_ids_keep_increasing_across_restarts(self):
+        with mock.patch.object(events.time, 'time_ns', return_value=1_000_000_000):
+            before_restart = self.hub._next_id()
+            self.assertGreater(self.hub._next_id(), before_restart)
+        with mock.patch.object(events.time, 'time_ns', return_value=2_000_000_000):
+            self.assertGreater(events.Hub()._next_id(), before_restart)
+
+    @override_settings(SSE_QUEUE_SIZE=2)
+    def test_slow_subscriber_overflows(self):
+        subscriber = events.Subscriber(7, 'resident')
+        for event_id in (1, 2, 3):
+            subscriber.offer(self.event(7, event_id=event_id))
+        self.assertTrue(subscriber.overflowed)
+        self.assertEqual(subscriber.queue.qsize(), 2)
+
+    async def test_stream_requires_a_session(self):
+        sent = await self.stream(self.scope())
+        self.assertEqual(sent[0]['status'], 401)
+
+    async def test_stream_replays_after_last_event_id(self):
+        resident = await sync_to_async(make_user)('resident', 'resident')
+        for event_id, reporter_id in ((1, resident.pk), (2, resident.pk + 1), (3, resident.pk)):
+            self.hub._fan_out(self.event(reporter_id, event_id=event_id))
+        sent = await self.stream(await sync_to_async(self.scope)(resident, last_event_id=1))
+        self.assertEqual(sent[0]['status'], 200)
+        frames = [message['body'] for message in sent[1:] if message.get('body', b'').startswith(b'id: ')]
+        self.assertEqual(len(frames), 1)
+        self.assertTrue(frames[0].startswith(b'id: 3\nevent: created\n'))
+        self.assertNotIn(b'reporter_id', frames[0])
+        self.assertEqual(self.hub.subscribers, set())
+
+    def test_wsgi_fallback_tells_the_browser_to_stop(self):
+        self.client.force_login(make_user('officer', 'officer'))
+        response = self.client.get(reverse('UlinziTracker:events'))
+        self.assertEqual((response.status_code, reverse('UlinziTracker:events')), (204, events.EVENTS_PATH))
+
+
+# ---------------------------
+# Per-request profile loading
+# ---------------------------
+class ProfileQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def profile_queries(self, user, url_name):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        table = '"%s"' % User.profile.related.related_model._meta.db_table
+        return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT') and f'FROM {table}' in q['sql']]
+
+    def test_profile_loaded_with_session_user(self):
+        resident = make_user('resident', 'resident')
+        officer = make_user('officer', 'officer')
+        for user, url_name in ((resident, 'UlinziTracker:dashboard'), (officer, 'UlinziTracker:pending_incidents')):
+            with self.subTest(url_name=url_name):
+                self.assertEqual(self.profile_queries(user, url_name), [])
+
+    def test_login_does_not_rewrite_profile(self):
+        user = make_user('resident', 'resident')
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.login(username='resident', password='pass12345')
+        table = User.profile.related.related_model._meta.db_table
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if q['sql'].startswith(f'UPDATE "{table}"')])
+
+
+# ---------------------------
+# Request metrics
+# ---------------------------
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+
+    def test_repeated_query_is_flagged(self):
+        recorder = metrics.QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for pk in range(12):
+                list(User.objects.filter(pk=pk))
+        sql, times = recorder.most_repeated()
+        self.assertEqual((recorder.count, times), (12, 12))
+
+    def test_metrics_endpoint_is_admin_only(self):
+        url = reverse('UlinziTracker:metrics')
+        self.client.force_login(make_user('officer', 'officer'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(make_user('admin', 'admin'))
+        self.client.get(reverse('UlinziTracker:dashboard'))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('ulinzi_request_duration_seconds_count{view="UlinziTracker:dashboard"}', body)
+        self.assertIn('ulinzi_request_queries_bucket{view="UlinziTracker:dashboard",le="+Inf"} 1', body)
+        self.assertIn('ulinzi_cache_hits_total', body)
+
+
+# ---------------------------
+# Synthetic data and view benchmarks
+# ---------------------------
+class SeedBenchmarkTests(TestCase):
+    def test_seed_keeps_derived_data_consistent(self):
+        result = seed.seed({'resident': 3, 'officer': 2}, 200, days=30, seed=1)
+        self.assertEqual(result['incidents'], 200)
+        self.assertEqual(Profile.objects.filter(role='officer').count(), 2)
+        self.assertEqual(stats.drift(), [])
+        responded = Incident.objects.filter(response_time__isnull=False).count()
+        self.assertEqual(IncidentTransition.objects.filter(from_status='pending').count(), responded)
+
+    def test_seeded_rows_keep_their_time_reported(self):
+        users = seed.seed_users({'resident': 1})
+        field = Incident._meta.get_field('time_reported')
+        flags, bulk_create = [], QuerySet.bulk_create
+
+        def watched(queryset, objs, *args, **kwargs):
+            # Other threads saving meanwhile rely on auto_now_add staying on.
+            flags.append(field.auto_now_add)
+            return bulk_create(queryset, objs, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'bulk_create', watched):
+            seed.seed_incidents(50, users['resident'], [], days=30, seed=2)
+        self.assertTrue(flags)
+        self.assertTrue(all(flags))
+        oldest = Incident.objects.order_by('time_reported').first().time_reported
+        self.assertLess(oldest, timezone.now() - timedelta(days=2))
+
+    def test_views_run_and_regressions_are_reported(self):
+        with tempfile.TemporaryDirectory() as pdf_dir, self.settings(PDF_CACHE_DIR=pdf_dir):
+            results = benchmark.run([50], repeat=1)
+        self.assertEqual(set(results), {f'{name}@50' for name in benchmark.VIEWS})
+        self.assertEqual(benchmark.compare(results, results), [])
+        key = 'incident_list.officer@50'
+        slower = {key: {'ms': results[key]['ms'] * 3 + 100, 'queries': results[key]['queries'] + 1}}
+        self.assertEqual(len(benchmark.compare(slower, results)), 2)
+
+
+# ---------------------------
+# Bulk import
+# ---------------------------
+class ImportTests(TestCase):
+    def test_import_validates_rows_and_keeps_rollup(self):
+        make_user('resident', 'resident')
+        data = io.StringIO(
+            "title,description,category,reporter,status,time_reported\n"
+            "Broken gate,Gate left open,other,resident,resolved,2024-02-01 08:30\n"
+            "No reporter,Nobody,other,ghost,pending,\n"
+            "Bad category,Oops,nonsense,resident,pending,\n"
+        )
+        errors, flags, bulk_create = [], [], QuerySet.bulk_create
+        field = Incident._meta.get_field('time_reported')
+
+        def watched(queryset, objs, *args, **kwargs):
+            flags.append(field.auto_now_add)
+            return bulk_create(queryset, objs, *args, **kwargs)
+
+        run = importer.Importer(batch_size=1)
+        with mock.patch.object(QuerySet, 'bulk_create', watched):
+            imported, failed = run.run(importer.read_rows(data, 'csv'), on_error=lambda *args: errors.append(args[0]))
+        self.assertTrue(flags and all(flags))
+        self.assertEqual((imported, failed), (1, 2))
+        self.assertEqual(errors, [3, 4])
+        incident = Incident.objects.get()
+        self.assertEqual((incident.status, incident.time_reported.year), ('resolved', 2024))
+        self.assertEqual(stats.drift(), [])
+        self.assertEqual(IncidentTransition.objects.filter(incident_id=incident.pk).count(), 1)
+
+
+# ---------------------------
+# CSV / XLS export
+# ---------------------------
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.resident = make_user('resident', 'resident')
+        cls.officer = make_user('officer', 'officer')
+        neighbour = make_user('neighbour', 'resident')
+        Incident.objects.create(reporter=cls.resident, title='=HYPERLINK("http://evil.example")', description='d')
+        Incident.objects.create(reporter=cls.resident, title='Fixed gate', description='d', status='resolved')
+        Incident.objects.create(reporter=neighbour, title='Their report', description='d')
+
+    def csv_titles(self, user, **params):
+        self.client.force_login(user)
+        response = self.client.get(reverse('UlinziTracker:export_incidents'), params)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        return [row[2] for row in list(csv.reader(io.StringIO(content)))[1:]]
+
+    def test_role_scoping_and_default_format(self):
+        self.assertEqual(len(self.csv_titles(self.officer)), 3)
+        self.assertNotIn('Their report', self.csv_titles(self.resident))
+        self.assertEqual(self.csv_titles(self.resident, list='pending'), ["'=HYPERLINK(\"http://evil.example\")"])
+
+    def test_resolved_export_includes_archive(self):
+        Incident.objects.filter(status='resolved').update(time_reported=timezone.now() - timedelta(days=60))
+        archive.archive(days=30)
+        Incident.objects.create(reporter=self.resident, title='Fresh fix', description='d', status='resolved')
+        self.assertEqual(self.csv_titles(self.resident, list='resolved'), ['Fresh fix', 'Fixed gate'])
+
+    def test_xls_rolls_over_to_new_sheets(self):
+        self.addCleanup(setattr, export, 'XLS_SHEET_ROWS', export.XLS_SHEET_ROWS)
+        export.XLS_SHEET_ROWS = 2
+        book = export.workbook(export.scoped_incidents(self.officer))
+        self.assertEqual(book.get_sheet(1).name, 'Incidents 2')
+        self.assertRaises(IndexError, book.get_sheet, 2)
+
+        self.client.force_login(self.officer)
+        response = self.client.get(reverse('UlinziTracker:export_incidents'), {'format': 'xls'})
+        self.assertEqual(response['Content-Type'], 'application/vnd.ms-excel')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'\xd0\xcf\x11\xe0'))
+        response.close()
+
+
+# ---------------------------
+# Archiving
+# ---------------------------
+class ArchiveTests(TestCase):
+    def test_archive_moves_old_resolved_incidents(self):
+        users = seed.seed_users({'resident': 2, 'officer': 1})
+        seed.seed_incidents(120, users['resident'], users['officer'], days=60, seed=3)
+        stats.rebuild()
+        before = stats.rollup_counts()
+        expected = archive.candidates(days=30).count()
+        self.assertGreater(expected, 0)
+
+        self.assertEqual(archive.archive(days=30, batch_size=25), expected)
+        self.assertEqual(ArchivedIncident.objects.count(), expected)
+        self.assertFalse(archive.candidates(days=30).exists())
+        self.assertEqual(stats.rollup_counts(), before)
+        self.assertEqual(stats.drift(), [])
+
+        officer = User.objects.get(pk=users['officer'][0])
+        self.client.force_login(officer)
+        archived = ArchivedIncident.objects.order_by('-time_reported').first()
+        response = self.client.get(reverse('UlinziTracker:resolved_incidents') + '?archived=1')
+        self.assertContains(response, archived.title)
+        with tempfile.TemporaryDirectory() as pdf_dir, self.settings(PDF_CACHE_DIR=pdf_dir):
+            response = self.client.get(reverse('UlinziTracker:pdf_view', args=[archived.pk]))
+            self.assertEqual(response.status_code, 200)
+            response.close()
+
+    def test_archived_media_is_served_and_released_with_the_reporter(self):
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            resident = make_user('resident', 'resident')
+            incident = Incident(reporter=resident, title='Gate', description='d', status='resolved')
+            incident.video = ContentFile(b'clip', name='clip.mp4')
+            incident.save()
+            Incident.objects.filter(pk=incident.pk).update(time_reported=timezone.now() - timedelta(days=60))
+            self.assertEqual(archive.archive(days=30), 1)
+
+            self.client.force_login(resident)
+            response = self.client.get(reverse('UlinziTracker:incident_media', args=[incident.pk, 'video']))
+            self.assertEqual(b''.join(response.streaming_content), b'clip')
+
+            with self.captureOnCommitCallbacks(execute=True):
+                resident.delete()
+            self.assertEqual(MediaBlob.objects.get().refs, 0)
+            self.assertEqual(stats.drift(), [])
+
+
+# ---------------------------
+# Primary / replica routing
+# ---------------------------
+# The "replica" alias is a TEST MIRROR of default: a second connection to the
+# same test database, so committed rows are visible through it.
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def incident_reads(self, alias, url):
+        table = '"%s"' % Incident._meta.db_table
+        with CaptureQueriesContext(connections[alias]) as ctx:
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT') and table in q['sql']]
+
+    def test_read_views_use_replica_until_a_write(self):
+        cache.clear()
+        officer = make_user('officer', 'officer')
+        Incident.objects.create(reporter=officer, title='Gate open', description='d')
+        self.client.force_login(officer)
+
+        for url_name in ('UlinziTracker:incident_list', 'UlinziTracker:export_incidents'):
+            with self.subTest(url_name=url_name):
+                cache.clear()
+                self.assertTrue(self.incident_reads('replica', reverse(url_name)))
+
+        # A write pins this client to the primary for a few seconds.
+        response = self.client.post(reverse('UlinziTracker:bulk_incidents'), {'action': 'confirm', 'ids': []})
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+        cache.clear()
+        self.assertEqual(self.incident_reads('replica', reverse('UlinziTracker:incident_list')), [])
+
+    def test_replica_block_reads_from_one_replica(self):
+        router = routers.PrimaryReplicaRouter()
+        with mock.patch.object(routers, 'replicas', return_value=['replica', 'replica_2']):
+            for _ in range(10):
+                with routers.replica():
+                    chosen = {router.db_for_read(Incident) for _ in range(20)}
+                    with routers.replica():
+                        chosen.add(router.db_for_read(Incident))
+                self.assertEqual(len(chosen), 1)
+        self.assertEqual(router.db_for_read(Incident), 'default')
@@ -0,0 +1,158 @@
+import fcntl
+import os
+import re
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import UploadSession
+
+
+# ---------------------------
+# Resumable chunked uploads
+# ---------------------------
+# The part file on disk is the source of truth for how much has arrived: a
+# client that lost its connection asks for the current offset and carries on
+# from there, so nothing is re-sent and no chunk is ever held in memory whole.
+
+COPY_BUFFER = 64 * 1024
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadError(Exception):
+    status = 400
+
+
+class OffsetMismatch(UploadError):
+    status = 409
+
+
+class ChunkTooLarge(UploadError):
+    status = 413
+
+
+class UploadBusy(UploadError):
+    status = 409
+
+
+def _parts_dir():
+    path = Path(getattr(settings, 'UPLOAD_PARTS_DIR', Path(settings.BASE_DIR) / 'upload_parts'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def part_path(session):
+    return _parts_dir() / f'{session.pk}.part'
+
+
+def current_offset(session):
+    if session.is_complete:
+        return session.size
+    try:
+        return part_path(session).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def parse_content_range(header, session):
+    """Return ``(offset, length)`` from a ``bytes start-end/total`` header."""
+    match = CONTENT_RANGE.match(header or '')
+    if not match:
+        raise UploadError("Content-Range must look like 'bytes <start>-<end>/<total>'.")
+    start, end, total = (int(group) for group in match.groups())
+    if total != session.size or end < start or end >= total:
+        raise UploadError("Content-Range does not fit this upload.")
+    return start, end - start + 1
+
+
+def append_chunk(session, stream, offset, length):
+    """Append ``length`` bytes read from ``stream`` at ``offset``; return the new offset."""
+    if length > getattr(settings, 'UPLOAD_CHUNK_MAX_BYTES', 8 * 1024 * 1024):
+        raise ChunkTooLarge("Chunk exceeds UPLOAD_CHUNK_MAX_BYTES.")
+    if UploadSession.objects.filter(pk=session.pk, completed_at__isnull=False).exists():
+        raise UploadError("This upload has already been completed.")
+
+    with open(part_path(session), 'ab') as part:
+        # One writer per session. The lock is on the part file rather than
+        # the row, so no transaction stays open while a slow client sends
+        # its chunk, and it holds on SQLite too. A second PUT arriving
+        # meanwhile is turned away instead of queueing behind the first.
+        try:
+            fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadBusy("Another chunk of this upload is still being written.")
+        expected = os.fstat(part.fileno()).st_size
+        if offset != expected:
+            raise OffsetMismatch(expected)
+
+        remaining = length
+        while remaining:
+            data = stream.read(min(COPY_BUFFER, remaining))
+            if not data:
+                break
+            part.write(data)
+            remaining -= len(data)
+        part.flush()
+        received = os.fstat(part.fileno()).st_size
+        UploadSession.objects.filter(pk=session.pk).update(received=received)
+    session.received = received
+    return received
+
+
+class _PartFile(File):
+    # Lets image validation open the part file by path instead of reading it
+    # into memory.
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def validate(session):
+    """Run IncidentForm's checks for ``session.field`` on the finished part file.
+
+    A file that fails them is discarded, so the upload starts again from 0.
+    """
+    from .forms import IncidentForm
+
+    path = part_path(session)
+    try:
+        with open(path, 'rb') as part:
+            IncidentForm.base_fields[session.field].clean(_PartFile(part, name=session.filename))
+    except ValidationError as exc:
+        os.remove(path)
+        UploadSession.objects.filter(pk=session.pk).update(received=0)
+        session.received = 0
+        raise UploadError(' '.join(exc.messages))
+
+
+def assemble(session):
+    """Move the finished part file into the incident's media field."""
+    validate(session)
+    path = part_path(session)
+    incident = session.incident
+    with transaction.atomic():
+        with open(path, 'rb') as part:
+            getattr(incident, session.field).save(session.filename, File(part), save=False)
+        incident.save(update_fields=[session.field])
+        session.completed_at = timezone.now()
+        session.save(update_fields=['received', 'completed_at'])
+    os.remove(path)
+    return incident
+
+
+def purge_stale(max_age_hours):
+    cutoff = timezone.now() - timedelta(hours=max_age_hours)
+    stale = UploadSession.objects.filter(completed_at__isnull=True, created_at__lt=cutoff)
+    removed = 0
+    for session in stale:
+        try:
+            os.remove(part_path(session))
+        except FileNotFoundError:
+            pass
+        session.delete()
+        removed += 1
+    return removed
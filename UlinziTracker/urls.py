@@ -1,6 +1,7 @@
 from django.urls import path, re_path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import api, views
+from .forms import QueuedPasswordResetForm
 
 app_name = "UlinziTracker"
 
@@ -22,11 +23,23 @@ urlpatterns = [
     # Incidents
     path('incidents/', views.incidents, name='incidents'),
     path('incident-list/', views.incident_list, name='incident_list'),
+    path('uploads/', views.upload_start, name='upload_start'),
+    path('uploads/<uuid:upload_id>/', views.upload_chunk, name='upload_chunk'),
     path('allincidents/', views.allincidents, name='allincidents'),
+    path('search/', views.incident_search, name='incident_search'),
+    path('incidents/nearby/', views.incidents_nearby, name='incidents_nearby'),
+    path('hotspots/', views.hotspots, name='hotspots'),
     path('incidents/resolved/', views.solved_incidents, name='resolved_incidents'),
 
     path('incidentStats/', views.incidentStats, name='incidentStats'),
+    path('stats/trends/', views.incident_trends, name='incident_trends'),
+    path('stats/sla/', views.sla_report, name='sla_report'),
+    path('cache-stats/', views.cache_stats, name='cache_stats'),
+    path('job-stats/', views.job_stats, name='job_stats'),
+    path('metrics/', views.metrics_view, name='metrics'),
     path('incidents/pending/', views.pending_incidents, name='pending_incidents'),
+    path('incidents/bulk/', views.bulk_incidents, name='bulk_incidents'),
+    path('events/', views.events_unavailable, name='events'),   # served by web/asgi.py under ASGI
     path('incidents/<int:incident_id>/confirm/', views.confirm_incident, name='confirm_incident'),
            # officers actions
     path("incidents/<int:incident_id>/confirm/", views.confirm_incident, name="confirm_incident"),
@@ -40,13 +53,22 @@ urlpatterns = [
     path("incidents/update/<int:id>/", views.update_status, name="update_status"),
 
 
+    # Incident images (thumb / web / original)
+    path("incidents/<int:incident_id>/image/<str:variant>/", views.incident_image, name="incident_image"),
+    path("incidents/<int:incident_id>/media/<str:field>/", views.incident_media, name="incident_media"),
+
     # PDF export
     path("pdf/<int:incident_id>/", views.pdf_view, name="pdf_view"),
     path("pdf_g/<int:incident_id>/", views.pdf_view, name="pdf_g"),
+    path("pdf/export/", views.export_pdfs, name="export_pdfs"),
+    path("incidents/export/", views.export_incidents, name="export_incidents"),
 
     # Password reset flow
     path('password-reset/',
-        auth_views.PasswordResetView.as_view(template_name='UlinziTracker/password_reset.html'),
+        auth_views.PasswordResetView.as_view(
+            template_name='UlinziTracker/password_reset.html',
+            form_class=QueuedPasswordResetForm,
+        ),
         name='password_reset'
     ),
     path('password-reset-done/',
@@ -62,4 +84,9 @@ urlpatterns = [
         auth_views.PasswordResetCompleteView.as_view(template_name='UlinziTracker/password_reset_complete.html'),
         name='password_reset_complete'
     ),
+
+    # JSON API v1
+    path('api/v1/incidents/', api.incidents, name='api_incidents'),
+    path('api/v1/incidents/<int:incident_id>/', api.incident, name='api_incident'),
+    path('api/v1/incidents/<int:incident_id>/status/', api.incident_status, name='api_incident_status'),
 ]
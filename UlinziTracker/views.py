@@ -1,24 +1,37 @@
 from django.contrib import messages
-from django.http import HttpResponse
+import hmac
+import json
+
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotAllowed,
+    JsonResponse, StreamingHttpResponse,
+)
+from django.views.decorators.http import require_POST
 from django.contrib.auth.forms import UserCreationForm, PasswordChangeForm
 from django.contrib.auth import update_session_auth_hash
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils import timezone
+from django.utils.http import http_date, url_has_allowed_host_and_scheme
 from django.contrib.auth import logout
+from django.conf import settings
 
 
 
-from .models import Profile, Incident
+from .models import ArchivedIncident, Incident, HotspotCell, UploadSession
+from .routers import use_replica
+from . import analytics, archive, bulk, caching, export, geo, jobs, media, metrics, pdf, search, sla, stats, tasks, uploads
 from .forms import (
     UserRegisterForm,
     ProfileUpdateForm,
     UserProfileForm,
     UserProfileUpdateForm,
     IncidentForm,
-    StatusUpdateForm
+    IncidentExportForm,
+    IncidentListExportForm,
+    StatusUpdateForm,
+    UploadStartForm
 )
 
 def index(request):
@@ -29,6 +42,7 @@ def aboutus(request):
 
 # --- Incident statistics ---
 @login_required
+@use_replica
 def incidentStats(request):
     # Restrict: only chiefs and admins can view analytics
     role = request.user.profile.role
@@ -36,26 +50,69 @@ def incidentStats(request):
         messages.error(request, "You are not authorized to view incident statistics.")
         return redirect('UlinziTracker:dashboard')
 
-    total = Incident.objects.count()
-    pending = Incident.objects.filter(status='pending').count()
-    resolved = Incident.objects.filter(status='resolved').count()
-    inprogress = Incident.objects.filter(status='in_progress').count()
-
-    dataset = Incident.objects.values('category').annotate(
-        total=Count('status'),
-        resolved=Count('status', filter=Q(status='resolved')),
-        pending=Count('status', filter=Q(status='pending')),
-        inprogress=Count('status', filter=Q(status='in_progress'))
-    ).order_by('category')
+    snapshot = caching.cached('incident_stats', request.user, stats.snapshot)
 
     context = {
-        'total': total,
-        'unsolved': pending + inprogress,
-        'solved': resolved,
-        'dataset': dataset
+        'total': snapshot['total'],
+        'unsolved': snapshot['pending'] + snapshot['inprogress'],
+        'solved': snapshot['resolved'],
+        'dataset': snapshot['dataset']
     }
     return render(request, "UlinziTracker/incidentStats.html", context)
 
+# --- Incident trends: hourly/daily series and weekday x hour heatmap ---
+@login_required
+@use_replica
+def incident_trends(request):
+    if request.user.profile.role not in ['chief', 'admin']:
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    window = request.GET.get('window', '30d')
+    if window not in analytics.WINDOWS:
+        return JsonResponse({'error': f"window must be one of {', '.join(analytics.WINDOWS)}"}, status=400)
+    category = request.GET.get('category') or ''
+    if category and category not in analytics.CATEGORIES:
+        return JsonResponse({'error': 'unknown category'}, status=400)
+
+    # Keyed by the current hour too, so a window's series rolls forward even
+    # when no incident has changed.
+    hour = timezone.now().strftime('%Y%m%d%H')
+    data = caching.cached('incident_trends', request.user,
+                          lambda: analytics.trends(window, category), window, category, hour)
+    return JsonResponse(data)
+
+# --- Response/resolution latency percentiles per category and officer ---
+@login_required
+@use_replica
+def sla_report(request):
+    if request.user.profile.role not in ['chief', 'admin'] and not request.user.is_superuser:
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    return JsonResponse(caching.cached('sla_report', request.user, sla.report))
+
+# --- Cache counters (admins only) ---
+@login_required
+def cache_stats(request):
+    if not (request.user.is_superuser or request.user.profile.role == 'admin'):
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    return JsonResponse(caching.counters())
+
+# --- Background job queue depth and latency (admins only) ---
+@login_required
+def job_stats(request):
+    if not (request.user.is_superuser or request.user.profile.role == 'admin'):
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    return JsonResponse(jobs.stats())
+
+# --- Prometheus metrics (admins, or a scraper with METRICS_BEARER_TOKEN) ---
+def metrics_view(request):
+    token = getattr(settings, 'METRICS_BEARER_TOKEN', '')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    scraper = bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+    user = request.user
+    if not scraper and not (user.is_authenticated and (user.is_superuser or user.profile.role == 'admin')):
+        return HttpResponse('forbidden\n', status=403, content_type='text/plain')
+    body = metrics.render(cache_counters=caching.counters(), job_depth=jobs.depth())
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # --- Change password ---
 def change_password(request):
     if request.method == 'POST':
@@ -104,7 +161,9 @@ def register(request):
     return render(request, 'UlinziTracker/register.html', {'form': form, 'profile_form': profile_form})
 @login_required
 def dashboard(request):
-    profile, created = Profile.objects.get_or_create(user=request.user)
+    # Loaded with the user by UlinziTracker.backends; no extra query.
+    profile = request.user.profile
+    original_role = profile.role
 
     if request.method == 'POST':
         # Pass the user into the forms so they know who is editing
@@ -118,7 +177,6 @@ def dashboard(request):
             # Enforce role immutability unless superuser
             if not request.user.is_superuser:
                 # Reset role back to original if someone tried to change it
-                original_role = Profile.objects.get(pk=profile.pk).role
                 profile.role = original_role
 
             profile.user = user
@@ -132,7 +190,9 @@ def dashboard(request):
 
     # ✅ NEW: add incidents for residents
     if request.user.profile.role == 'resident':
-        incidents = Incident.objects.filter(reporter=request.user)
+        incidents = caching.cached('dashboard_incidents', request.user, lambda: list(
+            Incident.objects.filter(reporter=request.user).select_related('confirmed_by')
+        ))
     else:
         incidents = Incident.objects.none()
 
@@ -165,7 +225,61 @@ def incidents(request):
 
     return render(request, 'UlinziTracker/incident_form.html', {'incident_form': incident_form})
 
+# --- Chunked, resumable evidence uploads ---
+# POST uploads/ opens a session; GET uploads/<id>/ reports the offset to resume
+# from; PUT uploads/<id>/ with a Content-Range header appends one chunk.
+def _upload_state(session):
+    return {
+        'id': str(session.pk),
+        'offset': uploads.current_offset(session),
+        'size': session.size,
+        'complete': session.is_complete,
+    }
+
 @login_required
+@require_POST
+def upload_start(request):
+    if request.user.profile.role != 'resident':
+        return JsonResponse({'error': 'Only residents can upload incident evidence.'}, status=403)
+    form = UploadStartForm(request.POST, user=request.user)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    session = form.save(commit=False)
+    session.user = request.user
+    session.save()
+    return JsonResponse(_upload_state(session), status=201)
+
+@login_required
+def upload_chunk(request, upload_id):
+    session = get_object_or_404(UploadSession.objects.select_related('incident'), pk=upload_id, user=request.user)
+    if request.method == 'GET':
+        return JsonResponse(_upload_state(session))
+    if request.method not in ('PUT', 'PATCH', 'POST'):
+        return HttpResponseNotAllowed(['GET', 'PUT', 'PATCH', 'POST'])
+
+    try:
+        offset, length = uploads.parse_content_range(request.META.get('HTTP_CONTENT_RANGE'), session)
+        uploads.append_chunk(session, request, offset, length)
+    except uploads.UploadError as exc:
+        state = _upload_state(session)
+        state['error'] = 'Offset mismatch, resume from offset.' if isinstance(exc, uploads.OffsetMismatch) else str(exc)
+        return JsonResponse(state, status=exc.status)
+
+    state = _upload_state(session)
+    if session.received == session.size:
+        # Same checks as the report form; a rejected file starts over at 0.
+        try:
+            uploads.validate(session)
+        except uploads.UploadError as exc:
+            return JsonResponse({**_upload_state(session), 'error': str(exc)}, status=exc.status)
+        # Moving the file into place is done by a worker; poll GET until complete.
+        tasks.assemble_upload.enqueue(str(session.pk))
+        state['assembling'] = True
+        return JsonResponse(state, status=202)
+    return JsonResponse(state)
+
+@login_required
+@use_replica
 def incident_list(request):
     role = request.user.profile.role
     if role == 'resident':
@@ -173,18 +287,28 @@ def incident_list(request):
     else:
         # Officers, chiefs, admins see all incidents
         incidents = Incident.objects.all()
-    return render(request, 'UlinziTracker/AllIncidents.html', {'c': incidents})
+    page = caching.cached_page('incident_list', request, incidents.for_listing())
+    return render(request, 'UlinziTracker/AllIncidents.html', {'c': page, 'page': page})
 
 @login_required
+@use_replica
 def solved_incidents(request):
+    if request.GET.get('archived') == '1':
+        # Older resolved incidents live in the archive table (see archive.py).
+        archived = archive.visible_archive(request.user).select_related('reporter', 'confirmed_by')
+        page = caching.cached_page('archived_incidents', request, archived)
+        return render(request, 'UlinziTracker/resolvedIncidents.html',
+                      {'result': page, 'page': page, 'archived': True})
     role = request.user.profile.role
     if role in ['officer', 'chief', 'admin']:
         incidents = Incident.objects.filter(status='resolved')
     else:
         incidents = Incident.objects.filter(status='resolved', reporter=request.user)
-    return render(request, 'UlinziTracker/resolvedIncidents.html', {'result': incidents})
+    page = caching.cached_page('solved_incidents', request, incidents.for_listing())
+    return render(request, 'UlinziTracker/resolvedIncidents.html', {'result': page, 'page': page})
 
 @login_required
+@use_replica
 def allincidents(request):
     role = request.user.profile.role
     if role in ['officer', 'chief', 'admin']:
@@ -192,30 +316,264 @@ def allincidents(request):
     else:
         messages.error(request, "You are not authorized to view all incidents.")
         return redirect('UlinziTracker:incident_list')
-    return render(request, 'UlinziTracker/AllIncidents.html', {'c': incidents})
+    page = caching.cached_page('allincidents', request, incidents.for_listing())
+    return render(request, 'UlinziTracker/AllIncidents.html', {'c': page, 'page': page})
+
+# --- Ranked full-text search (residents only see their own reports) ---
+SEARCH_PAGE_SIZE = 25
+
+@login_required
+def incident_search(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        page_number = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page_number = 1
+    filters = {}
+    if request.user.profile.role == 'resident':
+        filters['reporter_id'] = request.user.pk
+    status = request.GET.get('status')
+    if status in dict(Incident.STATUS_CHOICES):
+        filters['status'] = status
+
+    # Fetch one extra row to know whether there is a next page.
+    results = search.search(query, limit=SEARCH_PAGE_SIZE + 1,
+                            offset=(page_number - 1) * SEARCH_PAGE_SIZE, **filters) if query else []
+    has_next = len(results) > SEARCH_PAGE_SIZE
+    results = results[:SEARCH_PAGE_SIZE]
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'query': query,
+            'page': page_number,
+            'has_next': has_next,
+            'results': [
+                {
+                    'id': incident.id,
+                    'title': incident.title,
+                    'category': incident.category,
+                    'status': incident.status,
+                    'location': incident.location,
+                    'reporter': incident.reporter.username,
+                    'time_reported': incident.time_reported.isoformat(),
+                    'score': incident.search_score,
+                }
+                for incident in results
+            ],
+        })
+    return render(request, 'UlinziTracker/search.html', {
+        'query': query,
+        'status': status or '',
+        'results': results,
+        'page_number': page_number,
+        'has_next': has_next,
+        'statuses': Incident.STATUS_CHOICES,
+    })
+
+# --- Incidents near a point or inside a bounding box ---
+NEARBY_LIMIT = 200
+
+def _floats(value, count):
+    try:
+        numbers = [float(part) for part in value.split(',')]
+    except (AttributeError, ValueError):
+        return None
+    return numbers if len(numbers) == count else None
+
+@login_required
+def incidents_nearby(request):
+    incidents = Incident.objects.select_related('reporter')
+    if request.user.profile.role == 'resident':
+        incidents = incidents.filter(reporter=request.user)
+    category = request.GET.get('category')
+    if category in dict(Incident.CATEGORY_CHOICES):
+        incidents = incidents.filter(category=category)
+
+    bbox = _floats(request.GET.get('bbox'), 4)
+    point = _floats(request.GET.get('point'), 2)
+    if bbox:
+        rows = list(geo.within_bbox(incidents, *bbox).order_by('-time_reported')[:NEARBY_LIMIT])
+    elif point:
+        try:
+            radius = min(max(float(request.GET.get('km', 1)), 0.01), 50)
+        except ValueError:
+            return JsonResponse({'error': 'km must be a number'}, status=400)
+        rows = geo.near(incidents, point[0], point[1], radius, limit=NEARBY_LIMIT)
+    else:
+        return JsonResponse({'error': 'pass point=lat,lng (and km=) or bbox=min_lat,min_lng,max_lat,max_lng'},
+                            status=400)
+
+    return JsonResponse({'results': [
+        {
+            'id': incident.id,
+            'title': incident.title,
+            'category': incident.category,
+            'status': incident.status,
+            'latitude': incident.latitude,
+            'longitude': incident.longitude,
+            'time_reported': incident.time_reported.isoformat(),
+            'distance_km': getattr(incident, 'distance_km', None),
+        }
+        for incident in rows
+    ]})
+
+# --- Precomputed hotspot heatmap (chiefs and admins) ---
+@login_required
+def hotspots(request):
+    if request.user.profile.role not in ('chief', 'admin') and not request.user.is_superuser:
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    window = request.GET.get('window', '7d')
+    if window not in geo.HOTSPOT_WINDOWS:
+        return JsonResponse({'error': f"window must be one of {', '.join(geo.HOTSPOT_WINDOWS)}"}, status=400)
+    cells = HotspotCell.objects.filter(window=window)
+    category = request.GET.get('category')
+    if category:
+        cells = cells.filter(category=category)
+
+    merged = {}
+    computed_at = None
+    for cell, latitude, longitude, count, computed in cells.values_list(
+            'cell', 'latitude', 'longitude', 'count', 'computed_at'):
+        entry = merged.setdefault(cell, {'cell': cell, 'latitude': latitude, 'longitude': longitude, 'count': 0})
+        entry['count'] += count
+        computed_at = computed
+    return JsonResponse({
+        'window': window,
+        'computed_at': computed_at.isoformat() if computed_at else None,
+        'cells': sorted(merged.values(), key=lambda entry: -entry['count']),
+    })
+
+def can_view_incident(user, incident):
+    return (
+        user == incident.reporter
+        or user.is_superuser
+        or user.profile.role in ['officer', 'chief', 'admin']
+    )
+
+def _incident_or_archived(incident_id):
+    # Archived incidents keep their id, PDF and media (see archive.py).
+    return (Incident.objects.select_related('reporter').filter(id=incident_id).first()
+            or get_object_or_404(ArchivedIncident.objects.select_related('reporter'), id=incident_id))
+
+# --- Incident images: thumbnails/web copies inline, original as download ---
+IMAGE_VARIANTS = {
+    'thumb': 'image_thumbnail',
+    'web': 'image_web',
+    'original': 'image',
+}
+
+@login_required
+def incident_image(request, incident_id, variant):
+    if variant not in IMAGE_VARIANTS:
+        raise Http404("Unknown image variant.")
+    incident = _incident_or_archived(incident_id)
+    if not can_view_incident(request.user, incident):
+        return HttpResponseForbidden("You are not authorized to view this incident.")
+
+    image = getattr(incident, IMAGE_VARIANTS[variant])
+    if not image:
+        # Derivatives are generated in the background; until they exist
+        # fall back to the original.
+        image = incident.image
+    if not image:
+        raise Http404("This incident has no image.")
+
+    response = media.serve(request, image, as_attachment=(variant == 'original'))
+    patch_cache_control(response, private=True, max_age=86400)
+    return response
+
+# --- Audio/video evidence, streamed with HTTP Range support ---
+@login_required
+def incident_media(request, incident_id, field):
+    if field not in ('audio', 'video'):
+        raise Http404("Unknown media field.")
+    incident = _incident_or_archived(incident_id)
+    if not can_view_incident(request.user, incident):
+        return HttpResponseForbidden("You are not authorized to view this incident.")
+
+    media_file = getattr(incident, field)
+    if not media_file:
+        raise Http404("This incident has no %s." % field)
+
+    response = media.serve(request, media_file, as_attachment=request.GET.get('download') == '1')
+    patch_cache_control(response, private=True, max_age=3600)
+    return response
 
 @login_required
 def pdf_view(request, incident_id):
-    incident = get_object_or_404(Incident, id=incident_id)
+    incident = _incident_or_archived(incident_id)
+
+    # Served from the on-disk rendition cache; browsers revalidate with
+    # If-None-Match / If-Modified-Since and get a 304 when nothing changed.
+    handle, version, mtime = pdf.open_rendition(pdf.incident_payload(incident))
+    etag = f'"{version}"'
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(mtime))
+    if not_modified is not None:
+        handle.close()
+        response = not_modified
+    else:
+        response = FileResponse(handle, as_attachment=True, filename=f'incident_{incident.id}.pdf',
+                                content_type='application/pdf')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# --- Bulk PDF export (officers, chiefs, admins) ---
+@login_required
+@use_replica
+def export_pdfs(request):
+    if request.user.profile.role not in ['officer', 'chief', 'admin'] and not request.user.is_superuser:
+        messages.error(request, "You are not authorized to export incidents.")
+        return redirect('UlinziTracker:incident_list')
 
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename=incident_{incident.id}.pdf'
-    p = canvas.Canvas(response, pagesize=A4)
-
-    p.drawString(25, 770, "Incident Report")
-    p.drawString(30, 750, f"Reporter: {incident.reporter.username}")
-    p.drawString(30, 730, f"Category: {incident.get_category_display()}")
-    p.drawString(30, 710, f"Status: {incident.get_status_display()}")
-    p.drawString(30, 690, f"Location: {incident.location}")
-    p.drawString(30, 670, f"Time Reported: {incident.time_reported.strftime('%Y-%m-%d %H:%M')}")
-    p.drawString(30, 650, "Description:")
-    p.drawString(30, 630, incident.description)
-    p.showPage()
-    p.save()
+    form = IncidentExportForm(request.GET or None)
+    if not form.is_valid():
+        return render(request, 'UlinziTracker/export_pdfs.html', {'form': form})
+
+    incidents = form.filter(Incident.objects.select_related('reporter')).order_by('time_reported', 'id')
+    payloads = (pdf.incident_payload(incident) for incident in incidents.iterator(chunk_size=200))
+
+    if form.cleaned_data['format'] == 'pdf':
+        limit = pdf.combined_limit()
+        if incidents.count() > limit:
+            form.add_error('format', f"A combined PDF is limited to {limit} incidents; "
+                                     "choose the ZIP export or narrow the filters.")
+            return render(request, 'UlinziTracker/export_pdfs.html', {'form': form})
+        return FileResponse(pdf.render_combined_file(payloads), as_attachment=True, filename='incidents.pdf',
+                            content_type='application/pdf')
+
+    response = StreamingHttpResponse(pdf.stream_zip(payloads), content_type='application/zip')
+    response['Content-Disposition'] = 'attachment; filename=incidents.zip'
+    return response
+
+
+# --- CSV / XLS export of the incident lists (same role scoping as the lists) ---
+@login_required
+@use_replica
+def export_incidents(request):
+    form = IncidentListExportForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'error': form.errors.get_json_data()}, status=400)
+    sources = export.scoped_incidents(request.user, form.cleaned_data['list'] or 'all')
+    sources = [form.filter(queryset) for queryset in sources]
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M')
+
+    if form.cleaned_data['format'] == 'xls':
+        limit = getattr(settings, 'EXPORT_XLS_MAX_ROWS', 250000)
+        if sum(queryset.count() for queryset in sources) > limit:
+            return JsonResponse({'error': f'XLS exports are limited to {limit} rows; use format=csv.'}, status=400)
+        return FileResponse(export.write_xls(sources), as_attachment=True, filename=f'incidents-{stamp}.xls',
+                            content_type='application/vnd.ms-excel')
+
+    response = StreamingHttpResponse(export.stream_csv(sources), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="incidents-{stamp}.csv"'
     return response
 
 
 @login_required
+@use_replica
 def pending_incidents(request):
     role = request.user.profile.role
 
@@ -226,7 +584,55 @@ def pending_incidents(request):
         # Residents only see their own pending incidents
         incidents = Incident.objects.filter(status='pending', reporter=request.user)
 
-    return render(request, 'UlinziTracker/pendingIncidents.html', {'result': incidents})
+    page = caching.cached_page('pending_incidents', request, incidents.for_listing())
+    return render(request, 'UlinziTracker/pendingIncidents.html', {'result': page, 'page': page})
+
+# --- Incident event stream fallback ---
+def events_unavailable(request):
+    # web/asgi.py answers /events/ itself; reaching Django means this process
+    # runs under WSGI (or runserver). 204 tells EventSource not to reconnect.
+    return HttpResponse(status=204)
+
+# --- Bulk confirm/resolve (officers) ---
+@login_required
+@require_POST
+def bulk_incidents(request):
+    if request.user.profile.role != 'officer':
+        return JsonResponse({'error': 'Only officers can confirm or resolve incidents.'}, status=403)
+
+    if request.content_type == 'application/json':
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({'error': 'invalid JSON'}, status=400)
+        if not isinstance(payload, dict):
+            return JsonResponse({'error': 'expected a JSON object'}, status=400)
+        action, raw_ids, notes = payload.get('action'), payload.get('ids') or [], payload.get('response_notes')
+    else:
+        action, raw_ids, notes = request.POST.get('action'), request.POST.getlist('ids'), request.POST.get('response_notes')
+
+    if action not in bulk.ACTIONS:
+        return JsonResponse({'error': f"action must be one of {', '.join(bulk.ACTIONS)}"}, status=400)
+    if not isinstance(raw_ids, list):
+        return JsonResponse({'error': 'ids must be a list of integers'}, status=400)
+    try:
+        ids = list(dict.fromkeys(int(pk) for pk in raw_ids))
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'ids must be integers'}, status=400)
+    if not ids or len(ids) > bulk.MAX_IDS:
+        return JsonResponse({'error': f'send between 1 and {bulk.MAX_IDS} ids'}, status=400)
+
+    results = bulk.apply(action, ids, request.user, notes)
+    updated = sum(1 for result in results if result['ok'])
+
+    # Plain form posts from the incident lists go back where they came from.
+    next_url = request.POST.get('next')
+    if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()},
+                                                    require_https=request.is_secure()):
+        messages.success(request, f"{updated} of {len(ids)} incident(s) updated ({action}).")
+        return redirect(next_url)
+    return JsonResponse({'action': action, 'updated': updated, 'results': results})
+
 def logout_view(request):
     logout(request)
     messages.success(request, "You have been logged out successfully.")
@@ -270,6 +676,7 @@ def update_status(request, id):
     if request.method == 'POST':
         form = StatusUpdateForm(request.POST, instance=incident)
         if form.is_valid():
+            incident._actor = request.user
             form.save()
             messages.success(request, "Status updated successfully.")
             return redirect('UlinziTracker:incident_list')
@@ -345,6 +752,7 @@ def confirm_incident(request, incident_id):
             incident.status = 'confirmed'
             incident.confirmed_by = request.user
             incident.response_notes = note
+            incident._actor = request.user
             incident.save()
             messages.success(request, f"Incident {incident.id} confirmed with response.")
             return redirect('UlinziTracker:pending_incidents')
@@ -365,7 +773,8 @@ def resolve_incident(request, incident_id):
 
     # Mark as resolved
     incident.status = 'resolved'
+    incident._actor = request.user
     incident.save()
 
     messages.success(request, f"Incident {incident.id} has been marked as resolved.")
-    return redirect('UlinziTracker:solved_incidents')
+    return redirect('UlinziTracker:resolved_incidents')
@@ -0,0 +1,25 @@
+"""
+ASGI config for web project.
+
+Serves the incident event stream (UlinziTracker.events) directly and hands
+every other request to Django. Run it with an ASGI server, e.g.
+
+    uvicorn web.asgi:application
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "web.settings")
+
+django_application = get_asgi_application()
+
+from UlinziTracker.events import EVENTS_PATH, sse_app  # noqa: E402  (needs apps loaded)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == EVENTS_PATH:
+        await sse_app(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -44,6 +44,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'UlinziTracker.metrics.MetricsMiddleware',
+    'UlinziTracker.routers.PrimaryPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -72,6 +74,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'web.wsgi.application'
+ASGI_APPLICATION = 'web.asgi.application'
 
 # -------------------------
 # DATABASE
@@ -80,8 +83,22 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Local stand-in for a read replica: the same file, and a mirror of the
+    # test database under `manage.py test`. Only used when listed in
+    # DATABASE_REPLICAS.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
 }
+# Writes go to default; views marked @use_replica read from one of these
+# (see UlinziTracker/routers.py).
+DATABASE_ROUTERS = ['UlinziTracker.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = 5          # a browser reads from the primary this long after its own write
+DB_HEALTH_CHECKS = False         # ping persistent connections at the start of each request
 
 # -------------------------
 # PASSWORD VALIDATION
@@ -124,6 +141,102 @@ LOGIN_REDIRECT_URL = 'UlinziTracker:dashboard'
 LOGIN_URL = 'UlinziTracker:login'
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
+# -------------------------
+# INCIDENT LISTS
+# -------------------------
+INCIDENTS_PER_PAGE = 25
+
+# -------------------------
+# CACHING
+# -------------------------
+# Local memory for development; the production profile below switches to a
+# backend shared by all worker processes so they see the same invalidations.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ulinzi',
+    }
+}
+ULINZI_CACHE_ALIAS = 'default'
+ULINZI_CACHE_TIMEOUT = 300
+
+# -------------------------
+# PDF EXPORT
+# -------------------------
+PDF_EXPORT_WORKERS = 2
+PDF_COMBINED_MAX_INCIDENTS = 500  # larger selections must use the streamed ZIP export
+PDF_CACHE_DIR = BASE_DIR / 'pdf_cache'
+PDF_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# -------------------------
+# CSV / XLS EXPORT (/incidents/export/)
+# -------------------------
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_XLS_MAX_ROWS = 250000     # xlwt keeps the workbook in memory; larger exports must use CSV
+
+# -------------------------
+# CHUNKED EVIDENCE UPLOADS
+# -------------------------
+UPLOAD_PARTS_DIR = BASE_DIR / 'upload_parts'
+UPLOAD_CHUNK_MAX_BYTES = 8 * 1024 * 1024
+UPLOAD_MAX_BYTES = 1024 * 1024 * 1024
+
+# -------------------------
+# INCIDENT EVENT STREAM (/events/, served by web/asgi.py)
+# -------------------------
+SSE_KEEPALIVE_SECONDS = 15
+SSE_QUEUE_SIZE = 100             # per connection; a slower client is disconnected
+SSE_REPLAY_EVENTS = 500          # recent events replayed after Last-Event-ID
+SSE_CHIEF_AREA_PRECISION = 5     # chiefs default to their own geohash area (~5 km)
+
+# -------------------------
+# GEO / HOTSPOTS
+# -------------------------
+GEO_HOTSPOT_PRECISION = 6          # geohash length of a heatmap cell (~1.2 x 0.6 km)
+GEO_HOTSPOT_REFRESH_MINUTES = 15
+
+# -------------------------
+# ARCHIVING (manage.py archive_incidents)
+# -------------------------
+ARCHIVE_AFTER_DAYS = 365         # resolved incidents reported longer ago move to the archive table
+ARCHIVE_INTERVAL_HOURS = 24      # how often the scheduled archive job runs
+
+# -------------------------
+# BACKGROUND JOBS (manage.py run_jobs)
+# -------------------------
+# Per-queue limit on jobs running at once in one worker process.
+JOB_QUEUE_CONCURRENCY = {
+    'default': 2,
+    'media': 2,
+    'pdf': 2,
+    'uploads': 2,
+    'mail': 1,
+}
+JOB_LEASE_SECONDS = 60            # a running job whose worker stops renewing this is requeued
+JOB_REQUEUE_INTERVAL_SECONDS = 60
+JOB_RETRY_BACKOFF_SECONDS = 30
+JOB_RETENTION_DAYS = 7
+
+# -------------------------
+# REQUEST METRICS (/metrics/, Prometheus text)
+# -------------------------
+# Every request is timed; only the sampled fraction also counts its queries.
+# Use a small rate (e.g. 0.05) in production.
+METRICS_ENABLED = True
+METRICS_SAMPLE_RATE = 1.0
+METRICS_REPEATED_QUERY_THRESHOLD = 10    # same statement more often than this is logged
+METRICS_BEARER_TOKEN = os.environ.get('METRICS_BEARER_TOKEN', '')   # lets Prometheus scrape without a session
+
+# -------------------------
+# MEDIA STREAMING
+# -------------------------
+# None: Django streams files itself (with Range support).
+# 'x-sendfile': Apache/lighttpd read the file named in X-Sendfile.
+# 'x-accel-redirect': nginx serves MEDIA_SENDFILE_PREFIX + name from an
+#   internal location aliased to the media root.
+MEDIA_SENDFILE = None
+MEDIA_SENDFILE_PREFIX = '/protected-media/'
+
 
 # -------------------------
 # EMAIL SETTINGS
@@ -139,9 +252,11 @@ EMAIL_USE_TLS = True
 # -------------------------
 # AUTHENTICATION BACKENDS
 # -------------------------
+# Same as Django's ModelBackend and allauth's backend, but the session user is
+# loaded together with its profile (see UlinziTracker/backends.py).
 AUTHENTICATION_BACKENDS = (
-    "django.contrib.auth.backends.ModelBackend",
-    "allauth.account.auth_backends.AuthenticationBackend",
+    "UlinziTracker.backends.ProfileModelBackend",
+    "UlinziTracker.backends.ProfileAllauthBackend",
 )
 
 # -------------------------
@@ -158,3 +273,61 @@ ACCOUNT_UNIQUE_EMAIL = True
 # DEFAULT AUTO FIELD
 # -------------------------
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# -------------------------
+# PRODUCTION PROFILE (ULINZI_ENV=production)
+# -------------------------
+# PostgreSQL with persistent, health-checked connections, an optional read
+# replica and a shared cache; secrets and hosts come from the environment.
+ULINZI_ENV = os.environ.get('ULINZI_ENV', 'development')
+
+if ULINZI_ENV == 'production':
+    DEBUG = False
+    SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+    ALLOWED_HOSTS = [host.strip() for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host.strip()]
+
+    def _postgres(host, port):
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'ulinzi'),
+            'USER': os.environ.get('POSTGRES_USER', 'ulinzi'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': host,
+            'PORT': port,
+            'CONN_MAX_AGE': int(os.environ.get('POSTGRES_CONN_MAX_AGE', 300)),
+            'OPTIONS': {'connect_timeout': 5},
+        }
+
+    DATABASES = {
+        'default': _postgres(os.environ.get('POSTGRES_HOST', 'localhost'), os.environ.get('POSTGRES_PORT', '5432')),
+    }
+    DATABASE_REPLICAS = []
+    if os.environ.get('POSTGRES_REPLICA_HOST'):
+        DATABASES['replica'] = _postgres(os.environ['POSTGRES_REPLICA_HOST'],
+                                         os.environ.get('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']))
+        DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+        DATABASE_REPLICAS = ['replica']
+    DB_HEALTH_CHECKS = True
+    METRICS_SAMPLE_RATE = 0.05
+
+    # Several worker processes must share cache entries and the generation
+    # that invalidates them; a per-process LocMemCache would keep serving
+    # stale lists. Memcached (pymemcache) when configured, otherwise
+    # files on this host.
+    if os.environ.get('MEMCACHED_LOCATION'):
+        CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+                'LOCATION': [location.strip() for location in os.environ['MEMCACHED_LOCATION'].split(',')
+                             if location.strip()],
+                'KEY_PREFIX': 'ulinzi',
+            }
+        }
+    else:
+        CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': os.environ.get('ULINZI_CACHE_DIR', BASE_DIR / 'cache'),
+            }
+        }